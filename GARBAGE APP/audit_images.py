@@ -0,0 +1,235 @@
+import json
+import os
+import re
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from build_derivatives import default_public, OUTPUT_DIR
+
+# Image audit for everything under public/: dimensions and format come from
+# the file headers only (PNG IHDR, JPEG SOF, GIF screen descriptor, WebP
+# VP8/VP8L/VP8X; other formats through Pillow's lazy open), never from
+# decoded pixels. Replaces the hardcoded check_dims.py.
+#
+#   python audit_images.py [--public ../public] [--max-kb 300] [--max-mpx 4] [--dpr 2] [--ratio 2]
+#                          [--sort bytes|pixels|ratio|path|format] [--asc] [--flagged] [--json]
+#
+# Flags: OVER-KB (file above --max-kb), OVER-MPX (more than --max-mpx megapixels),
+# OVERSIZED (native size more than --ratio x the largest displayed size at --dpr),
+# WRONG-EXT (e.g. JPEG data in a .png) and EMPTY/UNREADABLE.
+# Displayed sizes are read from the <img src="/assets/..."> tags of the front
+# end (Tailwind w-N/h-N classes, width/height attributes, px styles); an
+# asset used anywhere without a bounded size is never flagged OVERSIZED.
+# display_sizes.json next to this script ({"/assets/x.png": [width, height]},
+# either may be null) overrides what the scan finds.
+
+EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico', '.bmp', '.svg')
+HEAD = 64 * 1024
+MAX_KB = 300
+MAX_MPX = 4.0
+DPR = 2
+RATIO = 2.0
+DISPLAY_FILE = 'display_sizes.json'
+SOURCE_DIRS = ('components', 'src', 'pages', 'app')
+SORT_KEYS = ('bytes', 'pixels', 'ratio', 'path', 'format')
+_EXT_FORMAT = {'.png': 'png', '.jpg': 'jpeg', '.jpeg': 'jpeg', '.gif': 'gif', '.webp': 'webp'}
+
+_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_IMG = re.compile(r"<img\b[^>]*?/?>", re.S)
+_SRC = re.compile(r"""src=["'{]+(/assets/[^"'}\s]+)""")
+_TW = re.compile(r"(?<![\w:-])(w|h|max-w|max-h)-(\d+(?:\.5)?)(?![\w.-])")
+_ATTR = re.compile(r"""\b(width|height)=["'{]+(\d+)""")
+_STYLE = re.compile(r"""\b(width|height|maxWidth|maxHeight)\s*:\s*['"]?(\d+)px""")
+
+
+def _jpeg_size(head, path):
+    data, i = head, 2
+    while True:
+        while i + 4 <= len(data) and data[i] != 0xFF:
+            i += 1
+        if i + 9 > len(data):
+            if len(data) < os.path.getsize(path):   # a large EXIF block: read the rest once
+                with open(path, 'rb') as f:
+                    data = f.read()
+                continue
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in _SOF:
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+
+
+def header_size(path):
+    """(format, width, height) from the file header; width/height None when unknown (e.g. SVG)."""
+    with open(path, 'rb') as f:
+        head = f.read(HEAD)
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+        return ('png',) + struct.unpack('>II', head[16:24])
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return ('gif',) + struct.unpack('<HH', head[6:10])
+    if head[:2] == b'\xff\xd8':
+        size = _jpeg_size(head, path)
+        return ('jpeg',) + (size or (None, None))
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        chunk = head[12:16]
+        if chunk == b'VP8 ':
+            w, h = struct.unpack('<HH', head[26:30])
+            return 'webp', w & 0x3FFF, h & 0x3FFF
+        if chunk == b'VP8L':
+            bits = struct.unpack('<I', head[21:25])[0]
+            return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return 'webp', int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+    if path.lower().endswith('.svg'):
+        return 'svg', None, None
+    with Image.open(path) as img:          # lazy: reads the header, not the pixels
+        return img.format.lower(), img.width, img.height
+
+
+def audit_one(job):
+    """Worker: (url, format, width, height, bytes, error)."""
+    url, path = job
+    try:
+        fmt, width, height = header_size(path)
+        return url, fmt, width, height, os.path.getsize(path), None
+    except (OSError, ValueError, struct.error) as e:
+        return url, None, None, None, os.path.getsize(path), str(e)
+
+
+def files(public):
+    found = []
+    for folder, dirs, names in os.walk(public):
+        for name in names:
+            if name.lower().endswith(EXTENSIONS):
+                path = os.path.join(folder, name)
+                found.append(('/' + os.path.relpath(path, public).replace(os.sep, '/'), path))
+    return found
+
+
+def _px(unit):
+    return round(float(unit) * 4)        # Tailwind spacing scale: 1 unit = 0.25rem = 4px
+
+
+def displayed_sizes(root):
+    """{url: (max width px or None, max height px or None)}; None means unbounded somewhere."""
+    sizes = {}
+    for top in SOURCE_DIRS:
+        for folder, dirs, names in os.walk(os.path.join(root, top)):
+            dirs[:] = [d for d in dirs if d != 'node_modules']
+            for name in names:
+                if not name.endswith(('.tsx', '.jsx', '.html')):
+                    continue
+                with open(os.path.join(folder, name), 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+                for tag in _IMG.findall(text):
+                    src = _SRC.search(tag)
+                    if not src:
+                        continue
+                    bound = {'w': None, 'h': None}
+                    for kind, value in _TW.findall(tag):
+                        bound[kind[-1]] = max(bound[kind[-1]] or 0, _px(value))
+                    for kind, value in _ATTR.findall(tag) + _STYLE.findall(tag):
+                        axis = 'w' if kind.lower().endswith('width') else 'h'
+                        bound[axis] = max(bound[axis] or 0, int(value))
+                    url = src.group(1).split('?')[0]
+                    previous = sizes.get(url)
+                    current = (bound['w'], bound['h'])
+                    if previous is None:
+                        sizes[url] = current
+                    else:   # largest use wins; unbounded anywhere stays unbounded
+                        sizes[url] = tuple(None if p is None or c is None else max(p, c)
+                                           for p, c in zip(previous, current))
+    return sizes
+
+
+def oversize_ratio(width, height, display, dpr):
+    """How many times larger than needed the native image is (1.0 = exact), or None if unknown."""
+    if not display or not width or not height:
+        return None
+    ratios = []
+    if display[0]:
+        ratios.append(width / (display[0] * dpr))
+    if display[1]:
+        ratios.append(height / (display[1] * dpr))
+    # bounded on both axes: the looser axis decides what is really needed
+    return min(ratios) if ratios else None
+
+
+def main(argv):
+    args = argv[1:]
+    options = {'--public': None, '--max-kb': MAX_KB, '--max-mpx': MAX_MPX, '--dpr': DPR, '--ratio': RATIO,
+               '--sort': 'bytes'}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    ascending, flagged_only, as_json = '--asc' in args, '--flagged' in args, '--json' in args
+    if options['--sort'] not in SORT_KEYS:
+        print(f"--sort must be one of {', '.join(SORT_KEYS)}")
+        return 1
+    public = options['--public'] or default_public()
+    max_kb, max_mpx = float(options['--max-kb']), float(options['--max-mpx'])
+    dpr, ratio_limit = float(options['--dpr']), float(options['--ratio'])
+
+    start = time.perf_counter()
+    skip = os.path.normpath(os.path.join(public, OUTPUT_DIR))
+    jobs = [(url, path) for url, path in files(public) if not os.path.normpath(path).startswith(skip)]
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        results = list(pool.map(audit_one, jobs))
+    display = displayed_sizes(os.path.dirname(os.path.abspath(public)))
+    overrides = os.path.join(os.path.dirname(os.path.abspath(__file__)), DISPLAY_FILE)
+    if os.path.exists(overrides):
+        with open(overrides, 'r', encoding='utf-8') as f:
+            display.update({url: tuple(v) for url, v in json.load(f).items()})
+
+    rows = []
+    for url, fmt, width, height, size, error in results:
+        pixels = width * height if width and height else 0
+        ratio = oversize_ratio(width, height, display.get(url), dpr)
+        flags = []
+        if error:
+            flags.append('EMPTY' if size == 0 else 'UNREADABLE')
+        elif fmt != _EXT_FORMAT.get(os.path.splitext(url)[1].lower(), fmt):
+            flags.append('WRONG-EXT')
+        if size > max_kb * 1024:
+            flags.append('OVER-KB')
+        if pixels > max_mpx * 1e6:
+            flags.append('OVER-MPX')
+        if ratio is not None and ratio > ratio_limit:
+            flags.append('OVERSIZED')
+        rows.append({'path': url, 'format': fmt, 'width': width, 'height': height, 'pixels': pixels,
+                     'bytes': size, 'display': display.get(url), 'ratio': ratio, 'flags': flags, 'error': error})
+    elapsed = time.perf_counter() - start
+
+    key = options['--sort']
+    rows.sort(key=lambda r: (r[key] is None, r[key] or 0) if key in ('ratio', 'pixels', 'bytes')
+              else (r[key] or ''), reverse=not ascending and key in ('ratio', 'pixels', 'bytes'))
+    shown = [r for r in rows if r['flags']] if flagged_only else rows
+    if as_json:
+        print(json.dumps(shown, ensure_ascii=False, indent=1))
+        return 1 if any(r['flags'] for r in rows) else 0
+    print(f"{'path':58s} {'fmt':5s} {'size':>11s} {'MPx':>5s} {'KB':>7s} {'shown':>9s} {'x':>5s}  flags")
+    for r in shown:
+        dims = f"{r['width']}x{r['height']}" if r['width'] else '?'
+        shown_at = 'x'.join(str(v) if v else '-' for v in r['display']) if r['display'] and any(r['display']) else ''
+        ratio = f"{r['ratio']:.1f}" if r['ratio'] is not None else ''
+        print(f"{r['path']:58s} {r['format'] or '?':5s} {dims:>11s} {r['pixels'] / 1e6:5.1f} "
+              f"{r['bytes'] / 1024:7.0f} {shown_at:>9s} {ratio:>5s}  {' '.join(r['flags'])}")
+    flagged = sum(1 for r in rows if r['flags'])
+    print(f"{len(rows)} images, {sum(r['bytes'] for r in rows) / 1048576:.1f} MB, {flagged} flagged "
+          f"(> {max_kb:g} KB, > {max_mpx:g} MPx, > {ratio_limit:g}x displayed at {dpr:g}x DPR) in {elapsed * 1000:.0f} ms")
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,194 @@
+import sys
+import time
+import numpy as np
+from PIL import Image
+import ianua_matting
+
+# Benchmark ianua_matting presets against the per-script implementations they
+# replace, on synthetic 4K (3840x2160) RGBA inputs. The legacy functions below
+# are the processing cores of the old scripts, unchanged apart from taking and
+# returning arrays. Every run also checks that both produce the same pixels.
+#
+#   python bench_matting.py [--size 3840x2160] [--repeat 3] [--skip-loop]
+#
+# --skip-loop leaves out process_unified_glasses.py's per-pixel loop (~10 s at 4K).
+
+
+def legacy_saturation_keep(data, slender=False):          # remove_bg.py
+    r, g, b = data[:,:,0], data[:,:,1], data[:,:,2]
+    c_max = np.maximum(np.maximum(r, g), b).astype(np.float32)
+    c_min = np.minimum(np.minimum(r, g), b).astype(np.float32)
+    delta = c_max - c_min
+    saturation = np.zeros_like(c_max)
+    non_zero = c_max > 0
+    saturation[non_zero] = delta[non_zero] / c_max[non_zero]
+    keep_mask = ((saturation > 0.15) & (c_max > 40)) | (c_max > 220)
+    h, w = c_max.shape
+    cy, cx = h // 2, w // 2
+    y, x = np.ogrid[:h, :w]
+    if slender:
+        body_cutoff_y = int(h * 0.85)
+        geo_mask = ((y <= body_cutoff_y) & (np.abs(x - cx) < w * 0.22)) | \
+                   ((y > body_cutoff_y) & (np.abs(x - cx) < w * 0.28))
+    else:
+        bowl_cutoff_y = int(h * 0.65)
+        radius_x_bowl, radius_y_bowl = w * 0.40, h * 0.50
+        bowl_mask = (((x - cx)**2 / radius_x_bowl**2) + ((y - cy)**2 / radius_y_bowl**2) <= 1.2) & (y <= bowl_cutoff_y)
+        stem_mask = (y > bowl_cutoff_y) & (np.abs(x - cx) < w * 0.10)
+        base_mask = (y > int(h * 0.90)) & (np.abs(x - cx) < w * 0.25)
+        geo_mask = bowl_mask | stem_mask | base_mask
+    keep_mask = keep_mask & geo_mask
+    new_alpha = np.zeros_like(c_max, dtype=np.uint8)
+    new_alpha[keep_mask] = 255
+    data[:,:,3] = new_alpha
+    return data
+
+
+def _legacy_crop(data, new_alpha, pad):
+    rows = np.any(new_alpha > 0, axis=1)
+    cols = np.any(new_alpha > 0, axis=0)
+    if not np.any(rows) or not np.any(cols):
+        return None
+    h, w = new_alpha.shape
+    ymin, ymax = np.where(rows)[0][[0, -1]]
+    xmin, xmax = np.where(cols)[0][[0, -1]]
+    ymin, ymax = max(0, ymin - pad), min(h, ymax + pad)
+    xmin, xmax = max(0, xmin - pad), min(w, xmax + pad)
+    return data[ymin:ymax, xmin:xmax]
+
+
+def legacy_white_bg(data):          # process_white_glass.py, extract_rose.py, extract_sparkling_rose.py
+    r, g, b = data[:,:,0], data[:,:,1], data[:,:,2]
+    keep_mask = ~((r > 240) & (g > 240) & (b > 240))
+    c_max = np.maximum(np.maximum(r, g), b).astype(np.float32)
+    c_min = np.minimum(np.minimum(r, g), b).astype(np.float32)
+    delta = c_max - c_min
+    saturation = np.zeros_like(c_max)
+    non_zero = c_max > 0
+    saturation[non_zero] = delta[non_zero] / c_max[non_zero]
+    keep_mask = keep_mask | (saturation > 0.05)
+    new_alpha = np.zeros_like(r, dtype=np.uint8)
+    new_alpha[keep_mask] = 255
+    data[:,:,3] = new_alpha
+    return _legacy_crop(data, new_alpha, 10)
+
+
+def legacy_white_bg_left(data):          # extract_red_glass.py
+    r, g, b = data[:,:,0], data[:,:,1], data[:,:,2]
+    keep_mask = ~((r > 240) & (g > 240) & (b > 240))
+    h, w = r.shape
+    y, x = np.ogrid[:h, :w]
+    keep_mask = keep_mask & (x < int(w * 0.45))
+    new_alpha = np.zeros_like(r, dtype=np.uint8)
+    new_alpha[keep_mask] = 255
+    data[:,:,3] = new_alpha
+    return _legacy_crop(data, new_alpha, 5)
+
+
+def legacy_black_bg(data):          # make_transparent_logo.py
+    r, g, b, _ = data.T
+    black_areas = (r < 50) & (g < 50) & (b < 50)
+    data[..., 3][black_areas.T] = 0
+    return data
+
+
+def legacy_brightness(data, floor):          # process_golden_illustrations.py (30), process_vines.py (20)
+    r, g, b = data[:,:,0], data[:,:,1], data[:,:,2]
+    brightness = (r.astype(np.float32) + g.astype(np.float32) + b.astype(np.float32)) / 3.0
+    new_alpha = np.zeros_like(r, dtype=np.uint8)
+    mask = brightness > floor
+    new_alpha[mask] = np.clip(brightness[mask] * 2.0, 0, 255).astype(np.uint8)
+    data[:,:,3] = new_alpha
+    return data
+
+
+def legacy_glass_glow(data):          # process_unified_glasses.py
+    img = Image.fromarray(data)
+    newData = []
+    for item in img.getdata():
+        brightness = max(item[0], item[1], item[2])
+        if brightness < 8:
+            newData.append((0, 0, 0, 0))
+        else:
+            newData.append((item[0], item[1], item[2], min(255, int(brightness * 2.5))))
+    img.putdata(newData)
+    return np.array(img)
+
+
+CASES = [
+    ('saturation-keep', 'white', lambda d: legacy_saturation_keep(d)),
+    ('saturation-keep-slender', 'white', lambda d: legacy_saturation_keep(d, slender=True)),
+    ('white-bg', 'white', legacy_white_bg),
+    ('white-bg-left', 'white', legacy_white_bg_left),
+    ('black-bg', 'black', legacy_black_bg),
+    ('brightness-to-alpha', 'black', lambda d: legacy_brightness(d, 30)),
+    ('vines', 'black', lambda d: legacy_brightness(d, 20)),
+    ('glass-glow', 'black', legacy_glass_glow),
+]
+
+
+def synthetic(h, w, background, seed=0):
+    """A noisy, partly saturated subject on a flat white or black background."""
+    rng = np.random.default_rng(seed)
+    data = rng.integers(0, 256, size=(h, w, 4), dtype=np.uint8)
+    data[:, :, 3] = 255
+    y, x = np.ogrid[:h, :w]
+    outside = ((x - w // 2) / (w * 0.3)) ** 2 + ((y - h // 2) / (h * 0.45)) ** 2 > 1
+    flat = rng.integers(242, 256, size=(h, w), dtype=np.uint8) if background == 'white' \
+        else rng.integers(0, 12, size=(h, w), dtype=np.uint8)
+    for c in range(3):
+        data[:, :, c][outside] = flat[outside]
+    return data
+
+
+def _timed(fn, source, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        data = source.copy()
+        start = time.perf_counter()
+        result = fn(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv):
+    args = argv[1:]
+    size, repeat = '3840x2160', 3
+    if '--size' in args:
+        i = args.index('--size')
+        size = args[i + 1]
+        del args[i:i + 2]
+    if '--repeat' in args:
+        i = args.index('--repeat')
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+    skip_loop = '--skip-loop' in args
+    w, h = (int(v) for v in size.lower().split('x'))
+    sources = {bg: synthetic(h, w, bg) for bg in ('white', 'black')}
+
+    print(f"{w}x{h} RGBA, best of {repeat}")
+    print(f"{'preset':26s} {'legacy ms':>10s} {'matting ms':>11s} {'speedup':>8s}  output")
+    mismatched = 0
+    for preset, background, legacy in CASES:
+        source = sources[background]
+        new_ms, new = _timed(lambda d: ianua_matting.apply(d, preset), source, repeat)
+        if preset == 'glass-glow' and skip_loop:
+            print(f"{preset:26s} {'skipped':>10s} {new_ms * 1000:11.1f}")
+            continue
+        old_ms, old = _timed(legacy, source, 1 if preset == 'glass-glow' else repeat)
+        if old is None or new is None:
+            same = old is None and new is None
+            detail = 'both empty' if same else 'one empty'
+        elif old.shape != new.shape:
+            same, detail = False, f"shape {old.shape} vs {new.shape}"
+        else:
+            diff = int(np.count_nonzero(np.any(old != new, axis=2)))
+            same, detail = diff == 0, 'identical' if diff == 0 else f"{diff} pixels differ"
+        mismatched += not same
+        print(f"{preset:26s} {old_ms * 1000:10.1f} {new_ms * 1000:11.1f} {old_ms / new_ms:7.1f}x  {detail}")
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import ianua_matting
+from ianua_db import write_json_atomic
+
+# build-assets: every matted illustration in public/assets, from one manifest.
+# Replaces running the per-asset scripts (remove_bg.py, process_vines.py, ...)
+# one after the other: jobs run on a process pool sized to the cores, and an
+# output is only rebuilt when its source, preset parameters or the output
+# file itself changed since the last build.
+#
+#   python build_assets.py [assets_manifest.json] [--force] [--workers N] [--dry-run]
+#
+# Manifest format (JSON; relative paths are relative to the manifest):
+#   {"target_dir": "../public/assets",
+#    "groups": [
+#      {"name": "golden illustrations",
+#       "source_dir": "raw/golden",
+#       "preset": "brightness-to-alpha",          # see: python ianua_matting.py list
+#       "params": {"floor": 25},                  # optional preset overrides
+#       "files": {"golden_key_raw.png": "golden_key.png"}}]}
+#
+# Build state goes to .build_assets.json next to the manifest:
+#   {"<target path>": {"source": ..., "sha1": ..., "params": ..., "size": ..., "mtime_ns": ...}}
+# Sources are re-hashed only when their size/mtime changed.
+
+MANIFEST_FILE = 'assets_manifest.json'
+STATE_FILE = '.build_assets.json'
+
+
+class ManifestError(Exception):
+    pass
+
+
+def load_manifest(path):
+    """[(source, preset, params, target)] with absolute paths."""
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('groups'), list):
+        raise ManifestError(f"{path}: expected an object with a 'groups' list")
+    base = os.path.dirname(os.path.abspath(path))
+    target_dir = os.path.join(base, manifest.get('target_dir', '.'))
+    jobs, targets = [], set()
+    for n, group in enumerate(manifest['groups']):
+        where = f"{path} groups[{n}] ({group.get('name', '?')})"
+        try:
+            params = ianua_matting.params_for(group.get('preset'), **(group.get('params') or {}))
+        except KeyError as e:
+            raise ManifestError(f"{where}: {e.args[0]}")
+        source_dir = os.path.join(base, group.get('source_dir', '.'))
+        out_dir = os.path.join(base, group['target_dir']) if group.get('target_dir') else target_dir
+        for src, dst in (group.get('files') or {}).items():
+            target = os.path.normpath(os.path.join(out_dir, dst))
+            if target in targets:
+                raise ManifestError(f"{where}: target {dst} is produced twice")
+            targets.add(target)
+            jobs.append((os.path.normpath(os.path.join(source_dir, src)), group['preset'], params, target))
+    return jobs
+
+
+def params_key(preset, params):
+    return hashlib.sha1(json.dumps([ianua_matting.VERSION, preset, params], sort_keys=True)
+                        .encode('utf-8')).hexdigest()
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_sha1(path, st, previous):
+    """sha1 of the source, reusing the recorded one when size and mtime are unchanged."""
+    if previous and previous.get('source_size') == st.st_size and previous.get('source_mtime_ns') == st.st_mtime_ns:
+        return previous['sha1']
+    return file_sha1(path)
+
+
+def up_to_date(record, sha1, key, target):
+    if not record or record.get('sha1') != sha1 or record.get('params') != key:
+        return False
+    try:
+        st = os.stat(target)
+    except OSError:
+        return False
+    return st.st_size == record.get('size') and st.st_mtime_ns == record.get('mtime_ns')
+
+
+def build_one(job):
+    """Worker: (target, status, elapsed seconds, output (w, h) or error text)."""
+    source, preset, params, target = job
+    start = time.perf_counter()
+    tmp = f"{target}.tmp-{os.getpid()}.png"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        size = ianua_matting.process(source, tmp, preset, **params)
+        if size is None:
+            return target, 'empty', time.perf_counter() - start, 'nothing left after matting'
+        os.replace(tmp, target)
+    except (OSError, ValueError) as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return target, 'error', time.perf_counter() - start, str(e)
+    return target, 'built', time.perf_counter() - start, size
+
+
+def plan(jobs, state, force=False):
+    """(pending jobs, {target: record without output stat}, [(target, status, detail)] for the rest)."""
+    pending, records, settled = [], {}, []
+    for source, preset, params, target in jobs:
+        try:
+            st = os.stat(source)
+        except OSError:
+            settled.append((target, 'missing', source))
+            continue
+        previous = state.get(target)
+        sha1 = source_sha1(source, st, previous)
+        key = params_key(preset, params)
+        records[target] = {'source': source, 'preset': preset, 'sha1': sha1, 'params': key,
+                           'source_size': st.st_size, 'source_mtime_ns': st.st_mtime_ns}
+        if not force and up_to_date(previous, sha1, key, target):
+            settled.append((target, 'skip', None))
+        else:
+            pending.append((source, preset, params, target))
+    return pending, records, settled
+
+
+def run(jobs, workers=None):
+    if len(jobs) < 2 or workers == 1:
+        yield from map(build_one, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        yield from pool.map(build_one, jobs)
+
+
+def _show(path):
+    relative = os.path.relpath(path)
+    return path if relative.startswith('..' + os.sep + '..') else relative
+
+
+def main(argv):
+    args = argv[1:]
+    workers = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    force, dry_run = '--force' in args, '--dry-run' in args
+    args = [a for a in args if a not in ('--force', '--dry-run')]
+    manifest = args[0] if args else MANIFEST_FILE
+    state_path = os.path.join(os.path.dirname(os.path.abspath(manifest)), STATE_FILE)
+
+    start = time.perf_counter()
+    try:
+        jobs = load_manifest(manifest)
+    except (OSError, ValueError, ManifestError) as e:
+        print(f"ERROR: {e}")
+        return 1
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    pending, records, settled = plan(jobs, state, force)
+    counts, dirty = {}, False
+    for target, status, detail in settled:
+        counts[status] = counts.get(status, 0) + 1
+        if status == 'missing':
+            print(f"  MISSING  {_show(target)} (source {detail})")
+        elif state[target] != dict(state[target], **records[target]):
+            state[target].update(records[target])   # touched but unchanged source: remember the new mtime
+            dirty = True
+    if dry_run:
+        for _, preset, _, target in pending:
+            print(f"  WOULD BUILD {_show(target)} [{preset}]")
+        print(f"{len(jobs)} assets: {len(pending)} to build, {counts.get('skip', 0)} up to date, "
+              f"{counts.get('missing', 0)} missing sources (dry run)")
+        return 0
+
+    for target, status, elapsed, detail in run(pending, workers):
+        counts[status] = counts.get(status, 0) + 1
+        if status == 'built':
+            st = os.stat(target)
+            state[target] = dict(records[target], size=st.st_size, mtime_ns=st.st_mtime_ns)
+            print(f"  BUILT    {_show(target)} {detail[0]}x{detail[1]} ({elapsed * 1000:.0f} ms)")
+        else:
+            state.pop(target, None)
+            print(f"  {status.upper():8s} {_show(target)}: {detail}")
+        dirty = True
+    if dirty:
+        write_json_atomic(state, state_path)
+    print(f"{len(jobs)} assets: {counts.get('built', 0)} built, {counts.get('skip', 0)} up to date, "
+          f"{counts.get('missing', 0)} missing sources, {counts.get('error', 0) + counts.get('empty', 0)} failed "
+          f"in {time.perf_counter() - start:.2f} s")
+    return 1 if counts.get('error') or counts.get('empty') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
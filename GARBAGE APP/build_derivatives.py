@@ -0,0 +1,227 @@
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, features
+from build_assets import file_sha1
+from ianua_db import write_json_atomic
+
+# Responsive derivatives for the images under public/assets.
+# Every PNG/JPG is resized to the widths below (never upscaled) and written as
+# WebP, AVIF when this Pillow has the codec, and an optimised fallback in the
+# source format, into public/assets/responsive/ (same sub-folders). The
+# manifest lists widths, bytes and hashes per variant, plus ready-made srcset
+# strings for the front end:
+#
+#   {"widths": [...], "formats": ["avif", "webp", "jpg"],
+#    "assets": {"/assets/desktop_bg.jpg": {
+#        "width": 2752, "height": 1536, "bytes": 612345, "sha1": "...", "params": "...",
+#        "variants": {"webp": [{"src": "/assets/responsive/desktop_bg-320.webp", "width": 320,
+#                               "height": 179, "bytes": 9876, "sha1": "..."}, ...], ...},
+#        "srcset": {"webp": "/assets/responsive/desktop_bg-320.webp 320w, ...", ...}}}}
+#
+#   python build_derivatives.py [--public ../public] [--widths 320,640,1280] [--budget 150] [--force] [--workers N]
+#
+# Assets whose source and settings are unchanged keep their manifest entry and
+# files; derivatives of deleted sources (or of widths no longer configured) are
+# removed. The budget report compares each original with its smallest modern
+# variant at the largest width served - the native width, capped at the
+# largest configured width - and flags variants still above --budget KB.
+
+SOURCE_DIR = 'assets'
+OUTPUT_DIR = 'assets/responsive'
+MANIFEST_FILE = 'manifest.json'
+WIDTHS = (320, 640, 960, 1280, 1920)
+EXTENSIONS = ('.png', '.jpg', '.jpeg')
+QUALITY = {'webp': 78, 'avif': 55, 'jpg': 82}
+BUDGET_KB = 150
+
+
+def default_public():
+    return 'public' if os.path.isdir('public') else os.path.join('..', 'public')
+
+
+def modern_formats():
+    return ['avif', 'webp'] if features.check('avif') else ['webp']
+
+
+def sources(public):
+    """[(path relative to public, absolute path)] of every PNG/JPG under public/assets, output folder excluded."""
+    root, skip = os.path.join(public, SOURCE_DIR), os.path.normpath(os.path.join(public, OUTPUT_DIR))
+    found = []
+    for folder, dirs, files in os.walk(root):
+        if os.path.normpath(folder).startswith(skip):
+            dirs[:] = []
+            continue
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                path = os.path.join(folder, name)
+                found.append((os.path.relpath(path, public).replace(os.sep, '/'), path))
+    return found
+
+
+def widths_for(native, widths):
+    """Configured widths below the native width, plus the native width when it is below the largest."""
+    chosen = [w for w in widths if w < native]
+    if native <= max(widths):
+        chosen.append(native)
+    return chosen
+
+
+def params_key(widths, formats):
+    return hashlib.sha1(json.dumps([list(widths), formats, QUALITY], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _encode(img, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'jpg':
+        img.convert('RGB').save(buffer, 'JPEG', quality=QUALITY['jpg'], optimize=True, progressive=True)
+    elif fmt == 'png':
+        img.save(buffer, 'PNG', optimize=True)
+    elif fmt == 'webp':
+        img.save(buffer, 'WEBP', quality=QUALITY['webp'], method=4)
+    else:
+        img.save(buffer, 'AVIF', quality=QUALITY['avif'], speed=8)
+    return buffer.getvalue()
+
+
+def derive(job):
+    """Worker: (rel, entry or None, error or None)."""
+    rel, path, public, widths, formats, sha1, key = job
+    try:
+        with Image.open(path) as img:
+            img.load()
+            native_w, native_h = img.size
+            fallback = 'png' if img.format == 'PNG' else 'jpg'
+            has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+            base = img.convert('RGBA' if has_alpha else 'RGB')
+        stem = os.path.splitext(rel[len(SOURCE_DIR) + 1:])[0]
+        variants = {fmt: [] for fmt in formats + [fallback]}
+        for width in widths_for(native_w, widths):
+            height = max(1, round(native_h * width / native_w))
+            resized = base if width == native_w else base.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+            for fmt in variants:
+                data = _encode(resized, fmt)
+                out_rel = f"{OUTPUT_DIR}/{stem}-{width}.{fmt}"
+                out = os.path.join(public, out_rel)
+                os.makedirs(os.path.dirname(out), exist_ok=True)
+                with open(out, 'wb') as f:
+                    f.write(data)
+                variants[fmt].append({'src': '/' + out_rel, 'width': width, 'height': height, 'bytes': len(data),
+                                      'sha1': hashlib.sha1(data).hexdigest()})
+    except (OSError, ValueError) as e:
+        return rel, None, str(e)
+    entry = {'width': native_w, 'height': native_h, 'bytes': os.path.getsize(path), 'sha1': sha1, 'params': key,
+             'variants': variants,
+             'srcset': {fmt: ', '.join(f"{v['src']} {v['width']}w" for v in vs) for fmt, vs in variants.items()}}
+    return rel, entry, None
+
+
+def reusable(entry, sha1, key, public):
+    if not entry or entry.get('sha1') != sha1 or entry.get('params') != key:
+        return False
+    return all(os.path.exists(os.path.join(public, v['src'].lstrip('/')))
+               for vs in entry['variants'].values() for v in vs)
+
+
+def stale_files(previous, assets, keep=()):
+    """Variant files listed in the previous manifest but not in the new one (assets in keep excepted)."""
+    current = {v['src'] for entry in assets.values() for vs in entry['variants'].values() for v in vs}
+    return sorted({v['src'] for url, entry in previous.items() if url not in keep
+                   for vs in entry.get('variants', {}).values() for v in vs} - current)
+
+
+def budget_report(assets, formats, budget_kb):
+    """[(url, original bytes, best bytes, best format, over budget, width)] largest saving first.
+
+    width is that of the largest variant: the native width unless the image is
+    wider than the largest configured width.
+    """
+    rows = []
+    for url, entry in assets.items():
+        best = min(((vs[-1]['bytes'], fmt, vs[-1]['width']) for fmt, vs in entry['variants'].items()
+                    if fmt in formats and vs), default=None)
+        if best:
+            rows.append((url, entry['bytes'], best[0], best[1], best[0] > budget_kb * 1024, best[2]))
+    rows.sort(key=lambda r: r[2] - r[1])
+    return rows
+
+
+def run(jobs, workers=None):
+    if len(jobs) < 2 or workers == 1:
+        yield from map(derive, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        yield from pool.map(derive, jobs)
+
+
+def main(argv):
+    args = argv[1:]
+    options = {'--public': None, '--widths': None, '--budget': BUDGET_KB, '--workers': None}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    force = '--force' in args
+    public = options['--public'] or default_public()
+    widths = tuple(int(w) for w in options['--widths'].split(',')) if options['--widths'] else WIDTHS
+    budget_kb = float(options['--budget'])
+    workers = int(options['--workers']) if options['--workers'] else None
+    formats = modern_formats()
+    manifest_path = os.path.join(public, OUTPUT_DIR, MANIFEST_FILE)
+
+    start = time.perf_counter()
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get('assets', {})
+    key = params_key(widths, formats)
+    assets, jobs = {}, []
+    for rel, path in sources(public):
+        sha1 = file_sha1(path)
+        if not force and reusable(previous.get('/' + rel), sha1, key, public):
+            assets['/' + rel] = previous['/' + rel]
+        else:
+            jobs.append((rel, path, public, widths, formats, sha1, key))
+    failed = []
+    for rel, entry, error in run(jobs, workers):
+        if entry is None:
+            failed.append('/' + rel)
+            print(f"  ERROR {rel}: {error}")
+            continue
+        assets['/' + rel] = entry
+        print(f"  BUILT {rel} ({len(next(iter(entry['variants'].values())))} widths)")
+    assets = dict(sorted(assets.items()))
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    write_json_atomic({'widths': list(widths), 'formats': formats, 'assets': assets}, manifest_path)
+    # A source that failed to build keeps its old files until it builds again.
+    removed = stale_files(previous, assets, keep=failed)
+    for src in removed:
+        path = os.path.join(public, src.lstrip('/'))
+        if os.path.exists(path):
+            os.remove(path)
+
+    rows = budget_report(assets, formats, budget_kb)
+    print(f"{'asset':60s} {'original':>10s} {'best':>10s} {'width':>6s} {'saved':>7s}")
+    for url, original, best, fmt, over, width in rows:
+        saved = 100 * (1 - best / original) if original else 0
+        flag = '  OVER BUDGET' if over else ''
+        print(f"{url:60s} {original / 1024:9.0f}K {best / 1024:8.0f}K {width:6d} {fmt:4s} {saved:5.0f}%{flag}")
+    total_original = sum(r[1] for r in rows)
+    total_best = sum(r[2] for r in rows)
+    rebuilt = len(jobs) - len(failed)
+    print(f"{len(assets)} assets ({rebuilt} rebuilt, {len(assets) - rebuilt} unchanged, "
+          f"{len(removed)} stale files removed), formats {', '.join(formats)}: "
+          f"{total_original / 1048576:.1f} MB -> {total_best / 1048576:.1f} MB at the largest served width "
+          f"(at most {max(widths)}px), {sum(r[4] for r in rows)} over {budget_kb:g} KB, "
+          f"{time.perf_counter() - start:.1f} s -> {manifest_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
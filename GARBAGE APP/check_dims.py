@@ -1,5 +1,5 @@
-from PIL import Image
 import os
+from audit_images import header_size
 
 images = {
     "gold": "public/assets/ianua_logo_gold.png",
@@ -7,11 +7,12 @@ images = {
     "trans": "public/assets/ianua_logo_gold_transparent.png"
 }
 
+# Header-only: no pixel decoding. For every image under public/ use audit_images.py.
 for key, img_path in images.items():
     if os.path.exists(img_path):
         try:
-            with Image.open(img_path) as img:
-                print(f"{key}: {img.size}")
+            fmt, width, height = header_size(img_path)
+            print(f"{key}: {(width, height)}")
         except Exception:
             pass
     else:
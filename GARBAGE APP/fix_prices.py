@@ -1,7 +1,10 @@
-import json, re
+import re
+from ianua_db import IanuaDB
+from ianua_prices import normalize
 
 f = 'public/data/db.json'
-d = json.load(open(f, 'r', encoding='utf-8'))
+db = IanuaDB.load(f)
+d = db.data
 fixed = 0
 
 def clean_price(val):
@@ -12,6 +15,7 @@ def clean_price(val):
     return s if s else str(val)
 
 for w in d.get('wines', []):
+    before = fixed
     if w.get('price'):
         old = str(w['price'])
         w['price'] = clean_price(old)
@@ -25,6 +29,8 @@ for w in d.get('wines', []):
                 v['price'] = clean_price(old)
                 if v['price'] != old:
                     fixed += 1
+    if fixed != before and db.has('wines', w.get('id')):
+        db.touch('wines', w['id'])
 
 for m in d.get('menu', []):
     if m.get('price'):
@@ -32,9 +38,15 @@ for m in d.get('menu', []):
         m['price'] = clean_price(old)
         if m['price'] != old:
             fixed += 1
+            if db.has('menu', m.get('id')):
+                db.touch('menu', m['id'])
 
-json.dump(d, open(f, 'w', encoding='utf-8'), ensure_ascii=False, indent=2)
+# Keep the structured priceValue in step with the cleaned display strings
+parsed, unparsable = normalize(db)
+
+db.save()
 print(f'Fixed {fixed} prices')
+print(f'Parsed {parsed} prices, {len(unparsable)} unparsable')
 
 # Show samples
 has_euro = 0
@@ -1,39 +1,22 @@
-import json, re
+from ianua_db import IanuaDB
+from ianua_cleanup import Engine, load_rules
 
 f = 'public/data/db.json'
-d = json.load(open(f, 'r', encoding='utf-8'))
-fixed = 0
+db = IanuaDB.load(f)
+d = db.data
 
-for w in d.get('wines', []):
-    for p in w.get('ianuaPairings', []):
-        notes = p.get('notes', '')
-        if 'TAG:' in notes:
-            # Remove "TAG: SomeLabel - " pattern anywhere in the text
-            cleaned = re.sub(r'\s*TAG:\s*[^-–]+\s*[-–]\s*', ' ', notes).strip()
-            # Also handle "TAG: SomeLabel" at the end without dash
-            cleaned = re.sub(r'\s*TAG:\s*\S+\s*$', '', cleaned).strip()
-            # Clean up any double spaces
-            cleaned = re.sub(r'\s{2,}', ' ', cleaned)
-            if cleaned != notes:
-                p['notes'] = cleaned
-                fixed += 1
-
-# Also fix label "Perfetto" where there's a better label from the notes
-for w in d.get('wines', []):
-    for p in w.get('ianuaPairings', []):
-        if p.get('label', '') == 'Perfetto' and p.get('description', ''):
-            desc = p['description']
-            m = re.match(r'^TAG:\s*([^-–]+)', desc)
-            if m:
-                p['label'] = m.group(1).strip()
-
-json.dump(d, open(f, 'w', encoding='utf-8'), ensure_ascii=False, indent=2)
-print(f'Fixed notes: {fixed}')
+# "TAG: SomeLabel - " prefixes/suffixes in notes, and "Perfetto" labels that
+# have a better label in the description: see cleanup_rules/tags.json
+engine = Engine(load_rules(['cleanup_rules/tags.json']))
+changed = engine.run(db)
+db.save()
+print(f'Fixed notes: {engine.hits["tag-prefix"] + engine.hits["tag-suffix"]} ({len(changed)} wines)')
+print(engine.report())
 
 # Verify
-remaining = sum(1 for w in d['wines'] for p in w.get('ianuaPairings', []) if 'TAG:' in p.get('notes', ''))
+remaining = sum(1 for w in d['wines'] for p in w.get('ianuaPairings', []) if 'TAG:' in (p.get('notes') or ''))
 print(f'Remaining TAG in notes: {remaining}')
-remaining_desc = sum(1 for w in d['wines'] for p in w.get('ianuaPairings', []) if 'TAG:' in p.get('description', ''))
+remaining_desc = sum(1 for w in d['wines'] for p in w.get('ianuaPairings', []) if 'TAG:' in (p.get('description') or ''))
 print(f'Remaining TAG in description: {remaining_desc}')
 perfetto = sum(1 for w in d['wines'] for p in w.get('ianuaPairings', []) if p.get('label', '') == 'Perfetto')
 print(f'Labels still "Perfetto": {perfetto}')
@@ -1,11 +1,10 @@
 
-import json
 import sys
+from ianua_db import IanuaDB
 
 try:
     print("Loading db.json...")
-    with open('db.json', 'r', encoding='utf-8') as f:
-        db = json.load(f)
+    db = IanuaDB.load('db.json')
 
     # Hardcoded Oberto data from piemonte_full_data.json (lines 433 and 752)
     oberto_nebbiolo = {
@@ -37,15 +36,11 @@ try:
     wines_to_add = [oberto_nebbiolo, oberto_barolo]
     
     for new_wine in wines_to_add:
-        existing = next((w for w in db['wines'] if w['id'] == new_wine['id']), None)
-        if existing:
+        if db.has('wines', new_wine['id']):
             print(f"Updating existing wine: {new_wine['id']}")
-            # Update fields
-            index = db['wines'].index(existing)
-            db['wines'][index] = new_wine
         else:
             print(f"Adding NEW wine: {new_wine['id']}")
-            db['wines'].insert(0, new_wine)
+        db.upsert('wines', new_wine, at_front=True)
             
     # Also verify winery
     oberto_winery = {
@@ -58,15 +53,13 @@ try:
       "image": ""
     }
     
-    existing_winery = next((w for w in db['wineries'] if w['id'] == oberto_winery['id']), None)
-    if not existing_winery:
+    if not db.has('wineries', oberto_winery['id']):
         print("Adding Andrea Oberto winery")
-        db['wineries'].insert(0, oberto_winery)
+        db.insert('wineries', oberto_winery, at_front=True)
     else:
         print("Winery found.")
 
-    with open('db.json', 'w', encoding='utf-8') as f:
-        json.dump(db, f, indent=2, ensure_ascii=False)
+    db.save()
     print("db.json saved successfully.")
 
 except Exception as e:
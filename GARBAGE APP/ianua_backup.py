@@ -0,0 +1,271 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from ianua_db import IanuaDB, DB_FILE, JOURNAL_SUFFIX, sidecar_path, write_json_atomic
+
+# Deduplicated backup store for db.json.
+# A snapshot is a small manifest listing one content hash per entity; the
+# entities themselves live once in chunks/<aa>/<sha256>.json and are shared by
+# every snapshot that contains them, so disk use grows with what changed.
+#
+#   python ianua_backup.py snapshot [db.json]
+#   python ianua_backup.py import db.safety-backup-*.json
+#   python ianua_backup.py list
+#   python ianua_backup.py verify [snapshot-id]
+#   python ianua_backup.py restore <snapshot-id> [db.json]
+#   python ianua_backup.py prune [--hourly 24] [--daily 14] [--weekly 8]
+#
+# Every snapshot is read back and checked after it is written. Snapshots with
+# no wines, wineries or menu (like the 92-byte safety-backup stubs) are refused.
+
+BACKUP_DIR = 'backups'
+RETENTION = {'hourly': 24, 'daily': 14, 'weekly': 8}
+TIMESTAMP_RE = re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2}-\d{3}Z)')
+
+
+class BackupError(Exception):
+    pass
+
+
+def now_id():
+    # Same format the server uses for db.safety-backup-<timestamp>.json
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H-%M-%S-%f')[:-3] + 'Z'
+
+
+def parse_id(snapshot_id):
+    return datetime.strptime(snapshot_id[:-1] + '000', '%Y-%m-%dT%H-%M-%S-%f').replace(tzinfo=timezone.utc)
+
+
+def _content_hash(value):
+    canonical = json.dumps(value, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class BackupStore:
+    def __init__(self, root=BACKUP_DIR):
+        self.root = root
+        self.chunk_dir = os.path.join(root, 'chunks')
+        self.snapshot_dir = os.path.join(root, 'snapshots')
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+    # --- Chunks ---
+
+    def _chunk_path(self, h):
+        return os.path.join(self.chunk_dir, h[:2], h + '.json')
+
+    def put_chunk(self, value):
+        # The hash is taken over sorted keys, so key order never defeats deduplication;
+        # the chunk keeps the entity's own key order for restores.
+        raw = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        h = _content_hash(value)
+        path = self._chunk_path(h)
+        if os.path.exists(path):
+            return h, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp, path)
+        return h, len(raw)
+
+    def get_chunk(self, h, check=True):
+        with open(self._chunk_path(h), 'rb') as f:
+            raw = f.read()
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            raise BackupError(f"chunk {h} is corrupted")
+        if check and _content_hash(value) != h:
+            raise BackupError(f"chunk {h} is corrupted")
+        return value
+
+    # --- Snapshots ---
+
+    def _manifest_path(self, snapshot_id):
+        return os.path.join(self.snapshot_dir, snapshot_id + '.json')
+
+    def snapshots(self):
+        return sorted(os.path.basename(p)[:-5] for p in glob.glob(os.path.join(self.snapshot_dir, '*.json')))
+
+    def manifest(self, snapshot_id):
+        with open(self._manifest_path(snapshot_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def snapshot(self, data, snapshot_id=None, source=None, allow_empty=False):
+        if not isinstance(data, dict):
+            raise BackupError("top level is not an object")
+        if not allow_empty and not any(data.get(k) for k in ('wines', 'wineries', 'menu')):
+            raise BackupError("wines, wineries and menu are all empty")
+        snapshot_id = snapshot_id or now_id()
+        if os.path.exists(self._manifest_path(snapshot_id)):
+            raise BackupError(f"snapshot {snapshot_id} already exists")
+        manifest = {'id': snapshot_id, 'source': source, 'keys': [], 'new_bytes': 0}
+        for key, value in data.items():
+            if isinstance(value, list):
+                hashes = []
+                for item in value:
+                    h, written = self.put_chunk(item)
+                    hashes.append(h)
+                    manifest['new_bytes'] += written
+                manifest['keys'].append({'key': key, 'items': hashes})
+            else:
+                h, written = self.put_chunk(value)
+                manifest['new_bytes'] += written
+                manifest['keys'].append({'key': key, 'value': h})
+        write_json_atomic(manifest, self._manifest_path(snapshot_id))
+        # Read back what we just wrote: a backup that can't be restored is worse than none.
+        if self.load(snapshot_id) != data:
+            os.remove(self._manifest_path(snapshot_id))
+            raise BackupError(f"snapshot {snapshot_id} failed verification")
+        return manifest
+
+    def load(self, snapshot_id, check=True):
+        data = {}
+        for entry in self.manifest(snapshot_id)['keys']:
+            if 'items' in entry:
+                data[entry['key']] = [self.get_chunk(h, check) for h in entry['items']]
+            else:
+                data[entry['key']] = self.get_chunk(entry['value'], check)
+        return data
+
+    def verify(self, snapshot_id):
+        try:
+            self.load(snapshot_id)
+            return None
+        except (OSError, ValueError, BackupError) as e:
+            return str(e)
+
+    # --- Retention ---
+
+    def plan_prune(self, now=None, hourly=RETENTION['hourly'], daily=RETENTION['daily'], weekly=RETENTION['weekly']):
+        """Return (keep, drop): newest snapshot per hour/day/ISO week inside each window, plus the latest."""
+        now = now or datetime.now(timezone.utc)
+        ids = self.snapshots()
+        keep = set(ids[-1:])
+        buckets = [
+            (timedelta(hours=hourly), lambda t: t.strftime('%Y-%m-%dT%H')),
+            (timedelta(days=daily), lambda t: t.strftime('%Y-%m-%d')),
+            (timedelta(weeks=weekly), lambda t: '%d-W%02d' % t.isocalendar()[:2]),
+        ]
+        for window, bucket_of in buckets:
+            seen = set()
+            for snapshot_id in reversed(ids):
+                t = parse_id(snapshot_id)
+                if now - t > window:
+                    break
+                b = bucket_of(t)
+                if b not in seen:
+                    seen.add(b)
+                    keep.add(snapshot_id)
+        return sorted(keep), [s for s in ids if s not in keep]
+
+    def prune(self, **retention):
+        keep, drop = self.plan_prune(**retention)
+        for snapshot_id in drop:
+            os.remove(self._manifest_path(snapshot_id))
+        return keep, drop, self.gc()
+
+    def gc(self):
+        """Delete chunks no remaining snapshot refers to. Returns bytes freed."""
+        live = set()
+        for snapshot_id in self.snapshots():
+            for entry in self.manifest(snapshot_id)['keys']:
+                live.update(entry.get('items') or [entry.get('value')])
+        freed = 0
+        for path in glob.glob(os.path.join(self.chunk_dir, '*', '*.json')):
+            if os.path.basename(path)[:-5] not in live:
+                freed += os.path.getsize(path)
+                os.remove(path)
+        return freed
+
+    def disk_usage(self):
+        return sum(os.path.getsize(p) for p in glob.glob(os.path.join(self.root, '**', '*.json'), recursive=True))
+
+
+def restore(store, snapshot_id, path=DB_FILE):
+    data = store.load(snapshot_id)
+    if os.path.exists(path):
+        # Keep the state we are about to overwrite, like the server's safety backup does.
+        try:
+            store.snapshot(IanuaDB.load(path).data, source=f"pre-restore {path}")
+        except BackupError as e:
+            print(f"WARNING: current {path} not backed up: {e}")
+    write_json_atomic(data, path)
+    journal = sidecar_path(path, JOURNAL_SUFFIX)
+    if os.path.exists(journal):
+        os.remove(journal)
+    return data
+
+
+def _pop_option(args, name, default):
+    if name in args:
+        i = args.index(name)
+        value = args[i + 1]
+        del args[i:i + 2]
+        return value
+    return default
+
+
+def main(argv):
+    args = argv[1:]
+    commands = ('snapshot', 'import', 'list', 'verify', 'restore', 'prune')
+    if not args or args[0] not in commands:
+        print(f"Usage: python ianua_backup.py {'|'.join(commands)} [...] [--store backups]")
+        return 1
+    command = args.pop(0)
+    store = BackupStore(_pop_option(args, '--store', BACKUP_DIR))
+
+    if command == 'snapshot':
+        path = args[0] if args else DB_FILE
+        m = store.snapshot(IanuaDB.load(path).data, source=path)
+        print(f"Snapshot {m['id']} of {path}: {m['new_bytes']} new bytes, store is {store.disk_usage() / 1024:.1f} KB")
+
+    elif command == 'import':
+        for path in args:
+            match = TIMESTAMP_RE.search(os.path.basename(path))
+            snapshot_id = match.group(1) if match else None
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                m = store.snapshot(data, snapshot_id=snapshot_id, source=os.path.basename(path))
+                print(f"OK      {path} -> {m['id']} ({m['new_bytes']} new bytes)")
+            except (ValueError, BackupError) as e:
+                print(f"SKIPPED {path}: {e}")
+        print(f"Store is {store.disk_usage() / 1024:.1f} KB")
+
+    elif command == 'list':
+        for snapshot_id in store.snapshots():
+            m = store.manifest(snapshot_id)
+            counts = ', '.join(f"{e['key']}={len(e['items'])}" for e in m['keys'] if 'items' in e)
+            print(f"{snapshot_id}  {counts}  [{m.get('source') or ''}]")
+
+    elif command == 'verify':
+        failed = 0
+        for snapshot_id in args or store.snapshots():
+            error = store.verify(snapshot_id)
+            print(f"{'OK ' if not error else 'BAD'} {snapshot_id}{': ' + error if error else ''}")
+            failed += bool(error)
+        return 1 if failed else 0
+
+    elif command == 'restore':
+        if not args:
+            print("Usage: python ianua_backup.py restore <snapshot-id> [db.json]")
+            return 1
+        path = args[1] if len(args) > 1 else DB_FILE
+        restore(store, args[0], path)
+        print(f"Restored {args[0]} to {path}")
+
+    elif command == 'prune':
+        retention = {k: int(_pop_option(args, f'--{k}', v)) for k, v in RETENTION.items()}
+        keep, drop, freed = store.prune(**retention)
+        print(f"Kept {len(keep)} snapshots, removed {len(drop)}, freed {freed / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,205 @@
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+from ianua_db import IanuaDB
+
+# Content-addressed image store for db.json.
+# `extract` moves every inline "data:<mime>;base64,..." string found in menu,
+# wines and wineries into blobs/<aa>/<sha256>.<ext> and leaves a short
+# "ianua-blob:<sha256>.<ext>" reference in its place. `pack` does the reverse
+# for exports that need a self-contained file (admin import, backups for the app).
+#
+#   python ianua_blobs.py extract db.json db.blobs.json
+#   python ianua_blobs.py pack db.blobs.json db.json
+#
+# Nothing in the app, server.js or the static /data/db.json route resolves
+# blob references, so an extracted file is a storage/transfer format only:
+# extract always needs an output path other than its input, and a file must be
+# packed again before it is served. Loads and saves go through IanuaDB, so
+# journaling, validation and --dry-run apply; with --dry-run extract only
+# hashes the images and writes nothing to the store.
+
+DB_FILE = 'db.json'
+BLOB_DIR = 'blobs'
+BLOB_PREFIX = 'ianua-blob:'
+COLLECTIONS = ['menu', 'wines', 'wineries']
+
+MIME_EXT = {
+    'image/webp': 'webp',
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/gif': 'gif',
+    'image/avif': 'avif',
+    'image/svg+xml': 'svg',
+}
+EXT_MIME = {'webp': 'image/webp', 'png': 'image/png', 'jpg': 'image/jpeg',
+            'gif': 'image/gif', 'avif': 'image/avif', 'svg': 'image/svg+xml'}
+
+
+def blob_path(store, name):
+    return os.path.join(store, name[:2], name)
+
+
+def put_bytes(store, raw, ext, dry_run=False):
+    """Write raw bytes to the store (once per content) and return the reference."""
+    name = f"{hashlib.sha256(raw).hexdigest()}.{ext}"
+    path = blob_path(store, name)
+    created = not os.path.exists(path)
+    if created and not dry_run:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(raw)
+        os.replace(tmp, path)
+    return BLOB_PREFIX + name, created
+
+
+def parse_data_uri(value):
+    if not value.startswith('data:'):
+        return None
+    header, sep, payload = value.partition(',')
+    if not sep or not header.endswith(';base64'):
+        return None
+    mime = header[5:-7].split(';')[0].lower()
+    ext = MIME_EXT.get(mime)
+    if not ext:
+        return None
+    return ext, base64.b64decode(payload)
+
+
+def _walk(obj, fn):
+    # Rewrites string leaves in place; fn returns the replacement or None.
+    # Returns the number of leaves replaced.
+    if isinstance(obj, dict):
+        items = obj.items()
+    elif isinstance(obj, list):
+        items = enumerate(obj)
+    else:
+        return 0
+    replaced = 0
+    for k, v in list(items):
+        if isinstance(v, str):
+            new = fn(v)
+            if new is not None:
+                obj[k] = new
+                replaced += 1
+        else:
+            replaced += _walk(v, fn)
+    return replaced
+
+
+def _rewrite(data, fn, stats):
+    # Records (collection, id) of every entity that changed, so callers can touch them.
+    for name in COLLECTIONS:
+        for entity in data.get(name, []):
+            if _walk(entity, fn) and isinstance(entity, dict):
+                stats['changed'].append((name, entity.get('id')))
+
+
+def extract(data, store=BLOB_DIR, dry_run=False):
+    stats = {'refs': 0, 'written': 0, 'bytes_inline': 0, 'skipped': 0, 'changed': []}
+
+    def fn(value):
+        if not value.startswith('data:'):
+            return None
+        parsed = parse_data_uri(value)
+        if not parsed:
+            stats['skipped'] += 1
+            return None
+        ext, raw = parsed
+        ref, created = put_bytes(store, raw, ext, dry_run)
+        stats['refs'] += 1
+        stats['written'] += created
+        stats['bytes_inline'] += len(value)
+        return ref
+
+    _rewrite(data, fn, stats)
+    return stats
+
+
+def pack(data, store=BLOB_DIR):
+    stats = {'refs': 0, 'missing': 0, 'changed': []}
+
+    def fn(value):
+        if not value.startswith(BLOB_PREFIX):
+            return None
+        name = value[len(BLOB_PREFIX):]
+        path = blob_path(store, name)
+        if not os.path.exists(path):
+            print(f"WARNING: missing blob {name}")
+            stats['missing'] += 1
+            return None
+        with open(path, 'rb') as f:
+            raw = f.read()
+        stats['refs'] += 1
+        mime = EXT_MIME[name.rsplit('.', 1)[1]]
+        return f"data:{mime};base64,{base64.b64encode(raw).decode('ascii')}"
+
+    _rewrite(data, fn, stats)
+    return stats
+
+
+def _timed_load(path):
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data, time.perf_counter() - start
+
+
+def _report(label, src, before, src_load, dst, dst_save):
+    after = os.path.getsize(dst)
+    _, dst_load = _timed_load(dst)
+    print(f"{label}: {src} {before / 1024:.1f} KB -> {dst} {after / 1024:.1f} KB "
+          f"({(after / before * 100) if before else 0:.1f}%)")
+    print(f"  load {src_load * 1000:.1f} ms -> {dst_load * 1000:.1f} ms, save {dst_save * 1000:.1f} ms")
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ('extract', 'pack'):
+        print("Usage: python ianua_blobs.py extract db.json output.json [--store blobs]\n"
+              "       python ianua_blobs.py pack [db.json] [output.json] [--store blobs]")
+        return 1
+    args = argv[2:]
+    store = BLOB_DIR
+    if '--store' in args:
+        i = args.index('--store')
+        store = args[i + 1]
+        del args[i:i + 2]
+    args = [a for a in args if a != '--dry-run']
+    src = args[0] if args else DB_FILE
+    dst = args[1] if len(args) > 1 else src
+    if argv[1] == 'extract' and os.path.abspath(dst) == os.path.abspath(src):
+        print("extract needs an output path other than the input: blob references are not "
+              "resolved by the app, so the served db.json must keep its inline images")
+        return 1
+
+    before = os.path.getsize(src)
+    start = time.perf_counter()
+    db = IanuaDB.load(src)
+    load_time = time.perf_counter() - start
+    if argv[1] == 'extract':
+        stats = extract(db.data, store, db.dry_run)
+        print(f"Extracted {stats['refs']} inline images ({stats['bytes_inline'] / 1024:.1f} KB), "
+              f"{stats['written']} new blobs {'(dry run, not written) ' if db.dry_run else ''}in {store}/, {stats['skipped']} unsupported data URIs left inline")
+    else:
+        stats = pack(db.data, store)
+        print(f"Inlined {stats['refs']} blob references, {stats['missing']} missing")
+        if stats['missing']:
+            return 1
+    for collection, entity_id in stats['changed']:
+        if db.has(collection, entity_id):
+            db.touch(collection, entity_id)
+    start = time.perf_counter()
+    db.save(dst)
+    if db.dry_run:
+        return 0
+    _report(argv[1], src, before, load_time, dst, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,241 @@
+import json
+import re
+import sys
+from fnmatch import fnmatchcase
+from ianua_db import IanuaDB, DB_FILE, INDEXED
+
+# Rule-file driven text cleanup over every text field of the DB.
+# Replaces the one-off fix_tags.py / clean_oberto_pairing_text.py style
+# scripts: write a rule file (see cleanup_rules/) and run any number of them
+# together in a single pass.
+#
+#   python ianua_cleanup.py cleanup_rules/*.json [--db db.json] [--samples 3] [--dry-run]
+#
+# Rule file format (JSON):
+#   {"rules": [
+#     {"id": "tag-prefix",                          # name used in the report
+#      "scope": "wines.ianuaPairings[].notes",      # field path(s), fnmatch wildcards allowed; default "*"
+#      "regex": "\\s*TAG:\\s*[^-–]+[-–]\\s*",       # or "literal": "..."
+#      "flags": "i",                                # optional: i, m, s
+#      "replace": " ",                              # re.sub template (\\1 ...); default ""
+#      "only_if": "TAG:",                           # optional regex on the field as it was before this pass
+#      "order": 10},                                # optional, lower runs first; default file order
+#     {"id": "label-from-tag", "scope": "wines.ianuaPairings[].description",
+#      "regex": "^TAG:\\s*([^-–]+)", "replace": "\\1",
+#      "target": "label", "when": {"label": "Perfetto"}},   # write the match into a sibling field
+#     {"id": "no-dish-list", "scope": "wines.pairing", "ids": ["wine_1"], "regex": "\\S", "clear": true}
+#   ]}
+#
+# Rules are compiled once per field path, and each field gets one combined
+# prefilter search: text that no rule matches is skipped without running the
+# rules one by one. Combining renumbers groups, so a field path with a rule
+# that uses numbered backreferences (\1, (?(1)...)) gets no prefilter.
+# Only entities whose text actually changed are touched, so the journal and
+# the --dry-run diff list exactly those.
+
+FLAGS = {'i': re.IGNORECASE, 'm': re.MULTILINE, 's': re.DOTALL}
+_NUMBERED_BACKREF = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d")
+
+
+class RuleError(Exception):
+    pass
+
+
+class Rule:
+    __slots__ = ('id', 'scopes', 'pattern', 'source', 'flags', 'replace', 'order', 'ids', 'target', 'when', 'clear',
+                 'only_if')
+
+    def __init__(self, spec, default_order, origin):
+        self.id = spec.get('id') or f"{origin}#{default_order}"
+        if ('regex' in spec) == ('literal' in spec):
+            raise RuleError(f"{self.id}: give exactly one of 'regex' or 'literal'")
+        self.source = spec['regex'] if 'regex' in spec else re.escape(spec['literal'])
+        self.flags = spec.get('flags', '')
+        if set(self.flags) - set(FLAGS):
+            raise RuleError(f"{self.id}: unknown flags {self.flags!r}")
+        flags = sum(FLAGS[f] for f in set(self.flags))
+        try:
+            self.pattern = re.compile(self.source, flags)
+            self.only_if = re.compile(spec['only_if'], flags) if spec.get('only_if') else None
+        except re.error as e:
+            raise RuleError(f"{self.id}: bad regex: {e}")
+        scope = spec.get('scope', '*')
+        self.scopes = [scope] if isinstance(scope, str) else list(scope)
+        self.replace = spec.get('replace', '')
+        self.order = spec.get('order', default_order)
+        self.ids = {str(i) for i in spec['ids']} if spec.get('ids') else None
+        self.target = spec.get('target')
+        self.when = spec.get('when') or {}
+        self.clear = bool(spec.get('clear'))
+
+    def applies(self, path):
+        return any(fnmatchcase(path, scope) for scope in self.scopes)
+
+
+def load_rules(paths):
+    """Rules from every file, sorted by (order, file, position)."""
+    rules = []
+    for n, path in enumerate(paths):
+        with open(path, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        if not isinstance(spec, dict) or not isinstance(spec.get('rules'), list):
+            raise RuleError(f"{path}: expected an object with a 'rules' list")
+        for i, rule in enumerate(spec['rules']):
+            rules.append((n, i, Rule(rule, i, path)))
+    rules.sort(key=lambda r: (r[2].order, r[0], r[1]))
+    seen = set()
+    for _, _, rule in rules:
+        if rule.id in seen:
+            raise RuleError(f"duplicate rule id {rule.id!r}")
+        seen.add(rule.id)
+    return [rule for _, _, rule in rules]
+
+
+class Engine:
+    def __init__(self, rules, samples=3):
+        self.rules = rules
+        self.samples = samples
+        self.hits = {rule.id: 0 for rule in rules}
+        self.examples = {rule.id: [] for rule in rules}
+        self._compiled = {}
+
+    def _for_path(self, path):
+        """(rules, prefilter) for a field path like 'wines.ianuaPairings[].notes', compiled once."""
+        compiled = self._compiled.get(path)
+        if compiled is None:
+            rules = [rule for rule in self.rules if rule.applies(path)]
+            prefilter = None
+            if rules and not any(_NUMBERED_BACKREF.search(r.source) for r in rules):
+                parts = [f"(?{r.flags}:{r.source})" if r.flags else f"(?:{r.source})" for r in rules]
+                try:
+                    prefilter = re.compile('|'.join(parts))
+                except re.error:
+                    prefilter = None   # group references across rules: run the rules one by one
+            compiled = self._compiled[path] = (rules, prefilter)
+        return compiled
+
+    def run(self, db):
+        """Apply every rule to every text field. Returns the set of (collection, id) changed."""
+        changed = set()
+        for collection in INDEXED:
+            for entity in db.collection(collection):
+                if not isinstance(entity, dict) or entity.get('id') is None:
+                    continue
+                entity_id = str(entity['id'])
+                if self._walk(entity, collection, f"{collection}/{entity_id}", entity_id):
+                    changed.add((collection, entity_id))
+        for collection, entity_id in changed:
+            db.touch(collection, entity_id)
+        return changed
+
+    def _walk(self, container, path, where, entity_id):
+        changed = False
+        for k in list(container) if isinstance(container, dict) else range(len(container)):
+            # Read the value now, not from a snapshot: a 'target' rule may have
+            # written this field while an earlier sibling was being cleaned.
+            value = container[k]
+            if isinstance(container, dict):
+                if k == 'id':
+                    continue
+                field_path, field_where = f"{path}.{k}", f"{where}.{k}"
+            else:
+                field_path, field_where = f"{path}[]", f"{where}[{k}]"
+            if isinstance(value, (dict, list)):
+                changed |= self._walk(value, field_path, field_where, entity_id)
+            elif isinstance(value, str):
+                changed |= self._apply(container, k, value, field_path, field_where, entity_id)
+        return changed
+
+    def _apply(self, container, k, text, path, where, entity_id):
+        rules, prefilter = self._for_path(path)
+        if not rules or (prefilter is not None and not prefilter.search(text)):
+            return False
+        changed, original = False, text
+        for rule in rules:
+            if rule.ids is not None and entity_id not in rule.ids:
+                continue
+            if rule.only_if is not None and not rule.only_if.search(original):
+                continue
+            if rule.target is not None or rule.when:
+                if not isinstance(container, dict) or any(container.get(f) != v for f, v in rule.when.items()):
+                    continue
+            if rule.clear:
+                if rule.pattern.search(text):
+                    self._hit(rule, where, text, None)
+                    container[k] = None
+                    return True
+                continue
+            if rule.target is not None:
+                m = rule.pattern.search(text)
+                if m:
+                    value = m.expand(rule.replace).strip()
+                    if container.get(rule.target) != value:
+                        self._hit(rule, f"{where.rsplit('.', 1)[0]}.{rule.target}", container.get(rule.target), value)
+                        container[rule.target] = value
+                        changed = True
+                        if rule.target == k:
+                            text = value
+                continue
+            new = rule.pattern.sub(rule.replace, text)
+            if new != text:
+                self._hit(rule, where, text, new)
+                text = new
+        if text != container[k]:
+            container[k] = text
+            changed = True
+        return changed
+
+    def _hit(self, rule, where, before, after):
+        self.hits[rule.id] += 1
+        if len(self.examples[rule.id]) < self.samples:
+            self.examples[rule.id].append((where, before, after))
+
+    def report(self):
+        lines = []
+        for rule in self.rules:
+            lines.append(f"  {rule.id:30s} {self.hits[rule.id]:5d} hits")
+            for where, before, after in self.examples[rule.id]:
+                lines.append(f"      {where}: {_short(before)!r} -> {_short(after)!r}")
+        return '\n'.join(lines)
+
+
+def _short(text, width=80):
+    if text is None or len(text) <= width:
+        return text
+    return text[:width - 3] + '...'
+
+
+def main(argv):
+    args = argv[1:]
+    db_path = DB_FILE
+    samples = 3 if '--dry-run' in args else 0
+    if '--db' in args:
+        i = args.index('--db')
+        db_path = args[i + 1]
+        del args[i:i + 2]
+    if '--samples' in args:
+        i = args.index('--samples')
+        samples = int(args[i + 1])
+        del args[i:i + 2]
+    paths = [a for a in args if not a.startswith('--')]
+    if not paths:
+        print("Usage: python ianua_cleanup.py rules.json [more.json ...] [--db db.json] [--samples N] [--dry-run]")
+        return 1
+    try:
+        rules = load_rules(paths)
+    except (OSError, ValueError, RuleError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    db = IanuaDB.load(db_path)
+    engine = Engine(rules, samples)
+    changed = engine.run(db)
+    print(f"{len(rules)} rules, {len(changed)} entities changed")
+    print(engine.report())
+    if changed:
+        db.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
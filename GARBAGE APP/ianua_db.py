@@ -0,0 +1,420 @@
+import hashlib
+import json
+import marshal
+import os
+import struct
+import sys
+import time
+
+# Shared access layer for db.json.
+# Loads the file once and keeps hash indexes so scripts can look entities up
+# by id in O(1) instead of scanning whole collections with next(...).
+#
+#   from ianua_db import IanuaDB
+#   db = IanuaDB.load('db.json')
+#   wine = db.get('wines', 'andrea_oberto_barolo_2019')
+#   winery = db.winery_of(wine)
+#   db.upsert('wines', new_wine, at_front=True)
+#   db.save()
+#
+# Journal mode: IanuaDB.load(path, journal=True) makes save() append only the
+# entity-level changes to a .journal sidecar instead of rewriting the whole file.
+# Every load replays the journal on top of the snapshot, so readers always see
+# the latest state. `python ianua_db.py compact` folds the journal back into a
+# fresh snapshot. The Node server and the deployed site only read db.json, so
+# never journal public/data/db.json: its edits would not be served until compacted.
+#
+# Load cache: the parsed snapshot is kept in a marshal sidecar (.cache) keyed
+# on the JSON file's size, mtime and sha1. A fresh sidecar loads several
+# times faster than json.load; a stale one is rebuilt transparently.
+#
+# Sidecars live in .ianua/ next to these scripts (see sidecar_path), never
+# beside the JSON file: anything under public/ ships with the build.
+# `python ianua_db.py bench` compares both paths at 1x/10x/100x catalogue size.
+#
+# Dry run: any script that loads through IanuaDB and is started with --dry-run
+# (or loads with dry_run=True) prints a field-level diff of what save() would
+# change instead of writing anything.
+
+DB_FILE = 'db.json'
+JOURNAL_SUFFIX = '.journal'
+CACHE_SUFFIX = '.cache'
+CACHE_VERSION = f"ianua-cache-1-py{sys.version_info[0]}.{sys.version_info[1]}"
+COLLECTIONS = ['wines', 'wineries', 'menu', 'glossary', 'ai_instructions']
+INDEXED = ['wines', 'wineries', 'menu', 'glossary', 'ai_instructions']
+SIDECAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ianua')
+
+
+def sidecar_path(path, suffix):
+    """Journal/cache file for `path`: .ianua/<name>-<hash of the absolute path><suffix>."""
+    full = os.path.abspath(path)
+    tag = hashlib.sha1(full.encode('utf-8')).hexdigest()[:10]
+    return os.path.join(SIDECAR_DIR, f"{os.path.basename(full)}-{tag}{suffix}")
+
+
+def write_json_atomic(data, path):
+    # Write next to the target and rename over it, so a crash never leaves a half-written file.
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_json_cached(path, cache=True):
+    """json.load(path), served from the marshal sidecar when it still matches the file."""
+    if not cache:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    st = os.stat(path)
+    cache_path = sidecar_path(path, CACHE_SUFFIX)
+    raw = None
+    try:
+        with open(cache_path, 'rb') as f:
+            # Layout: 4-byte header length, marshalled key, marshalled data.
+            header = f.read(struct.unpack('<I', f.read(4))[0])
+            key = marshal.loads(header)
+            if key['version'] == CACHE_VERSION and key['size'] == st.st_size:
+                if key['mtime_ns'] == st.st_mtime_ns:
+                    return marshal.loads(f.read())
+                # Touched but maybe not changed (copy, checkout): compare content before reparsing.
+                with open(path, 'rb') as src:
+                    raw = src.read()
+                if hashlib.sha1(raw).hexdigest() == key['sha1']:
+                    data = marshal.loads(f.read())
+                    _write_cache(cache_path, st, key['sha1'], data)
+                    return data
+    except (OSError, EOFError, ValueError, TypeError, KeyError, struct.error):
+        pass
+    if raw is None:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    data = json.loads(raw)
+    _write_cache(cache_path, st, hashlib.sha1(raw).hexdigest(), data)
+    return data
+
+
+def _write_cache(cache_path, st, sha1, data):
+    header = marshal.dumps({'version': CACHE_VERSION, 'size': st.st_size,
+                            'mtime_ns': st.st_mtime_ns, 'sha1': sha1})
+    tmp = f"{cache_path}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            f.write(marshal.dumps(data))
+        os.replace(tmp, cache_path)
+    except (OSError, ValueError):
+        # The cache is only an accelerator; a read-only folder must not break loading.
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class IanuaDB:
+    def __init__(self, data, path=None, journal=False, dry_run=False):
+        self.data = data
+        self.path = path
+        self.journal = journal
+        self.dry_run = dry_run
+        self._pending = []
+        self._recording = True
+        self._torn_end = None
+        for name in COLLECTIONS:
+            if not isinstance(self.data.get(name), list):
+                self.data[name] = []
+        self.reindex()
+
+    @classmethod
+    def load(cls, path=DB_FILE, journal=False, cache=True, dry_run=None):
+        if dry_run is None:
+            dry_run = '--dry-run' in sys.argv
+        db = cls(read_json_cached(path, cache), path, journal=journal, dry_run=dry_run)
+        db._replay()
+        return db
+
+    @property
+    def journal_path(self):
+        return sidecar_path(self.path or DB_FILE, JOURNAL_SUFFIX)
+
+    def save(self, path=None, validate=True):
+        if validate:
+            self._warn_invalid()
+        if self.dry_run:
+            self._preview(path or self.path or DB_FILE)
+            return
+        if self.journal and path in (None, self.path):
+            self._append_journal()
+            return
+        path = path or self.path or DB_FILE
+        write_json_atomic(self.data, path)
+        if path == self.path and os.path.exists(self.journal_path):
+            # The snapshot now contains everything the journal described.
+            os.remove(self.journal_path)
+        self.path = path
+        self._pending = []
+
+    def compact(self):
+        """Fold the journal into a new snapshot and drop it."""
+        self._append_journal()
+        write_json_atomic(self.data, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def _warn_invalid(self):
+        from ianua_validate import validate
+        report = validate(self.data, samples=1)
+        if report.errors:
+            rules = ', '.join(f"{rule} x{n}" for rule, n in report.counts.items() if n)
+            print(f"WARNING: saving with {report.errors} validation errors ({rules}); "
+                  f"run ianua_validate.py for details")
+
+    def _preview(self, path):
+        from ianua_diff import diff, format_text
+        on_disk = IanuaDB.load(path, dry_run=False).data if os.path.exists(path) else {}
+        print(f"[dry run] {path} would change as follows:")
+        print(format_text(diff(on_disk, self.data)))
+        self._pending = []
+
+    # --- Journal ---
+
+    def _record(self, op, collection, entity_id, **payload):
+        if self._recording:
+            self._pending.append(dict(op=op, c=collection, id=str(entity_id), **payload))
+
+    def _append_journal(self):
+        if not self._pending:
+            return 0
+        lines = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in self._pending)
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        if self._torn_end is not None:
+            # Cut the torn record found by _replay off before appending after it.
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(self._torn_end)
+            self._torn_end = None
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        written = len(self._pending)
+        self._pending = []
+        return written
+
+    def _replay(self):
+        if not os.path.exists(self.journal_path):
+            return 0
+        with open(self.journal_path, 'rb') as f:
+            raw = f.read()
+        records, good_end = [], 0
+        for line in raw.split(b'\n'):
+            end = good_end + len(line) + 1
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    if raw[end:].strip():
+                        raise
+                    # Torn final append from a crash: ignore it here; the next append
+                    # truncates it (a read-only or --dry-run load leaves the file alone).
+                    print(f"WARNING: ignoring incomplete last record in {self.journal_path}")
+                    self._torn_end = good_end
+                    break
+            good_end = min(end, len(raw))
+        self._recording = False
+        try:
+            for r in records:
+                c, key = r['c'], r['id']
+                if r['op'] == 'put':
+                    self.upsert(c, r['e'], at_front=r.get('front', False))
+                elif r['op'] == 'set' and self.has(c, key):
+                    self.update(c, key, **r['f'])
+                elif r['op'] == 'del' and self.has(c, key):
+                    self.delete(c, key)
+        finally:
+            self._recording = True
+        return len(records)
+
+    # --- Indexes ---
+
+    def reindex(self):
+        """Rebuild every index from scratch (needed only after editing self.data by hand)."""
+        self._by_id = {}
+        self._pos = {}
+        for name in INDEXED:
+            self._by_id[name] = {}
+            self._pos[name] = None
+            for e in self.data[name]:
+                if isinstance(e, dict) and e.get('id') is not None:
+                    self._by_id[name][str(e['id'])] = e
+        self._wines_by_winery = {}
+        for w in self.data['wines']:
+            if isinstance(w, dict) and w.get('id') is not None:
+                self._link_winery(w)
+
+    def _link_winery(self, wine):
+        bucket = self._wines_by_winery.setdefault(wine.get('wineryId'), {})
+        bucket[str(wine['id'])] = wine
+
+    def _unlink_winery(self, wine):
+        bucket = self._wines_by_winery.get(wine.get('wineryId'))
+        if bucket is not None:
+            bucket.pop(str(wine['id']), None)
+            if not bucket:
+                del self._wines_by_winery[wine.get('wineryId')]
+
+    def _position(self, collection, key):
+        # Positions are rebuilt lazily: insert at the front and delete shift them.
+        if self._pos[collection] is None:
+            self._pos[collection] = {
+                str(e['id']): i for i, e in enumerate(self.data[collection])
+                if isinstance(e, dict) and e.get('id') is not None
+            }
+        return self._pos[collection][key]
+
+    # --- Lookups ---
+
+    def collection(self, name):
+        return self.data[name]
+
+    def get(self, collection, entity_id, default=None):
+        if entity_id is None:
+            return default
+        return self._by_id[collection].get(str(entity_id), default)
+
+    def has(self, collection, entity_id):
+        return entity_id is not None and str(entity_id) in self._by_id[collection]
+
+    def ids(self, collection):
+        return self._by_id[collection].keys()
+
+    def wines_of(self, winery_id):
+        return list(self._wines_by_winery.get(winery_id, {}).values())
+
+    def winery_of(self, wine):
+        return self.get('wineries', wine.get('wineryId')) if wine else None
+
+    # --- Mutations (keep the indexes in sync) ---
+
+    def insert(self, collection, entity, at_front=False):
+        key = str(entity['id'])
+        if key in self._by_id[collection]:
+            raise KeyError(f"{collection}: id '{key}' already exists")
+        if at_front:
+            self.data[collection].insert(0, entity)
+            self._pos[collection] = None
+        else:
+            self.data[collection].append(entity)
+            if self._pos[collection] is not None:
+                self._pos[collection][key] = len(self.data[collection]) - 1
+        self._by_id[collection][key] = entity
+        if collection == 'wines':
+            self._link_winery(entity)
+        self._record('put', collection, key, e=entity, front=at_front)
+        return entity
+
+    def replace(self, collection, entity):
+        """Swap the stored entity with the same id for `entity`, keeping its position."""
+        key = str(entity['id'])
+        old = self._by_id[collection][key]
+        self.data[collection][self._position(collection, key)] = entity
+        self._by_id[collection][key] = entity
+        if collection == 'wines':
+            self._unlink_winery(old)
+            self._link_winery(entity)
+        self._record('put', collection, key, e=entity)
+        return entity
+
+    def upsert(self, collection, entity, at_front=False):
+        if self.has(collection, entity['id']):
+            return self.replace(collection, entity)
+        return self.insert(collection, entity, at_front=at_front)
+
+    def update(self, collection, entity_id, **fields):
+        """Set fields on an existing entity. Use this (not direct dict edits) to change ids or wineryId."""
+        key = str(entity_id)
+        entity = self._by_id[collection][key]
+        if collection == 'wines':
+            self._unlink_winery(entity)
+        if 'id' in fields and str(fields['id']) != key:
+            new_key = str(fields['id'])
+            if new_key in self._by_id[collection]:
+                raise KeyError(f"{collection}: id '{new_key}' already exists")
+            del self._by_id[collection][key]
+            self._by_id[collection][new_key] = entity
+            self._pos[collection] = None
+        entity.update(fields)
+        if collection == 'wines':
+            self._link_winery(entity)
+        self._record('set', collection, key, f=fields)
+        return entity
+
+    def touch(self, collection, entity_id):
+        """Mark an entity edited in place (e.g. wine['ianuaPairings'] = ...) so it gets saved."""
+        self._record('put', collection, entity_id, e=self._by_id[collection][str(entity_id)])
+
+    def delete(self, collection, entity_id):
+        key = str(entity_id)
+        entity = self._by_id[collection].pop(key)
+        del self.data[collection][self._position(collection, key)]
+        self._pos[collection] = None
+        if collection == 'wines':
+            self._unlink_winery(entity)
+        self._record('del', collection, key)
+        return entity
+
+
+def load(path=DB_FILE, journal=False, cache=True, dry_run=None):
+    return IanuaDB.load(path, journal=journal, cache=cache, dry_run=dry_run)
+
+
+def bench(path, factors=(1, 10, 100), repeat=5):
+    """Time json.load against the sidecar cache on the catalogue scaled up by each factor."""
+    import tempfile
+    with open(path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with tempfile.TemporaryDirectory() as tmp:
+        for factor in factors:
+            data = {k: v for k, v in base.items()}
+            for name in INDEXED:
+                data[name] = [dict(e, id=f"{e.get('id')}_{n}") if n else e
+                              for n in range(factor) for e in base.get(name, []) if isinstance(e, dict)]
+            scaled = os.path.join(tmp, f"db_x{factor}.json")
+            with open(scaled, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            read_json_cached(scaled)  # build the sidecar
+            timings = []
+            for cache in (False, True):
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    read_json_cached(scaled, cache)
+                    best = min(best, time.perf_counter() - start)
+                timings.append(best)
+            size = os.path.getsize(scaled) / 1024 / 1024
+            os.remove(sidecar_path(scaled, CACHE_SUFFIX))
+            print(f"x{factor:<4d} {size:8.1f} MB  json {timings[0] * 1000:8.1f} ms  "
+                  f"cache {timings[1] * 1000:8.1f} ms  ({timings[0] / timings[1]:.1f}x)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    command = args.pop(0) if args and args[0] in ('stats', 'compact', 'bench') else 'stats'
+    path = args[0] if args else DB_FILE
+    if not os.path.exists(path):
+        print(f"File not found: {path}")
+        sys.exit(1)
+    if command == 'bench':
+        bench(path)
+        sys.exit(0)
+    if command == 'compact':
+        journal = sidecar_path(path, JOURNAL_SUFFIX)
+        size = os.path.getsize(journal) if os.path.exists(journal) else 0
+        IanuaDB.load(path, dry_run=False).compact()
+        print(f"Compacted {size} journal bytes into {path}")
+        sys.exit(0)
+    db = IanuaDB.load(path)
+    for name in COLLECTIONS:
+        print(f"{name}: {len(db.collection(name))}")
+    orphans = [w.get('id') for w in db.collection('wines') if not db.winery_of(w)]
+    print(f"Wines without a known winery: {len(orphans)}")
@@ -0,0 +1,255 @@
+import re
+import sys
+import time
+from collections import Counter
+from ianua_db import IanuaDB, DB_FILE
+from ianua_match import wine_tokens, winery_tokens, parse_size, parse_years, size_class
+from ianua_refs import RefIndex
+from ianua_text import fold
+
+# Near-duplicate detection and merging for wines and wineries.
+# Entities are grouped into blocks by their rarest normalised name tokens and
+# only compared inside a block, so thousands of imported rows cost a few
+# thousand comparisons instead of n². Pairs are scored with token-set and
+# edit-distance similarity, joined into clusters, and each cluster keeps one
+# winner; merging fills the winner's empty fields from the others and remaps
+# every reference through ianua_refs before deleting the losers.
+#
+#   python ianua_dedup.py find [db.json] [--collection wineries|wines] [--threshold 0.85]
+#   python ianua_dedup.py merge [db.json] [--collection ...] [--threshold 0.85] [--dry-run]
+#
+# Wineries are merged before wines so that wines of two merged wineries end up
+# in the same block. Wines only pair up inside one winery (or when one side is
+# still on a placeholder winery such as 'cantina_importata') and only when
+# bottle size and vintages (from the name, 'year' or an id ending in _<year>) agree.
+
+DEFAULT_THRESHOLD = 0.85
+BLOCK_TOKENS = 2        # rarest tokens per entity used as block keys
+MAX_BLOCK = 200         # larger blocks are too generic to be useful
+PLACEHOLDER_WINERIES = {'cantina_importata'}
+_ID_YEAR = re.compile(r"_((?:19|20)\d{2})$")
+
+
+def levenshtein(a, b, limit=None):
+    """Edit distance, or limit + 1 as soon as it is known to exceed limit.
+
+    With a limit only the diagonal band of width 2 * limit + 1 is computed.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is None:
+        limit = len(a)
+    if len(a) - len(b) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(lo, hi + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != b[j - 1]), over)
+        if min(current[lo - 1:hi + 1]) > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+def similarity(a_tokens, b_tokens, threshold=0.0):
+    """max(token-set Jaccard, 1 - normalised edit distance of the sorted tokens).
+
+    The edit distance is cut off once the result can no longer reach threshold.
+    """
+    a, b = set(a_tokens), set(b_tokens)
+    if not a or not b:
+        return 0.0
+    jaccard = len(a & b) / len(a | b)
+    if jaccard >= threshold > 0:
+        return jaccard
+    x, y = ' '.join(sorted(a)), ' '.join(sorted(b))
+    longest = max(len(x), len(y))
+    distance = levenshtein(x, y, int((1 - threshold) * longest))
+    return max(jaccard, 1 - distance / longest)
+
+
+class Record:
+    __slots__ = ('entity', 'tokens', 'group', 'size', 'years')
+
+    def __init__(self, entity, tokens, group=None, size=None, years=frozenset()):
+        self.entity, self.tokens, self.group, self.size, self.years = entity, tokens, group, size, years
+
+
+def winery_records(db):
+    return [Record(w, winery_tokens(w.get('name'))) for w in db.collection('wineries')
+            if isinstance(w, dict) and w.get('id') is not None]
+
+
+def wine_records(db):
+    records = []
+    for w in db.collection('wines'):
+        if not isinstance(w, dict) or w.get('id') is None:
+            continue
+        folded = fold(w.get('name'))
+        years = set(parse_years(folded))
+        if str(w.get('year') or '').isdigit():
+            years.add(int(w['year']))
+        m = _ID_YEAR.search(str(w['id']))
+        if m:
+            years.add(int(m.group(1)))
+        winery = str(w.get('wineryId'))
+        records.append(Record(w, wine_tokens(w.get('name')), None if winery in PLACEHOLDER_WINERIES else winery,
+                              size_class(parse_size(folded)), frozenset(years)))
+    return records
+
+
+def compatible(a, b):
+    if a.group is not None and b.group is not None and a.group != b.group:
+        return False
+    if a.size != b.size:
+        return False
+    # Strict: an unvintaged row must not chain several vintages into one cluster.
+    return a.years == b.years
+
+
+def candidate_pairs(records):
+    """Pairs (i, j) that share one of their BLOCK_TOKENS rarest tokens, or an identical token set."""
+    frequency = Counter(t for r in records for t in set(r.tokens))
+    blocks = {}
+    for i, r in enumerate(records):
+        keys = set(sorted(set(r.tokens), key=lambda t: (frequency[t], t))[:BLOCK_TOKENS])
+        keys.add(' '.join(sorted(set(r.tokens))))
+        for key in keys:
+            blocks.setdefault(key, []).append(i)
+    pairs = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK:
+            continue
+        for n, i in enumerate(members):
+            for j in members[n + 1:]:
+                pairs.add((i, j))
+    return pairs
+
+
+def find(records, threshold=DEFAULT_THRESHOLD):
+    """Clusters of near-duplicate records: [([record, ...], [(i, j, score), ...]), ...]."""
+    parent = list(range(len(records)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    scored = []
+    pairs = candidate_pairs(records)
+    for i, j in pairs:
+        a, b = records[i], records[j]
+        if not compatible(a, b):
+            continue
+        score = similarity(a.tokens, b.tokens, threshold)
+        if score >= threshold:
+            scored.append((i, j, round(score, 3)))
+            parent[root(i)] = root(j)
+    clusters = {}
+    for i, j, score in scored:
+        clusters.setdefault(root(i), ([], []))[1].append((i, j, score))
+    for i, record in enumerate(records):
+        if root(i) in clusters:
+            clusters[root(i)][0].append(record)
+    return list(clusters.values()), len(pairs)
+
+
+def _filled(entity):
+    return sum(1 for k, v in entity.items() if v not in (None, '', [], {}))
+
+
+def winner_key(index, collection):
+    """Winner policy: real winery over placeholder, then most referenced, then most filled-in fields."""
+    def key(record):
+        e = record.entity
+        return (str(e.get('wineryId')) in PLACEHOLDER_WINERIES,
+                -len(index.refs_to(collection, e['id'])),
+                -_filled(e))
+    return key
+
+
+def merge_cluster(db, index, collection, records):
+    """Merge a cluster into its winner. Returns (winner id, [loser ids], touched paths)."""
+    ordered = sorted(records, key=winner_key(index, collection))
+    winner, losers = ordered[0].entity, [r.entity for r in ordered[1:]]
+    fills = {}
+    for loser in losers:
+        for field, value in loser.items():
+            if field != 'id' and winner.get(field) in (None, '', [], {}) and field not in fills \
+                    and value not in (None, '', [], {}):
+                fills[field] = value
+    pairings = [p for p in winner.get('ianuaPairings') or []]
+    dishes = {p.get('dishId') for p in pairings if isinstance(p, dict)}
+    for loser in losers:
+        for p in loser.get('ianuaPairings') or []:
+            if isinstance(p, dict) and p.get('dishId') not in dishes:
+                pairings.append(p)
+                dishes.add(p.get('dishId'))
+    if pairings != (winner.get('ianuaPairings') or []) and 'ianuaPairings' not in fills:
+        fills['ianuaPairings'] = pairings
+    if fills:
+        db.update(collection, winner['id'], **fills)
+    touched = index.remap(collection, {loser['id']: winner['id'] for loser in losers})
+    for loser in losers:
+        touched.extend(index.delete(collection, loser['id']))
+    return winner['id'], [loser['id'] for loser in losers], touched
+
+
+def describe(record):
+    e = record.entity
+    extra = f" [{e.get('wineryId')}]" if 'wineryId' in e else ''
+    return f"{e['id']} {e.get('name')!r}{extra}"
+
+
+def main(argv):
+    args = argv[1:]
+    if not args or args[0] not in ('find', 'merge'):
+        print("Usage: python ianua_dedup.py find|merge [db.json] [--collection wineries|wines] "
+              "[--threshold 0.85] [--dry-run]")
+        return 1
+    command = args.pop(0)
+    collections = ['wineries', 'wines']
+    threshold = DEFAULT_THRESHOLD
+    if '--collection' in args:
+        i = args.index('--collection')
+        collections = [args[i + 1]]
+        del args[i:i + 2]
+    if '--threshold' in args:
+        i = args.index('--threshold')
+        threshold = float(args[i + 1])
+        del args[i:i + 2]
+    args = [a for a in args if a != '--dry-run']
+    path = args[0] if args else DB_FILE
+
+    db = IanuaDB.load(path)
+    index = RefIndex(db)
+    merged = 0
+    for collection in collections:
+        start = time.perf_counter()
+        records = winery_records(db) if collection == 'wineries' else wine_records(db)
+        clusters, compared = find(records, threshold)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"== {collection}: {len(records)} entities, {compared} pairs compared, "
+              f"{len(clusters)} clusters ({elapsed:.1f} ms)")
+        for members, pairs in clusters:
+            print(f"  cluster of {len(members)} (best pair {max(s for _, _, s in pairs)}):")
+            for r in sorted(members, key=winner_key(index, collection)):
+                print(f"    {describe(r)}")
+            if command == 'merge':
+                winner, losers, touched = merge_cluster(db, index, collection, members)
+                merged += len(losers)
+                print(f"    -> kept {winner}, merged {', '.join(losers)}, {len(touched)} paths touched")
+    if command == 'merge' and merged:
+        db.save()
+        print(f"{merged} entities merged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,210 @@
+import json
+import sys
+from ianua_db import IanuaDB, INDEXED, DB_FILE, read_json_cached
+
+# Structural diff/patch between two db.json-shaped files.
+# Entities are matched by id inside each collection through hash maps, so a
+# diff is O(n); changes are reported per field.
+#
+#   python ianua_diff.py diff db.json db.safety-backup-2026-01-24T21-00-52-352Z.json
+#   python ianua_diff.py diff db.json piemonte_full_data.json --patch to_piemonte.json
+#   python ianua_diff.py patch db.json to_piemonte.json [--dry-run] [--force]
+#
+# Patch format:
+#   {"format": "ianua-patch-1",
+#    "collections": {"wines": {"added": [<entity>, ...],
+#                              "removed": {<id>: <entity>, ...},
+#                              "modified": {<id>: {"set": {field: new}, "unset": [field],
+#                                                  "before": {field: old}}}}}}
+# "before" lets `patch` refuse to overwrite fields that changed since the diff;
+# "removed" keeps the whole entity, so a delete is refused if it changed too.
+# Re-applying a patch is a no-op: entities already in their target state are
+# neither counted nor written.
+# A collection missing from either file (piemonte_full_data.json has only
+# wines and wineries) is not compared and is listed in "skipped_collections",
+# so a partial export never turns into "remove every menu item".
+
+PATCH_FORMAT = 'ianua-patch-1'
+_MISSING = object()
+
+
+def _entities(data, collection):
+    by_id, anonymous = {}, 0
+    for e in data.get(collection) or []:
+        if isinstance(e, dict) and e.get('id') is not None:
+            by_id[str(e['id'])] = e  # last duplicate wins, as in IanuaDB
+        else:
+            anonymous += 1
+    return by_id, anonymous
+
+
+def diff_entity(old, new):
+    changes = {'set': {}, 'unset': [], 'before': {}}
+    for k, v in new.items():
+        if k not in old or old[k] != v:
+            changes['set'][k] = v
+            if k in old:
+                changes['before'][k] = old[k]
+    for k in old:
+        if k not in new:
+            changes['unset'].append(k)
+            changes['before'][k] = old[k]
+    return changes if changes['set'] or changes['unset'] else None
+
+
+def diff(old, new, collections=INDEXED):
+    patch = {'format': PATCH_FORMAT, 'collections': {}, 'skipped_without_id': {}, 'skipped_collections': []}
+    for name in collections:
+        if name not in old or name not in new:
+            patch['skipped_collections'].append(name)
+            continue
+        a, a_anon = _entities(old, name)
+        b, b_anon = _entities(new, name)
+        added = [b[k] for k in b if k not in a]
+        removed = {k: a[k] for k in a if k not in b}
+        modified = {}
+        for k in b:
+            if k in a:
+                change = diff_entity(a[k], b[k])
+                if change:
+                    modified[k] = change
+        if added or removed or modified:
+            patch['collections'][name] = {'added': added, 'removed': removed, 'modified': modified}
+        if a_anon or b_anon:
+            patch['skipped_without_id'][name] = [a_anon, b_anon]
+    return patch
+
+
+def _short(value, width=90):
+    if isinstance(value, str) and value.startswith('data:'):
+        return f"<inline image, {len(value)} chars>"
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+def format_text(patch):
+    lines = []
+    for name, c in patch['collections'].items():
+        lines.append(f"== {name}: +{len(c['added'])} -{len(c['removed'])} ~{len(c['modified'])}")
+        for e in c['added']:
+            lines.append(f"+ {name}/{e['id']}  {e.get('name') or e.get('term') or ''}")
+        for k, e in c['removed'].items():
+            lines.append(f"- {name}/{k}  {e.get('name') or e.get('term') or ''}")
+        for k, change in c['modified'].items():
+            lines.append(f"~ {name}/{k}")
+            for field, value in change['set'].items():
+                if field in change['before']:
+                    lines.append(f"    {field}: {_short(change['before'][field])} -> {_short(value)}")
+                else:
+                    lines.append(f"    {field}: (new) {_short(value)}")
+            for field in change['unset']:
+                lines.append(f"    {field}: {_short(change['before'][field])} -> (removed)")
+    for name, (a, b) in patch.get('skipped_without_id', {}).items():
+        lines.append(f"!! {name}: {a} / {b} entries without id were not compared")
+    for name in patch.get('skipped_collections', []):
+        lines.append(f"!! {name}: missing from one file, not compared")
+    return '\n'.join(lines) if lines else 'No differences.'
+
+
+def apply_patch(db, patch, force=False):
+    """Apply a patch to an IanuaDB in memory. Returns (applied, conflicts)."""
+    if patch.get('format') != PATCH_FORMAT:
+        raise ValueError(f"not a {PATCH_FORMAT} patch")
+    applied, conflicts = 0, []
+    for name, c in patch['collections'].items():
+        for entity_id, old in c.get('removed', {}).items():
+            if not db.has(name, entity_id):
+                continue
+            if db.get(name, entity_id) != old and not force:
+                conflicts.append(f"{name}/{entity_id}: changed since diff, not removed")
+                continue
+            db.delete(name, entity_id)
+            applied += 1
+        for e in c.get('added', []):
+            if db.get(name, e['id']) == e:
+                continue
+            if db.has(name, e['id']) and not force:
+                conflicts.append(f"{name}/{e['id']}: already exists with different content")
+                continue
+            db.upsert(name, e)
+            applied += 1
+        for entity_id, change in c.get('modified', {}).items():
+            current = db.get(name, entity_id)
+            if current is None:
+                conflicts.append(f"{name}/{entity_id}: missing")
+                continue
+            # A field is stale if it is neither what the diff saw nor already the target value.
+            target = dict(change.get('set', {}), **{f: _MISSING for f in change.get('unset', [])})
+            if all(current.get(f, _MISSING) == v for f, v in target.items()):
+                continue
+            stale = [f for f, old in change.get('before', {}).items()
+                     if current.get(f, _MISSING) not in (old, target.get(f, _MISSING))]
+            if stale and not force:
+                conflicts.append(f"{name}/{entity_id}: changed since diff ({', '.join(stale)})")
+                continue
+            if change.get('set'):
+                db.update(name, entity_id, **change['set'])
+            for field in change.get('unset', []):
+                current.pop(field, None)
+            if change.get('unset'):
+                db.touch(name, entity_id)
+            applied += 1
+    return applied, conflicts
+
+
+def _load(path):
+    # The raw file, not IanuaDB's view of it: IanuaDB fills absent collections with [].
+    return read_json_cached(path)
+
+
+def main(argv):
+    args = argv[1:]
+    if len(args) < 3 or args[0] not in ('diff', 'patch'):
+        print("Usage: python ianua_diff.py diff <old.json> <new.json> [--patch out.json] [--collections wines,menu]")
+        print("       python ianua_diff.py patch <db.json> <patch.json> [--dry-run] [--force]")
+        return 1
+    command = args.pop(0)
+    flags = {a for a in args if a in ('--dry-run', '--force')}
+    args = [a for a in args if a not in flags]
+
+    if command == 'diff':
+        collections = INDEXED
+        out = None
+        if '--collections' in args:
+            i = args.index('--collections')
+            collections = args[i + 1].split(',')
+            del args[i:i + 2]
+        if '--patch' in args:
+            i = args.index('--patch')
+            out = args[i + 1]
+            del args[i:i + 2]
+        patch = diff(_load(args[0]), _load(args[1]), collections)
+        print(format_text(patch))
+        if out:
+            with open(out, 'w', encoding='utf-8') as f:
+                json.dump(patch, f, indent=2, ensure_ascii=False)
+            print(f"Patch written to {out}")
+        return 0
+
+    db = IanuaDB.load(args[0] if args[0] else DB_FILE, dry_run='--dry-run' in flags)
+    with open(args[1], 'r', encoding='utf-8') as f:
+        patch = json.load(f)
+    applied, conflicts = apply_patch(db, patch, force='--force' in flags)
+    for c in conflicts:
+        print(f"CONFLICT {c}")
+    if conflicts and '--force' not in flags:
+        print(f"Nothing written: {len(conflicts)} conflicts (use --force to overwrite)")
+        return 1
+    if not applied:
+        print("Nothing to apply: the database already matches the patch")
+        return 0
+    db.save()
+    if db.dry_run:
+        print(f"Would apply {applied} entity changes (dry run)")
+    else:
+        print(f"Applied {applied} entity changes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
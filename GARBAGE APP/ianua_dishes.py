@@ -0,0 +1,154 @@
+import sys
+import time
+from ianua_db import IanuaDB, DB_FILE
+from ianua_text import fold, words
+
+# Dish lookup by (partial) name, built once per DB load.
+# Every menu name (Italian `name`, French `name_fr`, and `name_en` when set) is
+# folded and split into tokens; each token is indexed under all its prefixes,
+# so "polent", "entree valdo" or "rognon porto" resolve with a few dict
+# lookups instead of a substring scan of the whole menu per reference.
+#
+#   python ianua_dishes.py "filetto" "polent" "escargots" [--db db.json] [--limit 5]
+#
+# A query matches a dish when every significant query token is a prefix of
+# some token of one of its names. Candidates are ranked by score (1.0 = exact
+# id or full name); resolve() refuses to guess when the best two candidates
+# are within AMBIGUITY_MARGIN of each other.
+
+FIELDS = ('name', 'name_fr', 'name_en')
+MIN_PREFIX = 3
+AMBIGUITY_MARGIN = 0.1
+STOPWORDS = {
+    'a', 'ai', 'al', 'alla', 'alle', 'allo', 'con', 'd', 'da', 'dei', 'del', 'della', 'delle', 'dell', 'di',
+    'e', 'gli', 'i', 'il', 'in', 'l', 'la', 'le', 'lo', 'o', 'su', 'sur', 'un', 'une',
+    'au', 'aux', 'de', 'des', 'du', 'en', 'et', 'ou', 'avec', 'the', 'and', 'with', 'of',
+}
+
+
+class DishError(Exception):
+    pass
+
+
+class DishIndex:
+    """Prefix index over menu names. `menu` is an IanuaDB or a plain list of menu dicts."""
+
+    def __init__(self, menu):
+        if isinstance(menu, IanuaDB):
+            menu = menu.collection('menu')
+        self.names = {}      # dish id -> display name
+        self.exact = {}      # folded full name -> {dish id}
+        self.prefixes = {}   # token prefix -> {(dish id, field, token)}
+        self.lengths = {}    # (dish id, field) -> number of significant tokens
+        self._cache = {}
+        for m in menu:
+            if not isinstance(m, dict) or m.get('id') is None:
+                continue
+            dish_id = str(m['id'])
+            self.names[dish_id] = m.get('name') or ''
+            for field in FIELDS:
+                if not m.get(field):
+                    continue
+                self.exact.setdefault(fold(m[field]), set()).add(dish_id)
+                tokens = [t for t in words(m[field]) if t not in STOPWORDS]
+                self.lengths[(dish_id, field)] = len(tokens) or 1
+                for token in tokens:
+                    for n in range(min(MIN_PREFIX, len(token)), len(token) + 1):
+                        self.prefixes.setdefault(token[:n], set()).add((dish_id, field, token))
+
+    def candidates(self, query, limit=None):
+        """[(score, dish id, field)] best first; one entry per dish (its best-scoring name)."""
+        key = fold(query)
+        ranked = self._cache.get(key)
+        if ranked is None:
+            ranked = self._cache[key] = self._rank(key)
+        return ranked[:limit] if limit else ranked
+
+    def _rank(self, key):
+        if key in self.names:
+            return [(1.0, key, 'id')]
+        if key in self.exact:
+            return sorted((1.0, dish_id, 'name') for dish_id in self.exact[key])
+        tokens = [t for t in words(key) if t not in STOPWORDS] or words(key)
+        if not tokens:
+            return []
+        # per (dish, field): best quality for each query token; all tokens must match
+        quality = None
+        for token in tokens:
+            hits = {}
+            for dish_id, field, word in self.prefixes.get(token, ()):
+                q = len(token) / len(word)
+                if q > hits.get((dish_id, field), 0):
+                    hits[(dish_id, field)] = q
+            if quality is None:
+                quality = {k: [q] for k, q in hits.items()}
+            else:
+                quality = {k: qs + [hits[k]] for k, qs in quality.items() if k in hits}
+            if not quality:
+                return []
+        best = {}
+        for (dish_id, field), qs in quality.items():
+            coverage = min(1.0, len(qs) / self.lengths[(dish_id, field)])
+            score = round(0.7 * sum(qs) / len(qs) + 0.25 * coverage, 3)
+            if score > best.get(dish_id, (0,))[0]:
+                best[dish_id] = (score, field)
+        return sorted(((score, dish_id, field) for dish_id, (score, field) in best.items()),
+                      key=lambda c: (-c[0], c[1]))
+
+    def resolve(self, query):
+        """Dish id for a query, None when nothing matches; DishError when the top candidates are too close."""
+        ranked = self.candidates(query, 2)
+        if not ranked:
+            return None
+        if len(ranked) > 1 and ranked[0][0] - ranked[1][0] < AMBIGUITY_MARGIN:
+            shown = self.candidates(query, 5)
+            raise DishError(f"dish '{query}' is ambiguous: "
+                            + ', '.join(f"{d} ({self.names[d]}, {s:.2f})" for s, d, _ in shown))
+        return ranked[0][1]
+
+    def resolve_many(self, queries):
+        """{query: dish id or None} plus {query: error} for the ambiguous ones."""
+        resolved, errors = {}, {}
+        for query in queries:
+            try:
+                resolved[query] = self.resolve(query)
+            except DishError as e:
+                errors[query] = str(e)
+        return resolved, errors
+
+
+def main(argv):
+    args = argv[1:]
+    path, limit = DB_FILE, 5
+    if '--db' in args:
+        i = args.index('--db')
+        path = args[i + 1]
+        del args[i:i + 2]
+    if '--limit' in args:
+        i = args.index('--limit')
+        limit = int(args[i + 1])
+        del args[i:i + 2]
+    if not args:
+        print("Usage: python ianua_dishes.py QUERY [QUERY ...] [--db db.json] [--limit N]")
+        return 1
+    db = IanuaDB.load(path)
+    start = time.perf_counter()
+    index = DishIndex(db)
+    built = (time.perf_counter() - start) * 1000
+    failed = 0
+    for query in args:
+        try:
+            dish_id = index.resolve(query)
+            status = f"-> {dish_id}" if dish_id else "NOT FOUND"
+        except DishError:
+            status = "AMBIGUOUS"
+        failed += not status.startswith('->')
+        print(f"{query!r} {status}")
+        for score, dish_id, field in index.candidates(query, limit):
+            print(f"    {score:.3f}  {dish_id:>4s}  {index.names[dish_id]}" + (f"  [{field}]" if field != 'name' else ''))
+    print(f"{len(index.names)} dishes indexed in {built:.1f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
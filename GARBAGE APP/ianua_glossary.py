@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from ianua_db import IanuaDB, DB_FILE, write_json_atomic, read_json_cached
+from ianua_text import Automaton, fold_aligned
+
+# Links glossary terms to the descriptions that use them.
+# Every glossary term, with its accent-free form, plural/inflected forms and
+# the parts of "Term (alias)" spellings, is compiled into one Aho–Corasick
+# automaton; each description field is scanned once. The result is written
+# next to the db as glossary_links.json:
+#
+#   {"glossaryLinks": {"wines/<id>": {"description": [[offset, length, "<term id>"], ...]}},
+#    "texts": {"wines/<id>.description": "<sha1 of text>"},
+#    "terms": {"<term id>": "<sha1 of its variants>"}}
+#
+#   python ianua_glossary.py [db.json] [--full]
+#
+# Offsets and lengths index the original (unfolded) text. Rebuilds only rescan
+# texts that changed, plus - when terms were added, edited or removed - the
+# texts that linked to those terms or contain one of their variants.
+
+LINKS_FILE = 'glossary_links.json'
+TEXT_FIELDS = {
+    'wines': ['description', 'pairing'],
+    'wineries': ['description', 'curiosity'],
+    'menu': ['description', 'story', 'preparation'],
+}
+LANGUAGES = ['', '_fr', '_en']
+MIN_LENGTH = 3
+
+# Italian plurals first (singular ending -> plural endings), then French/English +s.
+_INFLECTIONS = [('cia', ['ce', 'cie']), ('gia', ['ge', 'gie']), ('ca', ['che']), ('ga', ['ghe']),
+                ('io', ['i']), ('co', ['chi', 'ci']), ('go', ['ghi']), ('o', ['i']), ('a', ['e']), ('e', ['i'])]
+_PARENS = re.compile(r"\(([^)]*)\)")
+_ACRONYM = re.compile(r"^(?:[a-z]\.){2,}$")
+
+
+def links_path(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), LINKS_FILE)
+
+
+def _inflect(word):
+    forms = {word}
+    if len(word) >= 4 and word.isalpha():
+        for ending, plurals in _INFLECTIONS:
+            if word.endswith(ending):
+                forms.update(word[:-len(ending)] + p for p in plurals)
+                break
+        if word[-1] not in 'isx':
+            forms.add(word + 's')
+    return forms
+
+
+def variants(term):
+    """Folded spellings of a glossary term: 'Scheletro (del suolo)' -> scheletro, del suolo, scheletro del suolo, scheletri..."""
+    base = fold_aligned(term).strip()
+    spellings = {' '.join(_PARENS.sub(' ', base).split()), ' '.join(base.replace('(', ' ').replace(')', ' ').split())}
+    spellings.update(' '.join(p.split()) for p in _PARENS.findall(base))
+    found = set()
+    for spelling in spellings:
+        if not spelling:
+            continue
+        found.add(spelling)
+        words = spelling.split(' ')
+        if _ACRONYM.match(words[-1]):
+            found.add(' '.join(words[:-1] + [words[-1].replace('.', '')]))
+        # Italian compounds inflect the head noun: "muro a secco" -> "muri a secco"
+        for form in _inflect(words[0]):
+            found.add(' '.join([form] + words[1:]))
+    return {v for v in found if len(v) >= MIN_LENGTH}
+
+
+def term_variants(glossary):
+    """{term id: sorted variants}; a variant shared by several terms goes to the first one."""
+    owner, result = {}, {}
+    for g in glossary:
+        if not isinstance(g, dict) or g.get('id') is None or not g.get('term'):
+            continue
+        tid = str(g['id'])
+        mine = set(variants(g['term']))
+        for alias in g.get('aliases') or []:
+            mine |= variants(alias)
+        for v in sorted(mine):
+            owner.setdefault(v, tid)
+        result.setdefault(tid, set()).update(mine)
+    return {tid: sorted(v for v in vs if owner[v] == tid) for tid, vs in result.items()}
+
+
+def compile_terms(term_map):
+    automaton = Automaton()
+    for tid, vs in term_map.items():
+        for v in vs:
+            automaton.add(v, tid)
+    return automaton
+
+
+def texts(db):
+    """Yield (entity key, field, text) for every description-like field."""
+    for collection, bases in TEXT_FIELDS.items():
+        for entity in db.collection(collection):
+            if not isinstance(entity, dict) or entity.get('id') is None:
+                continue
+            for base in bases:
+                for lang in LANGUAGES:
+                    text = entity.get(base + lang)
+                    if isinstance(text, str) and text:
+                        yield f"{collection}/{entity['id']}", base + lang, text
+
+
+def scan(automaton, text):
+    return [[start, end - start, tid] for start, end, tid in automaton.find(fold_aligned(text))]
+
+
+def _sha(value):
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def build(db, previous=None):
+    """(links document, texts scanned, texts total)."""
+    previous = previous or {}
+    term_map = term_variants(db.collection('glossary'))
+    term_hashes = {tid: _sha(vs) for tid, vs in term_map.items()}
+    old_terms = previous.get('terms', {})
+    changed_terms = {t for t in set(term_hashes) | set(old_terms) if term_hashes.get(t) != old_terms.get(t)}
+    automaton = compile_terms(term_map)
+    probe = compile_terms({t: term_map[t] for t in changed_terms if t in term_map}) if changed_terms else None
+
+    old_links, old_texts = previous.get('glossaryLinks', {}), previous.get('texts', {})
+    links, hashes, scanned, total = {}, {}, 0, 0
+    for key, field, text in texts(db):
+        total += 1
+        text_key = f"{key}.{field}"
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        hashes[text_key] = digest
+        found = old_links.get(key, {}).get(field, []) if old_texts.get(text_key) == digest else None
+        if found is not None and changed_terms:
+            if any(tid in changed_terms for _, _, tid in found) or (probe and probe.find(fold_aligned(text))):
+                found = None
+        if found is None:
+            found = scan(automaton, text)
+            scanned += 1
+        if found:
+            links.setdefault(key, {})[field] = found
+    return {'glossaryLinks': links, 'texts': hashes, 'terms': term_hashes}, scanned, total
+
+
+def load_links(path):
+    if not os.path.exists(path):
+        return None
+    return read_json_cached(path, cache=False)
+
+
+def main(argv):
+    args = argv[1:]
+    full = '--full' in args
+    args = [a for a in args if a != '--full']
+    path = args[0] if args else DB_FILE
+    db = IanuaDB.load(path)
+    out = links_path(path)
+    start = time.perf_counter()
+    document, scanned, total = build(db, None if full else load_links(out))
+    elapsed = (time.perf_counter() - start) * 1000
+    write_json_atomic(document, out)
+
+    links = document['glossaryLinks']
+    count = sum(len(found) for fields in links.values() for found in fields.values())
+    used = {tid for fields in links.values() for found in fields.values() for _, _, tid in found}
+    print(f"{count} links in {len(links)} entities, {len(used)}/{len(document['terms'])} terms used; "
+          f"{scanned}/{total} texts scanned ({elapsed:.1f} ms) -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
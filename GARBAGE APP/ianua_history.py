@@ -0,0 +1,226 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from ianua_backup import TIMESTAMP_RE
+from ianua_db import CACHE_SUFFIX, JOURNAL_SUFFIX
+
+# Version-history index across every db backup lying around.
+# `index` parses each backup once (in parallel) and records, per entity, the
+# content hash it had in that file; distinct entity versions are stored once.
+# `history` then answers "when did this wine lose its pairing?" or "which
+# backup still has dish 29?" straight from the index. Re-indexing only parses
+# files whose size/mtime changed since the last run, and drops files that are
+# no longer on disk. Ids are only unique per collection (menu item 29 and
+# glossary entry 29 can share a backup), so history is kept per (collection, id).
+#
+#   python ianua_history.py index                 # default backup patterns (JSON files only)
+#   python ianua_history.py index db.json.pre_piemonte_backup live_data_backup.json
+#   python ianua_history.py history wine_1769635123838_0 pairing
+#   python ianua_history.py history 29 --in menu
+
+HISTORY_FILE = 'ianua_history.sqlite'
+# JSON files only (a bare *backup* also matches scripts, .tsx copies and notes);
+# pass backups with other names, like db.json.pre_piemonte_backup, explicitly.
+DEFAULT_PATTERNS = ['db*.json', '*backup*.json', '*RESTORE*.json']
+COLLECTIONS = ['wines', 'wineries', 'menu', 'glossary']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER, mtime REAL, sha TEXT,
+    taken TEXT,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS versions (
+    hash TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS occurrences (
+    file_id INTEGER NOT NULL,
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS occurrences_entity ON occurrences (id, collection);
+CREATE INDEX IF NOT EXISTS occurrences_file ON occurrences (file_id);
+"""
+
+
+def _shrink(value):
+    # Inline images would dominate the index; keep only a fingerprint so changes still show.
+    if isinstance(value, str) and value.startswith('data:'):
+        return f"[inline image {hashlib.sha1(value.encode('utf-8')).hexdigest()[:12]}]"
+    if isinstance(value, dict):
+        return {k: _shrink(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_shrink(v) for v in value]
+    return value
+
+
+def scan_file(path):
+    """Worker: parse one backup and return (sha, status, [(collection, id, hash, data)])."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    sha = hashlib.sha256(raw).hexdigest()
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        return sha, f"invalid json: {e}", []
+    if not isinstance(data, dict):
+        return sha, "not a db object", []
+    rows = []
+    for collection in COLLECTIONS:
+        for e in data.get(collection) or []:
+            if not isinstance(e, dict) or e.get('id') is None:
+                continue
+            text = json.dumps(_shrink(e), ensure_ascii=False, sort_keys=True)
+            rows.append((collection, str(e['id']), hashlib.sha1(text.encode('utf-8')).hexdigest(), text))
+    return sha, 'ok' if rows else 'empty', rows
+
+
+def taken_at(path, mtime):
+    # Prefer the timestamp the server writes into backup names; fall back to mtime.
+    match = TIMESTAMP_RE.search(os.path.basename(path))
+    if match:
+        return match.group(1)
+    return datetime.fromtimestamp(mtime, timezone.utc).strftime('%Y-%m-%dT%H-%M-%S-%f')[:-3] + 'Z'
+
+
+def connect(path=HISTORY_FILE):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def prune(conn):
+    """Forget indexed files that were deleted from disk, and versions nothing refers to."""
+    gone = [(file_id,) for file_id, path in conn.execute('SELECT file_id, path FROM files')
+            if not os.path.exists(path)]
+    if gone:
+        with conn:
+            conn.executemany('DELETE FROM occurrences WHERE file_id = ?', gone)
+            conn.executemany('DELETE FROM files WHERE file_id = ?', gone)
+            conn.execute('DELETE FROM versions WHERE hash NOT IN (SELECT hash FROM occurrences)')
+    return len(gone)
+
+
+def index(conn, paths, workers=None):
+    known = {p: (size, mtime) for p, size, mtime in conn.execute('SELECT path, size, mtime FROM files')}
+    todo = []
+    for path in paths:
+        st = os.stat(path)
+        if known.get(path) != (st.st_size, st.st_mtime):
+            todo.append((path, st.st_size, st.st_mtime))
+    if not todo:
+        return 0, len(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(scan_file, [t[0] for t in todo])
+        with conn:
+            for (path, size, mtime), (sha, status, rows) in zip(todo, results):
+                row = conn.execute('SELECT file_id FROM files WHERE path = ?', (path,)).fetchone()
+                if row:
+                    conn.execute('DELETE FROM occurrences WHERE file_id = ?', (row[0],))
+                    conn.execute('UPDATE files SET size = ?, mtime = ?, sha = ?, taken = ?, status = ? WHERE file_id = ?',
+                                 (size, mtime, sha, taken_at(path, mtime), status, row[0]))
+                    file_id = row[0]
+                else:
+                    file_id = conn.execute(
+                        'INSERT INTO files (path, size, mtime, sha, taken, status) VALUES (?, ?, ?, ?, ?, ?)',
+                        (path, size, mtime, sha, taken_at(path, mtime), status)).lastrowid
+                conn.executemany('INSERT OR IGNORE INTO versions (hash, data) VALUES (?, ?)',
+                                 [(h, text) for _, _, h, text in rows])
+                conn.executemany('INSERT INTO occurrences (file_id, collection, id, hash) VALUES (?, ?, ?, ?)',
+                                 [(file_id, c, i, h) for c, i, h, _ in rows])
+                print(f"  {status:5s} {path} ({len(rows)} entities)")
+    return len(todo), len(paths) - len(todo)
+
+
+def history(conn, entity_id, field=None, collection=None):
+    """{collection: timeline} for every collection holding the id.
+
+    A timeline has one row per indexed file, oldest first: (taken, path, value-or-None, present).
+    """
+    files = conn.execute("SELECT file_id, taken, path FROM files WHERE status = 'ok' ORDER BY taken, path").fetchall()
+    sql = ('SELECT o.file_id, o.collection, v.data FROM occurrences o JOIN versions v ON v.hash = o.hash '
+           'WHERE o.id = ?')
+    params = [str(entity_id)]
+    if collection:
+        sql += ' AND o.collection = ?'
+        params.append(collection)
+    found = {}   # (collection, file_id) -> entity
+    for file_id, coll, data in conn.execute(sql, params):
+        found.setdefault((coll, file_id), json.loads(data))
+    timelines = {}
+    for coll in sorted({c for c, _ in found}):
+        timeline = timelines[coll] = []
+        for file_id, taken, path in files:
+            entity = found.get((coll, file_id))
+            if entity is not None:
+                timeline.append((taken, path, entity.get(field) if field else entity, True))
+            else:
+                timeline.append((taken, path, None, False))
+    return timelines
+
+
+def _describe(value, present, field):
+    if not present:
+        return 'absent'
+    if field:
+        return 'missing field' if value is None else json.dumps(value, ensure_ascii=False)[:160]
+    return 'present ' + hashlib.sha1(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+
+
+def main(argv):
+    args = argv[1:]
+    if not args or args[0] not in ('index', 'history'):
+        print("Usage: python ianua_history.py index [files or globs...] [--workers N]")
+        print("       python ianua_history.py history <entity-id> [field] [--in collection]")
+        return 1
+    command = args.pop(0)
+    conn = connect()
+
+    if command == 'index':
+        workers = None
+        if '--workers' in args:
+            i = args.index('--workers')
+            workers = int(args[i + 1])
+            del args[i:i + 2]
+        paths = sorted({p for pattern in (args or DEFAULT_PATTERNS) for p in glob.glob(pattern)
+                        if os.path.isfile(p) and not p.startswith(HISTORY_FILE)
+                        and not p.endswith((JOURNAL_SUFFIX, CACHE_SUFFIX)) and '.tmp' not in p})
+        pruned = prune(conn)
+        parsed, skipped = index(conn, paths, workers)
+        print(f"Indexed {parsed} files, {skipped} unchanged, {pruned} deleted files dropped")
+        return 0
+
+    collection = None
+    if '--in' in args:
+        i = args.index('--in')
+        collection = args[i + 1]
+        del args[i:i + 2]
+    entity_id = args[0]
+    field = args[1] if len(args) > 1 else None
+    timelines = history(conn, entity_id, field, collection)
+    if not timelines:
+        print(f"{entity_id} is in no indexed file")
+        return 1
+    for coll, timeline in timelines.items():
+        print(f"== {coll}/{entity_id}")
+        last = object()
+        for taken, path, value, present in timeline:
+            text = _describe(value, present, field)
+            # Only print the points where something changed.
+            if text != last:
+                print(f"{taken}  {path}\n    {text}")
+                last = text
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
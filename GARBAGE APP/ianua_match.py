@@ -0,0 +1,386 @@
+import csv
+import json
+import re
+import sys
+import time
+from collections import Counter
+from ianua_db import IanuaDB, DB_FILE
+from ianua_prices import refresh
+from ianua_text import fold
+
+# Fuzzy matcher for supplier price lists against the wine catalogue.
+# Names are folded and stripped of bottle size, vintage and appellation
+# suffixes ("Torrette (0.375 L) | 2023", "Chardonnay – Vallée d'Aoste D.O.C.")
+# before comparing. Candidates come from a trigram index over the catalogue,
+# so a row is only scored against the few wines that share trigrams with it or
+# belong to a matching winery; the score combines wine name and winery.
+#
+#   python ianua_match.py match manual_prices.json raw_prices.txt final_prices_list.txt
+#   python ianua_match.py apply final_prices_list.txt [--db db.json] [--threshold 0.78] [--dry-run]
+#
+# `apply` writes an auditable report (--report, default price_match_report.tsv)
+# with one line per price row: status, score, chosen wine, runner-up and prices.
+# `match` and `apply --dry-run` are read-only and write it only when --report is given.
+# Status is matched, unmatched (below --threshold), ambiguous (runner-up within
+# AMBIGUITY_MARGIN), conflict (rows disagree on one wine's price) or no-price;
+# only matched rows are applied.
+#
+# Price list formats:
+#   *.json  [{"name", "winery", "price", "full_string"}]       (manual_prices.json)
+#   *.txt   "<name> [(<winery>)]: € 22 [(<winery>)] [/ € 19 (<winery>)] [; <vintage|size>: € 30 ...]"
+
+DEFAULT_THRESHOLD = 0.78
+AMBIGUITY_MARGIN = 0.03
+TOP_CANDIDATES = 25
+REPORT_FILE = 'price_match_report.tsv'
+
+# Removed from wine names before comparison (applied to folded text).
+_NOISE = re.compile(r"""
+    \bvall(?:ee|e)\s+d'\s?aost[ae]\b | \bvalle\s+d'\s?aosta\b |
+    \bd\.?o\.?[cp]\.?g?\.?(?=\W|$) | \bi\.?g\.?[tp]\.?(?=\W|$) | \baoc\b |
+    \bvin\s+de\s+table\b | \b(?:vino\s+)?(?:rosso|bianco|rosato)\b |
+    \((?:rosso|bianco|rosato|dolce|bollicine[^)]*)\)
+""", re.VERBOSE)
+_SIZE = re.compile(r"\(?\b(?:piccolina\s+)?(\d[.,]\d{1,3})\s*l\b\)?")
+_MAGNUM = re.compile(r"\bmagnum\b")
+_YEARS = re.compile(r"\b((?:19|20)\d{2})((?:\s*/\s*(?:\d{4}|\d{2}))*)\b")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_PRICE = re.compile(r"€\s*(\d+(?:[.,]\d+)?)|(\d+(?:[.,]\d+)?)\s*€")
+_PARENS = re.compile(r"\(([^()]*)\)")
+
+STOP_WORDS = {'de', 'di', 'du', 'des', 'la', 'le', 'les', 'lo', 'il', 'et', 'e', 'a', 'al', 'l', 'd'}
+WINERY_WORDS = STOP_WORDS | {
+    'cave', 'caves', 'cantina', 'cantine', 'azienda', 'agricola', 'societa', 'cooperativa',
+    'cooperative', 'cooperatives', 'vins', 'vini', 'vino', 'maison', 'chateau', 'domaine',
+    'terroir', 'viticoltore', 'famiglia', 'spiriti',
+}
+# Parenthesised words that describe the wine rather than name a winery.
+NOT_A_WINERY = {'rosso', 'bianco', 'rosato', 'dolce', 'bollicine', 'passito', 'spumante', 'magnum'}
+
+
+def parse_size(text):
+    """Bottle size in litres from a folded name, or None for a standard bottle."""
+    m = _SIZE.search(text)
+    if m:
+        return float(m.group(1).replace(',', '.'))
+    return 1.5 if _MAGNUM.search(text) else None
+
+
+def parse_years(text):
+    years = set()
+    for m in _YEARS.finditer(text):
+        first = int(m.group(1))
+        years.add(first)
+        for extra in re.findall(r"\d+", m.group(2)):
+            years.add(int(extra) if len(extra) == 4 else first // 100 * 100 + int(extra))
+    return years
+
+
+def wine_tokens(name):
+    """Folded name tokens without size, vintage and appellation suffixes."""
+    text = _NOISE.sub(' ', fold(name))
+    text = _YEARS.sub(' ', _MAGNUM.sub(' ', _SIZE.sub(' ', text)))
+    return [t for t in _TOKEN.findall(text) if t not in STOP_WORDS and (len(t) > 1 or t.isdigit())]
+
+
+def size_class(size):
+    """'half' / None (standard 0.75 l) / 'large': 0.35 and 0.375 l lists mean the same bottle."""
+    if size is None or size == 0.75:
+        return None
+    return 'half' if size < 0.75 else 'large'
+
+
+def winery_tokens(name):
+    return [t for t in _TOKEN.findall(fold(name)) if t not in WINERY_WORDS]
+
+
+def trigrams(tokens):
+    text = f" {' '.join(tokens)} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+def name_score(q_tokens, q_grams, c_tokens, c_grams):
+    """Half trigram similarity, half token Jaccard, so extra words on either side cost."""
+    if not q_tokens or not c_tokens:
+        return 0.0
+    q, c = set(q_tokens), set(c_tokens)
+    return (dice(q_grams, c_grams) + len(q & c) / len(q | c)) / 2
+
+
+def winery_score(q_tokens, q_grams, c_tokens, c_grams):
+    """Token containment either way ("Braga" in "Edoardo Braga"), or trigram similarity for typos."""
+    if not q_tokens or not c_tokens:
+        return 0.0
+    q, c = set(q_tokens), set(c_tokens)
+    return max(len(q & c) / min(len(q), len(c)), dice(q_grams, c_grams))
+
+
+# --- Price list parsing ---
+
+def _price(text):
+    m = _PRICE.search(text)
+    if not m:
+        return None
+    value = (m.group(1) or m.group(2)).replace(',', '.')
+    return value[:-2] if value.endswith('.0') else value
+
+
+def _split_parens(text):
+    """(text without winery-looking parentheses, winery or None)."""
+    winery = None
+    for inner in _PARENS.findall(text):
+        words = set(_TOKEN.findall(fold(inner)))
+        if not words or re.search(r"\d", inner) or words & NOT_A_WINERY:
+            continue
+        winery = inner.strip()
+        text = text.replace(f"({inner})", ' ')
+    return text.strip(), winery
+
+
+def parse_line(line, source, number):
+    line = line.strip()
+    if not line or ':' not in line:
+        return []
+    # "Rouge Tonen 2015/2016: 66 €; 2018: 62 €; Magnum: 130 €" - the name ends at the
+    # first separator; every "; <vintage or size>: <price>" after it is a row of its own,
+    # named after the wine without its years plus that qualifier.
+    name, _, rest = line.partition(': ') if ': ' in line else line.partition(':')
+    name, winery = _split_parens(name)
+    base = re.sub(r"\s+", ' ', _YEARS.sub(' ', name)).strip()
+    rows = []
+    for n, offer in enumerate(rest.split(';')):
+        offer_name = name
+        if n and ':' in offer:
+            qualifier, _, offer = offer.partition(':')
+            offer_name = f"{base} {qualifier.strip()}"
+        for segment in offer.split(' / '):
+            price = _price(segment)
+            if price is None and n:
+                continue
+            seg_winery = winery
+            for inner in _PARENS.findall(segment):
+                if seg_winery is None and len(inner.split()) <= 3 and not re.search(r"\d", inner):
+                    seg_winery = inner.strip()
+            rows.append({'source': source, 'line': number, 'text': line, 'name': offer_name,
+                         'winery': seg_winery, 'price': price})
+    return rows
+
+
+def load_price_list(path):
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        return [{'source': path, 'line': n + 1, 'text': e.get('full_string') or e.get('name'),
+                 'name': e.get('name') or e.get('full_string') or '', 'winery': e.get('winery'),
+                 'price': _price(str(e.get('price') or ''))}
+                for n, e in enumerate(entries) if isinstance(e, dict)]
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for n, line in enumerate(f, 1):
+            rows.extend(parse_line(line, path, n))
+    return rows
+
+
+# --- Catalogue index ---
+
+class Catalogue:
+    """Trigram index over wine names and winery names of an IanuaDB."""
+
+    def __init__(self, db):
+        self.db = db
+        self.wines = []       # [(wine, tokens, grams, size, years, winery id)]
+        self._grams = {}      # trigram -> [wine position]
+        self.wineries = {}    # winery id -> (winery tokens, trigrams)
+        self._winery_grams = {}
+        self._by_winery = {}  # winery id -> [wine position]
+        for w in db.collection('wineries'):
+            if isinstance(w, dict) and w.get('id') is not None:
+                tokens = winery_tokens(w.get('name'))
+                grams = trigrams(tokens)
+                self.wineries[str(w['id'])] = (tokens, grams)
+                for g in grams:
+                    self._winery_grams.setdefault(g, []).append(str(w['id']))
+        for w in db.collection('wines'):
+            if not isinstance(w, dict) or w.get('id') is None:
+                continue
+            folded = fold(w.get('name'))
+            tokens = wine_tokens(w.get('name'))
+            grams = trigrams(tokens)
+            position = len(self.wines)
+            winery_id = str(w.get('wineryId'))
+            self.wines.append((w, tokens, grams, parse_size(folded), parse_years(folded), winery_id))
+            for g in grams:
+                self._grams.setdefault(g, []).append(position)
+            self._by_winery.setdefault(winery_id, []).append(position)
+
+    def candidates(self, grams, winery_grams):
+        hits = Counter()
+        for g in grams:
+            hits.update(self._grams.get(g, ()))
+        found = {p for p, _ in hits.most_common(TOP_CANDIDATES)}
+        if winery_grams:
+            wineries = Counter()
+            for g in winery_grams:
+                wineries.update(self._winery_grams.get(g, ()))
+            for winery_id, shared in wineries.most_common(3):
+                if shared * 2 >= len(winery_grams):
+                    found.update(self._by_winery.get(winery_id, ()))
+        return found
+
+
+def score_row(catalogue, row):
+    """[(score, name score, winery score, wine), ...] best first."""
+    folded = fold(row['name'])
+    q_tokens = wine_tokens(row['name'])
+    q_size, q_years = parse_size(folded), parse_years(folded)
+    w_tokens = winery_tokens(row['winery']) if row.get('winery') else []
+    q_grams, w_grams = trigrams(q_tokens), trigrams(w_tokens) if w_tokens else None
+    per_winery = {}  # winery id -> (winery score, name tokens, name trigrams)
+    scored = []
+    for position in catalogue.candidates(q_grams, w_grams):
+        wine, c_tokens, c_grams, c_size, c_years, winery_id = catalogue.wines[position]
+        if winery_id not in per_winery:
+            c_winery, c_winery_grams = catalogue.wineries.get(winery_id, ([], set()))
+            if w_tokens:
+                per_winery[winery_id] = (winery_score(w_tokens, w_grams, c_winery, c_winery_grams),
+                                         q_tokens, q_grams)
+            else:
+                # No winery column: the winery may be embedded in the name ("Merlot La Kiuva").
+                embedded = set(c_winery) & set(q_tokens)
+                rest = [t for t in q_tokens if t not in embedded] or q_tokens
+                per_winery[winery_id] = (min(1.0, 2 * len(embedded) / len(set(c_winery))) if c_winery else 0.0,
+                                         rest, trigrams(rest))
+        ws, n_tokens, n_grams = per_winery[winery_id]
+        ns = name_score(n_tokens, n_grams, c_tokens, c_grams)
+        score = 0.65 * ns + 0.35 * ws if w_tokens or ws else 0.85 * ns
+        if size_class(q_size) != size_class(c_size):
+            score -= 0.2
+        if q_years and c_years:
+            score += 0.05 if q_years & c_years else -0.05
+        scored.append((round(score, 3), round(ns, 3), round(ws, 3), wine))
+    scored.sort(key=lambda s: -s[0])
+    return scored
+
+
+def match(catalogue, rows, threshold=DEFAULT_THRESHOLD):
+    """Attach status/score/wine/runner-up to every row (in place) and return rows."""
+    for row in rows:
+        scored = score_row(catalogue, row)
+        best = scored[0] if scored else None
+        runner = next((s for s in scored[1:] if s[3] is not best[3]), None) if best else None
+        row['score'] = best[0] if best else 0.0
+        row['wine'] = best[3] if best else None
+        row['runner_up'] = runner
+        if row['price'] is None:
+            row['status'] = 'no-price'
+        elif not best or best[0] < threshold:
+            row['status'] = 'unmatched'
+        elif runner and best[0] - runner[0] < AMBIGUITY_MARGIN:
+            row['status'] = 'ambiguous'
+        else:
+            row['status'] = 'matched'
+    # Two rows writing different prices to the same wine (or listed vintage): leave both for review.
+    prices = {}
+    for row in rows:
+        if row['status'] == 'matched':
+            vintage = price_vintage(row)
+            key = (row['wine']['id'], vintage.get('year') if vintage else None)
+            prices.setdefault(key, []).append(row)
+    for same in prices.values():
+        if len({r['price'] for r in same}) > 1:
+            for r in same:
+                r['status'] = 'conflict'
+    return rows
+
+
+def price_vintage(row):
+    """The listed vintage of the matched wine that the row names, or None for the wine's own price."""
+    years = parse_years(fold(row['name']))
+    return next((v for v in row['wine'].get('vintages') or []
+                 if isinstance(v, dict) and str(v.get('year')).isdigit() and int(v['year']) in years), None)
+
+
+def apply_prices(db, rows):
+    """Write matched prices (vintage price when the row names a listed vintage). Returns changes."""
+    changes = []
+    for row in rows:
+        if row['status'] != 'matched':
+            continue
+        wine = row['wine']
+        vintage = price_vintage(row)
+        target = vintage if vintage is not None else wine
+        before = target.get('price')
+        row['old_price'] = before
+        if str(before) == row['price']:
+            continue
+        target['price'] = row['price']
+        refresh(target)   # keep priceValue in step with the new display price
+        db.touch('wines', wine['id'])
+        changes.append((wine['id'], vintage.get('year') if vintage else None, before, row['price']))
+    return changes
+
+
+def write_report(rows, path):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        out = csv.writer(f, delimiter='\t')
+        out.writerow(['status', 'score', 'source', 'line', 'name', 'winery', 'price',
+                      'wine_id', 'wine_name', 'old_price', 'runner_up', 'runner_up_score'])
+        for r in rows:
+            wine, runner = r.get('wine'), r.get('runner_up')
+            out.writerow([r['status'], r['score'], r['source'], r['line'], r['name'], r['winery'] or '',
+                          r['price'] or '', wine['id'] if wine else '', wine.get('name') if wine else '',
+                          r.get('old_price', '') or '', runner[3]['id'] if runner else '',
+                          runner[0] if runner else ''])
+
+
+def main(argv):
+    args = argv[1:]
+    if len(args) < 2 or args[0] not in ('match', 'apply'):
+        print("Usage: python ianua_match.py match|apply <price list>... [--db db.json] "
+              "[--threshold 0.78] [--report price_match_report.tsv] [--dry-run]")
+        return 1
+    command = args.pop(0)
+    options = {'--db': DB_FILE, '--threshold': DEFAULT_THRESHOLD, '--report': None}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    paths = [a for a in args if a != '--dry-run']
+
+    db = IanuaDB.load(options['--db'])
+    start = time.perf_counter()
+    catalogue = Catalogue(db)
+    rows = [row for p in paths for row in load_price_list(p)]
+    match(catalogue, rows, float(options['--threshold']))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    counts = Counter(r['status'] for r in rows)
+    for r in rows:
+        if r['status'] in ('unmatched', 'ambiguous', 'conflict'):
+            best = f"{r['wine']['name']!r} ({r['score']})" if r['wine'] else '-'
+            print(f"{r['status'].upper():9s} {r['source']}:{r['line']} {r['name']!r} ({r['winery']}) best: {best}")
+    if command == 'apply':
+        changes = apply_prices(db, rows)
+        for wine_id, year, before, after in changes:
+            print(f"  {wine_id}{f' [{year}]' if year else ''}: {before} -> {after}")
+        if changes:
+            db.save()
+        print(f"{len(changes)} prices changed")
+    report = options['--report']
+    if report is None and command == 'apply' and not db.dry_run:
+        report = REPORT_FILE
+    print(f"{len(rows)} rows from {len(paths)} lists against {len(catalogue.wines)} wines in {elapsed:.1f} ms: "
+          + ', '.join(f"{n} {status}" for status, n in counts.most_common()))
+    if report:
+        write_report(rows, report)
+        print(f"Report written to {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,203 @@
+import sys
+import numpy as np
+from ianua_db import IanuaDB, DB_FILE
+from ianua_pairings import load_spec, plan, SpecError
+from ianua_text import Automaton, fold
+
+# Dish x wine pairing matrix built from all three places pairings live:
+#   VERIFIED  menu[].verifiedPairings[].wineId
+#   IANUA     wines[].ianuaPairings[].dishId
+#   TEXT      a dish named in the free-text wines[].pairing field
+# Each cell is a uint8 bit set of the sources, so the report is a handful of
+# vectorised aggregates instead of nested loops.
+#
+#   python ianua_matrix.py [db.json] [--min-wines 2] [--max-dishes 10]
+#   python ianua_matrix.py [db.json] --expect expected_pairings/*.json    # verify every listed pairing
+#   python ianua_matrix.py [db.json] --save matrix.npz                    # matrix + ids for notebooks
+#
+# Expected-pairing files use the pairing spec format of ianua_pairings.py
+# ({"wines": [{"wine": ..., "pairings": [{"dish": ...}, ...]}]}), so a
+# pairing spec can be verified directly. A pairing is OK when it is present
+# in both structured sources; one source only is reported as PARTIAL.
+
+VERIFIED, IANUA, TEXT = 1, 2, 4
+STRUCTURED = VERIFIED | IANUA
+SOURCE_NAMES = {VERIFIED: 'verified', IANUA: 'ianua', TEXT: 'text'}
+MIN_WINES_PER_DISH = 2
+MAX_DISHES_PER_WINE = 10
+
+
+class PairingMatrix:
+    def __init__(self, db):
+        self.dishes = [str(m['id']) for m in db.collection('menu') if isinstance(m, dict) and m.get('id') is not None]
+        self.wines = [str(w['id']) for w in db.collection('wines') if isinstance(w, dict) and w.get('id') is not None]
+        self.dish_index = {d: i for i, d in enumerate(self.dishes)}
+        self.wine_index = {w: i for i, w in enumerate(self.wines)}
+        self.cells = np.zeros((len(self.dishes), len(self.wines)), dtype=np.uint8)
+        self.dangling = []          # (source, path) of references to unknown ids
+        self.labels = {VERIFIED: [], IANUA: []}
+
+        rows, cols = {VERIFIED: [], IANUA: [], TEXT: []}, {VERIFIED: [], IANUA: [], TEXT: []}
+        for m in db.collection('menu'):
+            if not isinstance(m, dict) or m.get('id') is None:
+                continue
+            for n, p in enumerate(m.get('verifiedPairings') or []):
+                wine = str(p.get('wineId')) if isinstance(p, dict) else None
+                if wine not in self.wine_index:
+                    self.dangling.append(('verified', f"menu/{m['id']}.verifiedPairings[{n}]"))
+                    continue
+                rows[VERIFIED].append(self.dish_index[str(m['id'])])
+                cols[VERIFIED].append(self.wine_index[wine])
+                self.labels[VERIFIED].append(p.get('label') or '')
+        names = dish_names(db)
+        for w in db.collection('wines'):
+            if not isinstance(w, dict) or w.get('id') is None:
+                continue
+            col = self.wine_index[str(w['id'])]
+            for n, p in enumerate(w.get('ianuaPairings') or []):
+                dish = str(p.get('dishId')) if isinstance(p, dict) else None
+                if dish not in self.dish_index:
+                    self.dangling.append(('ianua', f"wines/{w['id']}.ianuaPairings[{n}]"))
+                    continue
+                rows[IANUA].append(self.dish_index[dish])
+                cols[IANUA].append(col)
+                self.labels[IANUA].append(p.get('label') or '')
+            if w.get('pairing'):
+                for _, _, dish in names.find(fold(w['pairing'])):
+                    rows[TEXT].append(self.dish_index[dish])
+                    cols[TEXT].append(col)
+        for bit in (VERIFIED, IANUA, TEXT):
+            np.bitwise_or.at(self.cells, (np.array(rows[bit], dtype=np.intp), np.array(cols[bit], dtype=np.intp)), bit)
+
+    def pairs(self, mask):
+        """[(dish id, wine id)] of cells where `mask` is true."""
+        return [(self.dishes[r], self.wines[c]) for r, c in np.argwhere(mask)]
+
+    def asymmetric(self):
+        """(verified only, ianua only) pairs."""
+        structured = self.cells & STRUCTURED
+        return self.pairs(structured == VERIFIED), self.pairs(structured == IANUA)
+
+    def text_only(self):
+        return self.pairs((self.cells & (STRUCTURED | TEXT)) == TEXT)
+
+    def wines_per_dish(self):
+        return ((self.cells & STRUCTURED) != 0).sum(axis=1)
+
+    def dishes_per_wine(self):
+        return ((self.cells & STRUCTURED) != 0).sum(axis=0)
+
+    def label_distribution(self, source):
+        """[(label, count)] most common first."""
+        if not self.labels[source]:
+            return []
+        labels, counts = np.unique(np.array(self.labels[source], dtype=str), return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        return [(labels[i], int(counts[i])) for i in order]
+
+    def lookup(self, dish_ids, wine_ids):
+        """Cell values for parallel lists of dish and wine ids (vectorised)."""
+        rows = np.array([self.dish_index[d] for d in dish_ids], dtype=np.intp)
+        cols = np.array([self.wine_index[w] for w in wine_ids], dtype=np.intp)
+        return self.cells[rows, cols]
+
+    def save(self, path):
+        np.savez_compressed(path, cells=self.cells, dishes=np.array(self.dishes), wines=np.array(self.wines))
+
+
+def dish_names(db):
+    """Automaton over the full folded dish names (name, name_fr, name_en).
+
+    Only whole names count as a mention: single words such as 'pasta', 'pane'
+    or 'crema' also appear in generic pairing text ("ottimo con pasta").
+    """
+    automaton = Automaton()
+    for m in db.collection('menu'):
+        if not isinstance(m, dict) or m.get('id') is None:
+            continue
+        for key in ('name', 'name_fr', 'name_en'):
+            if m.get(key):
+                automaton.add(fold(m[key]), str(m['id']))
+    return automaton
+
+
+def expected_pairs(db, paths):
+    """[(dish id, wine id)] from expected-pairing files; raises SpecError on unresolvable entries."""
+    changes, errors = plan(db, [load_spec(p) for p in paths])
+    if errors:
+        raise SpecError('\n'.join(errors))
+    return [(p['dishId'], wine_id) for wine_id, (_, pairings) in changes.items() for p in pairings]
+
+
+def describe(bits):
+    return '+'.join(name for bit, name in SOURCE_NAMES.items() if bits & bit) or 'none'
+
+
+def main(argv):
+    args = argv[1:]
+    options = {'--min-wines': MIN_WINES_PER_DISH, '--max-dishes': MAX_DISHES_PER_WINE, '--save': None}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    expect = []
+    if '--expect' in args:
+        i = args.index('--expect')
+        expect = [a for a in args[i + 1:] if not a.startswith('--')]
+        del args[i:i + 1 + len(expect)]
+    path = args[0] if args else DB_FILE
+    db = IanuaDB.load(path)
+    matrix = PairingMatrix(db)
+    name = {('menu', m['id']): m.get('name') for m in db.collection('menu') if isinstance(m, dict)}
+    name.update({('wines', w['id']): w.get('name') for w in db.collection('wines') if isinstance(w, dict)})
+
+    cells = matrix.cells
+    print(f"{len(matrix.dishes)} dishes x {len(matrix.wines)} wines: "
+          f"{int(((cells & VERIFIED) != 0).sum())} verified, {int(((cells & IANUA) != 0).sum())} ianua, "
+          f"{int(((cells & TEXT) != 0).sum())} text mentions, {int(((cells & STRUCTURED) == STRUCTURED).sum())} in both")
+    for source, where in matrix.dangling:
+        print(f"  DANGLING {source} {where}")
+    verified_only, ianua_only = matrix.asymmetric()
+    for dish, wine in verified_only:
+        print(f"  ONLY VERIFIED dish {dish} {name[('menu', dish)]!r} -> wine {wine} {name[('wines', wine)]!r}")
+    for dish, wine in ianua_only:
+        print(f"  ONLY IANUA    dish {dish} {name[('menu', dish)]!r} <- wine {wine} {name[('wines', wine)]!r}")
+    for dish, wine in matrix.text_only():
+        print(f"  TEXT ONLY     dish {dish} {name[('menu', dish)]!r} in pairing text of {wine} {name[('wines', wine)]!r}")
+
+    per_dish, per_wine = matrix.wines_per_dish(), matrix.dishes_per_wine()
+    min_wines, max_dishes = int(options['--min-wines']), int(options['--max-dishes'])
+    for i in np.flatnonzero(per_dish < min_wines):
+        status = 'NO WINES ' if per_dish[i] == 0 else 'FEW WINES'
+        print(f"  {status}     dish {matrix.dishes[i]} {name[('menu', matrix.dishes[i])]!r}: {per_dish[i]}")
+    for i in np.flatnonzero(per_wine > max_dishes):
+        print(f"  OVER-PAIRED   wine {matrix.wines[i]} {name[('wines', matrix.wines[i])]!r}: {per_wine[i]} dishes")
+    if len(per_dish):
+        print(f"wines per dish: min {per_dish.min()} median {np.median(per_dish):g} max {per_dish.max()}; "
+              f"{int((per_dish == 0).sum())} dishes unpaired")
+    for source in (VERIFIED, IANUA):
+        distribution = matrix.label_distribution(source)
+        if distribution:
+            print(f"{SOURCE_NAMES[source]} labels: " + ', '.join(f"{label or '(none)'} {n}" for label, n in distribution))
+
+    failed = 0
+    if expect:
+        try:
+            expected = expected_pairs(db, expect)
+        except (SpecError, ValueError, OSError) as e:
+            print(f"Expected pairings could not be resolved:\n{e}")
+            return 1
+        found = matrix.lookup([d for d, _ in expected], [w for _, w in expected]) if expected else []
+        for (dish, wine), bits in zip(expected, found):
+            status = 'OK' if bits & STRUCTURED == STRUCTURED else 'PARTIAL' if bits & STRUCTURED else 'MISSING'
+            failed += status != 'OK'
+            print(f"[{status}] {name[('menu', dish)]} -> {name[('wines', wine)]} ({describe(bits)})")
+        print(f"{len(expected) - failed}/{len(expected)} expected pairings verified")
+    if options['--save']:
+        matrix.save(options['--save'])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
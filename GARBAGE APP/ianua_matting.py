@@ -0,0 +1,235 @@
+import math
+import sys
+from fractions import Fraction
+import numpy as np
+from PIL import Image
+
+# Background removal / alpha matting for the illustration assets.
+# One implementation with named presets replaces the per-script NumPy
+# variants (remove_bg.py, process_white_glass.py, extract_*.py,
+# process_vines.py, process_golden_illustrations.py, make_transparent_logo.py,
+# process_unified_glasses.py):
+#
+#   python ianua_matting.py list
+#   python ianua_matting.py white-bg in.png out.png [in2.png out2.png ...]
+#
+#   white-bg             near-white background removed, coloured pixels kept (pale wine), cropped
+#   white-bg-left        white background removed inside the left 45% only (glass next to a bottle)
+#   black-bg             near-black background made transparent, existing alpha kept elsewhere
+#   brightness-to-alpha  alpha = 2 x mean brightness, dark pixels transparent (golden line art)
+#   vines                brightness-to-alpha with a lower floor for the thin vine strokes
+#   glass-glow           alpha = 2.5 x max channel, near-black pixels cleared (glasses on black)
+#   saturation-keep      keep colourful or highlight pixels inside a goblet-shaped mask
+#   saturation-keep-slender  the same inside a flute/passito mask
+#
+# Everything runs on the uint8 RGBA array in place. Thresholds on ratios
+# (saturation, gain) are turned into integer comparisons, so the only
+# temporaries are uint8/uint16 planes and boolean masks - no float64 images.
+
+VERSION = 1   # bump when the output for unchanged preset parameters changes (invalidates build_assets.py outputs)
+
+PRESETS = {
+    'white-bg': {'background': 'white', 'threshold': 240, 'saturation': 0.05, 'crop': 10},
+    'white-bg-left': {'background': 'white', 'threshold': 240, 'region': ('left', 0.45), 'crop': 5},
+    'black-bg': {'background': 'black', 'threshold': 50, 'keep_alpha': True},
+    'brightness-to-alpha': {'brightness': 'mean', 'floor': 30, 'gain': 2.0},
+    'vines': {'brightness': 'mean', 'floor': 20, 'gain': 2.0},
+    'glass-glow': {'brightness': 'max', 'floor': 7, 'gain': 2.5, 'clear': True},
+    'saturation-keep': {'saturation': 0.15, 'min_brightness': 40, 'highlight': 220, 'region': ('goblet',)},
+    'saturation-keep-slender': {'saturation': 0.15, 'min_brightness': 40, 'highlight': 220,
+                                'region': ('slender',)},
+}
+
+
+def _channels(data):
+    return data[:, :, 0], data[:, :, 1], data[:, :, 2], data[:, :, 3]
+
+
+def _max_min(r, g, b):
+    c_max = np.maximum(r, g)
+    np.maximum(c_max, b, out=c_max)
+    c_min = np.minimum(r, g)
+    np.minimum(c_min, b, out=c_min)
+    return c_max, c_min
+
+
+def _ratio(value, limit=100):
+    f = Fraction(value).limit_denominator(limit)
+    return f.numerator, f.denominator
+
+
+def saturated(c_max, c_min, saturation):
+    """(max - min) / max > saturation, as an integer comparison on uint16 planes."""
+    num, den = _ratio(saturation)
+    delta = np.subtract(c_max, c_min, dtype=np.uint16)
+    delta *= den
+    scaled = c_max.astype(np.uint16)
+    scaled *= num
+    return delta > scaled
+
+
+def _half_widths(h, w, shape):
+    """Per-row inclusive |x - cx| limit of a geometric glass mask (-1 = row excluded)."""
+    cy, cx = h // 2, w // 2
+    y = np.arange(h)
+    limits = np.full(h, -1, dtype=np.int32)
+
+    def strict(t):
+        return math.ceil(t) - 1     # |dx| < t  <=>  |dx| <= ceil(t) - 1 for integer dx
+
+    if shape == 'slender':
+        body_cutoff = int(h * 0.85)
+        limits[y <= body_cutoff] = strict(w * 0.22)
+        limits[y > body_cutoff] = strict(w * 0.28)
+        return limits, cx
+    # goblet: elliptical bowl, narrow stem, wider foot
+    bowl_cutoff, base_cutoff = int(h * 0.65), int(h * 0.90)
+    rx, ry = w * 0.40, h * 0.50
+    rest = 1.2 - ((y[:bowl_cutoff + 1] - cy) / ry) ** 2
+    bowl = np.where(rest >= 0, np.floor(rx * np.sqrt(np.clip(rest, 0, None))), -1)
+    limits[:bowl_cutoff + 1] = bowl.astype(np.int32)
+    limits[y > bowl_cutoff] = strict(w * 0.10)
+    limits[y > base_cutoff] = max(strict(w * 0.10), strict(w * 0.25))
+    return limits, cx
+
+
+def region_mask(h, w, region):
+    """Boolean (h, w) mask for ('goblet',), ('slender',) or ('left', fraction)."""
+    if region[0] == 'left':
+        return np.broadcast_to(np.arange(w) < int(w * region[1]), (h, w))
+    limits, cx = _half_widths(h, w, region[0])
+    dx = np.abs(np.arange(w, dtype=np.int32) - cx)
+    return dx[None, :] <= limits[:, None]
+
+
+def _brightness_alpha(data, params):
+    r, g, b, a = _channels(data)
+    num, den = _ratio(params['gain'])
+    if params['brightness'] == 'mean':
+        total = r.astype(np.uint16)
+        total += g
+        total += b
+        keep = total > 3 * params['floor']
+        den *= 3
+    else:
+        total = np.maximum(r, g)
+        np.maximum(total, b, out=total)
+        keep = total > params['floor']
+        total = total.astype(np.uint16)
+    dtype = np.uint16 if int(total.max(initial=0)) * num < 65536 else np.uint32
+    total = total.astype(dtype, copy=False)
+    total *= num
+    total //= den
+    np.minimum(total, 255, out=total)
+    total *= keep
+    a[...] = total
+    if params.get('clear'):
+        np.multiply(data, keep[:, :, None], out=data)
+    return keep
+
+
+def _mask_alpha(data, params):
+    r, g, b, a = _channels(data)
+    keep = None
+    if params.get('background'):
+        t = params['threshold']
+        if params['background'] == 'white':
+            background = (r > t) & (g > t) & (b > t)
+        else:
+            background = (r < t) & (g < t) & (b < t)
+        keep = ~background
+    if params.get('saturation') is not None:
+        c_max, c_min = _max_min(r, g, b)
+        colourful = saturated(c_max, c_min, params['saturation'])
+        if params.get('min_brightness') is not None:
+            colourful &= c_max > params['min_brightness']
+        if params.get('highlight') is not None:
+            colourful |= c_max > params['highlight']
+        keep = colourful if keep is None else keep | colourful
+    if params.get('region'):
+        keep &= region_mask(*keep.shape, params['region'])
+    if params.get('keep_alpha'):
+        a[~keep] = 0
+    else:
+        np.multiply(keep, 255, out=a, casting='unsafe')
+    return keep
+
+
+def crop_to_alpha(data, pad):
+    """Crop to the non-transparent bounding box plus `pad` (None when nothing is left)."""
+    alpha = data[:, :, 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    cols = np.flatnonzero(alpha.any(axis=0))
+    if not len(rows) or not len(cols):
+        return None
+    h, w = alpha.shape
+    ymin, ymax = max(0, rows[0] - pad), min(h, rows[-1] + pad)
+    xmin, xmax = max(0, cols[0] - pad), min(w, cols[-1] + pad)
+    return data[ymin:ymax, xmin:xmax]
+
+
+def params_for(preset, **overrides):
+    if preset not in PRESETS:
+        raise KeyError(f"unknown preset {preset!r} (known: {', '.join(PRESETS)})")
+    params = dict(PRESETS[preset])
+    params.update(overrides)
+    return params
+
+
+def apply(data, preset, **overrides):
+    """Matte an (h, w, 4) uint8 array in place; returns the (possibly cropped) view, or None if empty."""
+    params = params_for(preset, **overrides)
+    if data.dtype != np.uint8 or data.ndim != 3 or data.shape[2] != 4:
+        raise ValueError("expected an (h, w, 4) uint8 RGBA array")
+    if params.get('brightness'):
+        _brightness_alpha(data, params)
+    else:
+        _mask_alpha(data, params)
+    if params.get('crop') is not None:
+        return crop_to_alpha(data, params['crop'])
+    return data
+
+
+def load_rgba(path):
+    with Image.open(path) as img:
+        return np.array(img.convert('RGBA'))
+
+
+def process(src, dst, preset, **overrides):
+    """Matte one file. Returns the output (width, height), or None when the result is empty."""
+    result = apply(load_rgba(src), preset, **overrides)
+    if result is None:
+        return None
+    Image.fromarray(result).save(dst)
+    return result.shape[1], result.shape[0]
+
+
+def main(argv):
+    args = argv[1:]
+    if args and args[0] == 'list':
+        for name, params in PRESETS.items():
+            print(f"{name:24s} {params}")
+        return 0
+    if len(args) < 3 or len(args) % 2 == 0:
+        print("Usage: python ianua_matting.py PRESET in.png out.png [in2.png out2.png ...]\n"
+              "       python ianua_matting.py list")
+        return 1
+    preset, pairs = args[0], list(zip(args[1::2], args[2::2]))
+    failed = 0
+    for src, dst in pairs:
+        try:
+            size = process(src, dst, preset)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"ERROR {src}: {e}")
+            failed += 1
+            continue
+        if size is None:
+            print(f"EMPTY {src}: nothing left after matting, not saved")
+            failed += 1
+        else:
+            print(f"{src} -> {dst} ({size[0]}x{size[1]})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,186 @@
+import json
+import sys
+from ianua_db import IanuaDB, DB_FILE
+from ianua_dishes import DishIndex, DishError
+from ianua_text import fold
+
+# Declarative pairing specs, applied in one load/validate/save pass.
+# Replaces the one-off inject_<winery>_pairings.py scripts: write a spec file
+# per winery (see pairing_specs/) and apply any number of them together.
+#
+#   python ianua_pairings.py apply pairing_specs/*.json [--db db.json] [--dry-run]
+#
+# Spec format (JSON):
+#   {
+#     "winery": "Michele Chiarlo",          # free text, for reports only
+#     "mode": "replace",                    # replace (default) or merge per wine
+#     "wines": [
+#       {"wine": "wine_1769733883568_0",    # wine id, or {"name": ..., "winery": <winery id>}
+#        "comment": "Nebbiolo 2021",         # optional, ignored
+#        "pairings": [
+#          {"dish": "1", "label": "Struttura", "notes": "...", "score": 90},
+#          {"dish": {"name": "scaloppa"}, "label": "Audace", "notes": "..."}   # see ianua_dishes.py
+#        ]}
+#     ]
+#   }
+#
+# Nothing is written unless every spec resolves: unknown wines, unknown or
+# ambiguous dishes and the same dish twice for one wine are all errors.
+
+MODES = ('replace', 'merge')
+
+
+class SpecError(Exception):
+    pass
+
+
+def load_spec(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict) or not isinstance(spec.get('wines'), list):
+        raise SpecError(f"{path}: expected an object with a 'wines' list")
+    if spec.get('mode', 'replace') not in MODES:
+        raise SpecError(f"{path}: mode must be one of {', '.join(MODES)}")
+    spec['_path'] = path
+    return spec
+
+
+def resolve_wine(db, ref):
+    if isinstance(ref, str):
+        return db.get('wines', ref)
+    if isinstance(ref, dict):
+        if ref.get('id'):
+            return db.get('wines', ref['id'])
+        pool = db.wines_of(ref['winery']) if ref.get('winery') else db.collection('wines')
+        hits = [w for w in pool if fold(w.get('name')) == fold(ref.get('name'))]
+        if len(hits) > 1:
+            raise SpecError(f"wine {ref} is ambiguous: {', '.join(w['id'] for w in hits)}")
+        return hits[0] if hits else None
+    return None
+
+
+def resolve_dish(db, ref, index=None):
+    """Dish id for an id string/number or {"id": ...} / {"name": ...} reference.
+
+    Names go through a DishIndex (accent-folded token prefixes, name or
+    name_fr); pass one in when resolving many references against the same db.
+    """
+    if isinstance(ref, (str, int)):
+        return str(ref) if db.has('menu', ref) else None
+    if isinstance(ref, dict) and ref.get('id') is not None:
+        return str(ref['id']) if db.has('menu', ref['id']) else None
+    if isinstance(ref, dict) and ref.get('name'):
+        try:
+            return (index or DishIndex(db)).resolve(ref['name'])
+        except DishError as e:
+            raise SpecError(str(e))
+    return None
+
+
+def plan(db, specs):
+    """Resolve every spec. Returns ({wine_id: (mode, [pairing, ...])}, [error, ...])."""
+    changes, errors = {}, []
+    dishes = DishIndex(db)
+    for spec in specs:
+        mode = spec.get('mode', 'replace')
+        for n, entry in enumerate(spec['wines']):
+            where = f"{spec['_path']} wines[{n}]"
+            try:
+                wine = resolve_wine(db, entry.get('wine'))
+            except SpecError as e:
+                errors.append(f"{where}: {e}")
+                continue
+            if not wine:
+                errors.append(f"{where}: wine {entry.get('wine')!r} not found")
+                continue
+            if wine['id'] in changes:
+                errors.append(f"{where}: wine {wine['id']} already set by another spec entry")
+                continue
+            pairings, seen = [], set()
+            for p in entry.get('pairings') or []:
+                try:
+                    dish_id = resolve_dish(db, p.get('dish'), dishes)
+                except SpecError as e:
+                    errors.append(f"{where}: {e}")
+                    continue
+                if dish_id is None:
+                    errors.append(f"{where}: dish {p.get('dish')!r} not found")
+                    continue
+                if dish_id in seen:
+                    errors.append(f"{where}: dish {dish_id} listed twice for {wine['id']}")
+                    continue
+                seen.add(dish_id)
+                pairing = {'dishId': dish_id, 'label': p.get('label', ''), 'notes': p.get('notes', '')}
+                if p.get('score') is not None:
+                    pairing['score'] = p['score']
+                pairings.append(pairing)
+            changes[wine['id']] = (mode, pairings)
+    return changes, errors
+
+
+def merged(current, mode, pairings):
+    if mode == 'replace':
+        return pairings
+    # merge: spec entries overwrite same-dish pairings in place, new dishes go at the end.
+    incoming = {p['dishId']: p for p in pairings}
+    result = [incoming.pop(p.get('dishId'), p) for p in current or []]
+    return result + list(incoming.values())
+
+
+def apply(db, specs, dry_run=False):
+    """Apply specs to db in memory. Returns a report list; raises SpecError if any spec is invalid."""
+    changes, errors = plan(db, specs)
+    if errors:
+        raise SpecError('\n'.join(errors))
+    report = []
+    for wine_id, (mode, pairings) in changes.items():
+        wine = db.get('wines', wine_id)
+        before = {p.get('dishId'): p for p in wine.get('ianuaPairings') or []}
+        after_list = merged(wine.get('ianuaPairings'), mode, pairings)
+        after = {p['dishId']: p for p in after_list}
+        added = [d for d in after if d not in before]
+        removed = [d for d in before if d not in after]
+        changed = [d for d in after if d in before and before[d] != after[d]]
+        report.append((wine_id, wine.get('name'), added, removed, changed))
+        if (added or removed or changed) and not dry_run:
+            db.update('wines', wine_id, ianuaPairings=after_list)
+    return report
+
+
+def main(argv):
+    args = argv[1:]
+    if not args or args[0] != 'apply':
+        print("Usage: python ianua_pairings.py apply <spec.json>... [--db db.json] [--dry-run]")
+        return 1
+    args = args[1:]
+    dry_run = '--dry-run' in args
+    if dry_run:
+        args.remove('--dry-run')
+    path = DB_FILE
+    if '--db' in args:
+        i = args.index('--db')
+        path = args[i + 1]
+        del args[i:i + 2]
+
+    try:
+        specs = [load_spec(p) for p in args]
+        db = IanuaDB.load(path)
+        report = apply(db, specs, dry_run)
+    except (SpecError, ValueError) as e:
+        print(f"Nothing written. Errors:\n{e}")
+        return 1
+
+    touched = 0
+    for wine_id, name, added, removed, changed in report:
+        if added or removed or changed:
+            touched += 1
+            print(f"{wine_id} ({name}): +{added} -{removed} ~{changed}")
+    if touched and not dry_run:
+        db.save()
+    print(f"{len(specs)} specs, {len(report)} wines, {touched} changed"
+          + (" (dry run, nothing saved)" if dry_run else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,282 @@
+import re
+import sys
+from bisect import bisect_left, bisect_right
+from ianua_db import IanuaDB, DB_FILE
+from ianua_text import fold
+
+# Structured prices for wines, wines[].vintages[] and menu items.
+# The free-text `price` is kept as the display string; the parsed value is
+# stored next to it as `priceValue`:
+#
+#   {"kind": "single" | "sizes" | "glass-bottle" | "vintages" | "range",
+#    "amounts": [{"amount": 14.0, "label": "glass"}, {"amount": 18.0, "label": "bottle"}],
+#    "min": 14.0, "max": 18.0, "raw": "14 | 18"}
+#
+# `raw` is the price string the value was parsed from. A priceValue whose raw
+# no longer equals `price` (edited in the admin UI, or by a script that only
+# sets `price`) is stale: value_of() reparses it, and refresh() rewrites it.
+#
+#   python ianua_prices.py parse [db.json] [--dry-run]     # (re)write priceValue, list unparsable prices
+#   python ianua_prices.py band 20 40 [db.json] [--in wines|vintages|menu]
+#   python ianua_prices.py stats [db.json]
+#
+# Recognised formats: "35", "12,50 €", "14 | 18" (one amount per size or
+# portion), "8 al calice | 30 bottiglia", "0,375 18 | Magnum 120",
+# "119 (2014); 125 (2013)" and ranges such as "20-25". A dot followed by
+# exactly three digits is a thousands separator ("1.200", "1.200,50"). A bare
+# four-digit year ("2024") is not a price. band and stats work on a sorted
+# numeric index, so a price band is two bisections.
+#
+# Wines without a usable price still carry the admin's priceRange tier
+# ("€", "€€", "€€€"); the index maps it to an ordinal (TIERS), so
+#
+#   python ianua_prices.py tier €€ [db.json]          # or: tier 2
+#
+# lists the wines of one tier.
+
+KINDS = ('single', 'sizes', 'glass-bottle', 'vintages', 'range')
+TIERS = {'€': 1, '€€': 2, '€€€': 3}   # wines[].priceRange, as offered by the admin form
+
+_THOUSANDS = r"[1-9]\d{0,2}(?:\.\d{3})+(?:,\d{1,2})?(?!\d)"
+_NUM = r"(?:" + _THOUSANDS + r"|\d{1,5}(?:[.,]\d{1,2})?)"
+_AMOUNT = re.compile(r"(?<![\d.,])(" + _NUM + r")(?![\d.,]*\d)")
+_VINTAGE = re.compile(r"(" + _NUM + r")\s*\(\s*((?:19|20)\d{2})\s*\)")
+_YEAR = re.compile(r"^(?:19|20)\d{2}$")
+_RANGE = re.compile(r"^\s*(" + _NUM + r")\s*(?:-|–|a)\s*(" + _NUM + r")\s*$")
+_SIZE = re.compile(r"\b(0[.,]\d{2,3})\s*l?\b|\b(magnum|jeroboam|piccolina|piccoline|mezza|half|demi)\b")
+_GLASS = re.compile(r"\b(calice|bicchiere|glass|verre|al bicchiere)\b")
+_BOTTLE = re.compile(r"\b(bottiglia|bottle|bouteille|btg)\b")
+_SEPARATORS = re.compile(r"\s*(?:\||/|;)\s*")
+_NOISE = re.compile(r"€|eur(?:o|os)?\b")
+
+
+def _number(text):
+    if re.fullmatch(_THOUSANDS, text):
+        text = text.replace('.', '')
+    return float(text.replace(',', '.'))
+
+
+def tier(wine):
+    """Ordinal of the wine's priceRange (1 for "€" .. 3 for "€€€"), or None."""
+    value = wine.get('priceRange')
+    return TIERS.get(value.strip()) if isinstance(value, str) else None
+
+
+def _amount(text):
+    """The single amount in a price fragment, or None."""
+    text = _SIZE.sub(' ', text)
+    found = _AMOUNT.findall(text)
+    # "Magnum 2016 360": a vintage year next to the amount; "2024" alone is no price either
+    found = [f for f in found if not _YEAR.match(f)]
+    return _number(found[0]) if len(found) == 1 else None
+
+
+def _value(kind, amounts, raw):
+    values = [a['amount'] for a in amounts]
+    return {'kind': kind, 'amounts': amounts, 'min': min(values), 'max': max(values), 'raw': raw}
+
+
+def parse(price):
+    """priceValue dict for a display price, or None when it cannot be read unambiguously."""
+    if price is None or isinstance(price, bool):
+        return None
+    raw = str(price)
+    if isinstance(price, (int, float)):
+        return _value('single', [{'amount': float(price), 'label': None}], raw)
+    text = _NOISE.sub(' ', fold(price)).strip()
+    if not text:
+        return None
+
+    vintages = _VINTAGE.findall(text)
+    if vintages:
+        return _value('vintages', [{'amount': _number(a), 'label': year} for a, year in vintages], raw)
+
+    m = _RANGE.match(text)
+    if m and not (_YEAR.match(m.group(1)) or _YEAR.match(m.group(2))):
+        low, high = _number(m.group(1)), _number(m.group(2))
+        if low < high:
+            return _value('range', [{'amount': low, 'label': 'from'}, {'amount': high, 'label': 'to'}], raw)
+
+    parts = [p for p in _SEPARATORS.split(text) if p.strip()]
+    amounts = []
+    for part in parts:
+        amount = _amount(part)
+        if amount is None:
+            return None
+        if _GLASS.search(part):
+            label = 'glass'
+        elif _BOTTLE.search(part):
+            label = 'bottle'
+        else:
+            size = _SIZE.search(part)
+            label = (size.group(1) or size.group(2)).replace(',', '.') if size else None
+        amounts.append({'amount': amount, 'label': label})
+    if not amounts:
+        return None
+    if len(amounts) == 1:
+        return _value('single', amounts, raw)
+    if {a['label'] for a in amounts} & {'glass', 'bottle'}:
+        return _value('glass-bottle', amounts, raw)
+    return _value('sizes', amounts, raw)
+
+
+def value_of(holder):
+    """The priceValue for the holder's current price: the stored one if it is not stale."""
+    stored = holder.get('priceValue')
+    if isinstance(stored, dict) and stored.get('raw') == str(holder.get('price')):
+        return stored
+    return parse(holder.get('price'))
+
+
+def refresh(holder):
+    """Re-parse holder['price'] into priceValue. Returns (changed, parsed value or None)."""
+    value = parse(holder.get('price'))
+    if holder.get('priceValue') == value:
+        return False, value
+    if value is None:
+        holder.pop('priceValue', None)
+    else:
+        holder['priceValue'] = value
+    return True, value
+
+
+def priced(db):
+    """Yield (collection, entity id, vintage year or None, holder dict) for every non-empty price."""
+    for collection in ('wines', 'menu'):
+        for entity in db.collection(collection):
+            if not isinstance(entity, dict) or entity.get('id') is None:
+                continue
+            if entity.get('price') not in (None, ''):
+                yield collection, str(entity['id']), None, entity
+            if collection == 'wines':
+                for vintage in entity.get('vintages') or []:
+                    if isinstance(vintage, dict) and vintage.get('price') not in (None, ''):
+                        yield 'vintages', str(entity['id']), vintage.get('year'), vintage
+
+
+def normalize(db):
+    """Write priceValue next to every parsable price. Returns (changed, [unparsable (where, price)])."""
+    changed, unparsable, dirty = 0, [], set()
+    for collection, entity_id, year, holder in priced(db):
+        updated, value = refresh(holder)
+        if value is None:
+            where = f"{collection}/{entity_id}" + (f"@{year}" if year else '')
+            unparsable.append((where, holder['price']))
+        if not updated:
+            continue
+        changed += 1
+        dirty.add(('wines' if collection == 'vintages' else collection, entity_id))
+    for collection, entity_id in dirty:
+        db.touch(collection, entity_id)
+    return changed, unparsable
+
+
+class PriceIndex:
+    """Sorted (amount, collection, id, label) entries; one entry per parsed amount.
+
+    tiers maps each priceRange ordinal to the sorted ids of the wines in it.
+    """
+
+    def __init__(self, db):
+        entries = []
+        for collection, entity_id, year, holder in priced(db):
+            value = value_of(holder)
+            if not value:
+                continue
+            for a in value['amounts']:
+                label = a['label'] if collection != 'vintages' else year
+                entries.append((a['amount'], collection, entity_id, label))
+        entries.sort(key=lambda e: e[0])
+        self.entries = entries
+        self.amounts = [e[0] for e in entries]
+        self.tiers = {ordinal: [] for ordinal in TIERS.values()}
+        for wine in db.collection('wines'):
+            if isinstance(wine, dict) and wine.get('id') is not None and tier(wine):
+                self.tiers[tier(wine)].append(str(wine['id']))
+        for ids in self.tiers.values():
+            ids.sort()
+
+    def band(self, low=None, high=None, collection=None):
+        """Entries with low <= amount <= high (either bound may be None)."""
+        start = 0 if low is None else bisect_left(self.amounts, low)
+        end = len(self.amounts) if high is None else bisect_right(self.amounts, high)
+        return [e for e in self.entries[start:end] if collection is None or e[1] == collection]
+
+    def stats(self, collection=None):
+        """count/min/max/mean/quartiles over the (already sorted) amounts."""
+        values = self.amounts if collection is None else [e[0] for e in self.entries if e[1] == collection]
+        if not values:
+            return {'count': 0}
+
+        def quantile(q):
+            position = (len(values) - 1) * q
+            low = int(position)
+            high = min(low + 1, len(values) - 1)
+            return values[low] + (values[high] - values[low]) * (position - low)
+
+        return {'count': len(values), 'min': values[0], 'p25': quantile(0.25), 'median': quantile(0.5),
+                'p75': quantile(0.75), 'max': values[-1], 'mean': sum(values) / len(values)}
+
+
+def main(argv):
+    args = argv[1:]
+    if not args or args[0] not in ('parse', 'band', 'stats', 'tier'):
+        print("Usage: python ianua_prices.py parse|band LOW HIGH|tier €€|stats [db.json] "
+              "[--in wines|vintages|menu] [--dry-run]")
+        return 1
+    command = args.pop(0)
+    collection = None
+    if '--in' in args:
+        i = args.index('--in')
+        collection = args[i + 1]
+        del args[i:i + 2]
+    args = [a for a in args if a != '--dry-run']
+    bounds, wanted = [], None
+    if command == 'band':
+        bounds = [_number(args.pop(0)), _number(args.pop(0))]
+    if command == 'tier':
+        wanted = args.pop(0)
+        wanted = int(wanted) if wanted.isdigit() else TIERS.get(wanted)
+        if wanted not in TIERS.values():
+            print(f"Unknown tier; use one of {', '.join(TIERS)} or 1-{len(TIERS)}")
+            return 1
+    path = args[0] if args else DB_FILE
+    db = IanuaDB.load(path)
+
+    if command == 'parse':
+        changed, unparsable = normalize(db)
+        for where, price in unparsable:
+            print(f"  UNPARSABLE {where}: {price!r}")
+        print(f"{changed} prices updated, {len(unparsable)} unparsable")
+        if changed:
+            db.save()
+        return 1 if unparsable else 0
+
+    index = PriceIndex(db)
+    if command == 'band':
+        for amount, where, entity_id, label in index.band(*bounds, collection=collection):
+            entity = db.get('menu' if where == 'menu' else 'wines', entity_id)
+            suffix = f" ({label})" if label else ''
+            print(f"{amount:8.2f}  {where:9s} {entity_id}  {entity.get('name')}{suffix}")
+        return 0
+    if command == 'tier':
+        for wine_id in index.tiers[wanted]:
+            wine = db.get('wines', wine_id)
+            value = value_of(wine)
+            shown = f"{value['min']:8.2f}" if value else '       -'
+            print(f"{shown}  {wine_id}  {wine.get('name')}")
+        return 0
+    for name in ([collection] if collection else ['wines', 'vintages', 'menu']):
+        s = index.stats(name)
+        if not s['count']:
+            print(f"{name:9s} no prices")
+            continue
+        print(f"{name:9s} n={s['count']:<5d} min={s['min']:.2f} p25={s['p25']:.2f} median={s['median']:.2f} "
+              f"p75={s['p75']:.2f} max={s['max']:.2f} mean={s['mean']:.2f}")
+    if collection in (None, 'wines'):
+        print("tiers     " + '  '.join(f"{symbol} {len(index.tiers[ordinal])}" for symbol, ordinal in TIERS.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
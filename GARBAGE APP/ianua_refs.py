@@ -0,0 +1,217 @@
+import sys
+from ianua_db import IanuaDB, DB_FILE
+
+# Reverse-reference index: for every entity id, every place that points at it.
+#   wines[].wineryId                 -> wineries
+#   wines[].ianuaPairings[].dishId   -> menu
+#   menu[].verifiedPairings[].wineId -> wines
+# On top of it, remap (old id -> new id) and delete --cascade touch only the
+# referencing entities, and both return the list of paths they changed.
+# Remapping onto an id that is already referenced from the same list keeps
+# only the first entry for it (no [c, b, c] pairing lists).
+#
+#   python ianua_refs.py refs wines wine_1769635123838_0
+#   python ianua_refs.py remap wines andrea_oberto_nebbiolo_2023=wine_1769635123838_0
+#   python ianua_refs.py delete wines andrea_oberto_nebbiolo_2023 --cascade [--dry-run]
+
+# (source collection, list field or None, key, target collection)
+REFERENCES = [
+    ('wines', None, 'wineryId', 'wineries'),
+    ('wines', 'ianuaPairings', 'dishId', 'menu'),
+    ('menu', 'verifiedPairings', 'wineId', 'wines'),
+]
+
+
+class RefError(Exception):
+    pass
+
+
+class Ref:
+    __slots__ = ('source', 'source_id', 'field', 'key', 'item', 'target')
+
+    def __init__(self, source, source_id, field, key, item, target):
+        self.source, self.source_id, self.field, self.key = source, source_id, field, key
+        self.item, self.target = item, target
+
+    @property
+    def target_key(self):
+        return (self.target, str(self.item[self.key]))
+
+    def path(self, entity):
+        if self.field is None:
+            return f"{self.source}/{self.source_id}.{self.key}"
+        position = next(i for i, p in enumerate(entity[self.field]) if p is self.item)
+        return f"{self.source}/{self.source_id}.{self.field}[{position}].{self.key}"
+
+
+class RefIndex:
+    def __init__(self, db):
+        self.db = db
+        self._refs = {}      # (target collection, target id) -> [Ref]
+        self._outgoing = {}  # (source collection, source id) -> [Ref]
+        for source, field, key, target in REFERENCES:
+            for e in db.collection(source):
+                if isinstance(e, dict) and e.get('id') is not None:
+                    self._index_one(source, e, field, key, target)
+
+    def _index_one(self, source, entity, field, key, target):
+        source_id = str(entity['id'])
+        if field is None:
+            items = [entity]
+        else:
+            items = [p for p in entity.get(field) or [] if isinstance(p, dict)]
+        for item in items:
+            if item.get(key) is None:
+                continue
+            ref = Ref(source, source_id, field, key, item, target)
+            self._refs.setdefault(ref.target_key, []).append(ref)
+            self._outgoing.setdefault((source, source_id), []).append(ref)
+
+    def refs_to(self, collection, entity_id):
+        return list(self._refs.get((collection, str(entity_id)), []))
+
+    def paths_to(self, collection, entity_id):
+        return [r.path(self.db.get(r.source, r.source_id)) for r in self.refs_to(collection, entity_id)]
+
+    def _forget_source(self, source, source_id):
+        for ref in self._outgoing.pop((source, source_id), []):
+            tkey = ref.target_key
+            remaining = [r for r in self._refs.get(tkey, []) if r is not ref]
+            if remaining:
+                self._refs[tkey] = remaining
+            else:
+                self._refs.pop(tkey, None)
+
+    # --- Operations ---
+
+    def remap(self, collection, mapping):
+        """Point every reference to old ids at new ids; rename the entity too if new is free.
+
+        A list that ends up naming the same new id twice keeps only its first entry.
+        """
+        touched = []
+        for old, new in mapping.items():
+            old, new = str(old), str(new)
+            refs = self._refs.pop((collection, old), [])
+            for ref in refs:
+                entity = self.db.get(ref.source, ref.source_id)
+                touched.append(ref.path(entity))
+                if ref.field is None:
+                    self.db.update(ref.source, ref.source_id, **{ref.key: new})
+                else:
+                    ref.item[ref.key] = new
+                    self.db.touch(ref.source, ref.source_id)
+            if refs:
+                self._refs.setdefault((collection, new), []).extend(refs)
+                touched.extend(self._drop_repeated(collection, new))
+            if self.db.has(collection, old) and not self.db.has(collection, new):
+                self.db.update(collection, old, id=new)
+                self._rekey_source(collection, old, new)
+                touched.append(f"{collection}/{old}.id")
+        return touched
+
+    def _drop_repeated(self, collection, entity_id):
+        groups = {}
+        for ref in self.refs_to(collection, entity_id):
+            if ref.field is not None:
+                groups.setdefault((ref.source, ref.source_id, ref.field), []).append(ref)
+        touched = []
+        for (source, source_id, field), refs in groups.items():
+            if len(refs) < 2:
+                continue
+            order = {id(item): i for i, item in enumerate(self.db.get(source, source_id)[field])}
+            refs.sort(key=lambda r: order[id(r.item)])
+            for ref in refs[1:]:
+                touched.append(self.unlink(ref) + ' (duplicate)')
+        return touched
+
+    def _rekey_source(self, collection, old, new):
+        outgoing = self._outgoing.pop((collection, old), [])
+        for ref in outgoing:
+            ref.source_id = new
+        if outgoing:
+            self._outgoing[(collection, new)] = outgoing
+
+    def delete(self, collection, entity_id, cascade=False):
+        """Delete an entity. Without cascade, refuse if anything still refers to it."""
+        entity_id = str(entity_id)
+        if not self.db.has(collection, entity_id):
+            raise RefError(f"{collection}/{entity_id} not found")
+        refs = self._refs.get((collection, entity_id), [])
+        if refs and not cascade:
+            raise RefError(f"{collection}/{entity_id} is referenced by {len(refs)} paths "
+                           f"(first: {self.paths_to(collection, entity_id)[0]}); use cascade")
+        touched = []
+        for ref in list(refs):
+            if not self.db.has(ref.source, ref.source_id):
+                continue  # already removed by an earlier cascade step
+            if ref.field is None:
+                # A wine without its winery is meaningless: cascade the delete.
+                touched.extend(self.delete(ref.source, ref.source_id, cascade=True))
+            else:
+                touched.append(self.unlink(ref) + ' (removed)')
+        self._refs.pop((collection, entity_id), None)
+        self._forget_source(collection, entity_id)
+        self.db.delete(collection, entity_id)
+        touched.append(f"{collection}/{entity_id} (deleted)")
+        return touched
+
+    def unlink(self, ref):
+        """Remove one pairing reference from its list. Returns its path before removal."""
+        entity = self.db.get(ref.source, ref.source_id)
+        path = ref.path(entity)
+        entity[ref.field] = [p for p in entity[ref.field] if p is not ref.item]
+        self.db.touch(ref.source, ref.source_id)
+        key = (ref.source, ref.source_id)
+        self._outgoing[key] = [r for r in self._outgoing.get(key, []) if r is not ref]
+        tkey = ref.target_key
+        self._refs[tkey] = [r for r in self._refs.get(tkey, []) if r is not ref]
+        return path
+
+
+def main(argv):
+    args = [a for a in argv[1:] if a not in ('--cascade', '--dry-run')]
+    cascade = '--cascade' in argv
+    if len(args) < 3 or args[0] not in ('refs', 'remap', 'delete'):
+        print("Usage: python ianua_refs.py refs <collection> <id>")
+        print("       python ianua_refs.py remap <collection> <old>=<new>... [--dry-run]")
+        print("       python ianua_refs.py delete <collection> <id>... [--cascade] [--dry-run]")
+        print("Options: --db db.json")
+        return 1
+    path = DB_FILE
+    if '--db' in args:
+        i = args.index('--db')
+        path = args[i + 1]
+        del args[i:i + 2]
+    command, collection, targets = args[0], args[1], args[2:]
+    db = IanuaDB.load(path)
+    index = RefIndex(db)
+
+    if command == 'refs':
+        for entity_id in targets:
+            paths = index.paths_to(collection, entity_id)
+            print(f"{collection}/{entity_id}: {len(paths)} references")
+            for p in paths:
+                print(f"  {p}")
+        return 0
+
+    try:
+        if command == 'remap':
+            mapping = dict(t.split('=', 1) for t in targets)
+            touched = index.remap(collection, mapping)
+        else:
+            touched = []
+            for entity_id in targets:
+                touched.extend(index.delete(collection, entity_id, cascade=cascade))
+    except RefError as e:
+        print(f"Nothing written: {e}")
+        return 1
+    for p in touched:
+        print(f"  {p}")
+    db.save()
+    print(f"{len(touched)} paths touched")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
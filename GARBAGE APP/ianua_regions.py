@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import Counter, namedtuple
+from ianua_db import IanuaDB, DB_FILE
+from ianua_text import Automaton, fold
+
+# Region/zone classifier shared by the scripts (replaces the determine_region()
+# copies). A commune -> subzone -> zone -> region gazetteer is compiled into
+# two Aho–Corasick automata: one over place names for winery.location and one
+# over zone/region names for the hand-written winery.region field. Matching is
+# whole-word, so 'alba' no longer fires inside 'Albenga' nor 'bard' inside
+# 'Bardonecchia'.
+#
+#   python ianua_regions.py [db.json]        # batch report, unclassified wineries last
+#
+# The first two steps follow determineWineryRegion() in
+# components/regions/registry.ts: a zone named in winery.region wins, then a
+# commune in winery.location. Two fallbacks go beyond the app, which returns
+# 'unknown' there: a bare region name in either field (region set, zone None),
+# then the winery lists of piemonte_zones.txt. Only vda, piemonte, liguria and
+# sardegna are in the gazetteer; wineries of the app's toscana, veneto,
+# lombardia and francia zones come back unclassified. Callers that need the
+# app's answer should therefore require a zone.
+# The communes below follow the locationMap of components/regions/*.ts;
+# piemonte_zones.txt adds the communes of the wineries it lists.
+
+PIEMONTE_ZONES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'piemonte_zones.txt')
+
+# region -> {label, aliases, zones: {zone -> {label, aliases, communes, subzones: {subzone -> communes}}}}
+GAZETTEER = {
+    'vda': {
+        'label': "Valle d'Aosta", 'aliases': ["valle d'aosta", "vallee d'aoste", 'vda', 'aosta valley'],
+        'zones': {
+            'bassa': {'label': 'Bassa Valle', 'aliases': ['bassa'], 'communes': [
+                'pont-saint-martin', 'ponte-saint-martin', 'donnas', 'perloz', 'bard', 'hône', 'arnad',
+                'issogne', 'champoluc', 'challand', 'montjovet', 'champdepraz', 'verrès', 'chambave',
+                'pontey', 'fenis', 'saint-vincent', 'chatillon']},
+            'nus-quart': {'label': 'Nus-Quart', 'aliases': ['nus', 'quart'], 'communes': ['nus', 'quart']},
+            'la-plaine': {'label': 'La Plaine', 'aliases': ['plaine'], 'communes': [
+                'saint-christophe', 'pollein', 'charvensod', 'gignod', 'aosta']},
+            'plaine-to-valdigne': {'label': 'Media Valle', 'aliases': ['verso la valdigne'], 'communes': [
+                'sarre', 'saint-pierre', 'jovençan', 'villeneuve', 'aymavilles', 'introd', 'arvier', 'avise',
+                'saint-nicolas', 'gressan']},
+            'valdigne': {'label': 'Valdigne', 'communes': ['la salle', 'morgex', 'pré-saint-didier', 'courmayeur']},
+        },
+    },
+    'piemonte': {
+        'label': 'Piemonte', 'aliases': ['piedmont'],
+        'zones': {
+            'alto-piemonte': {'label': 'Alto Piemonte', 'communes': [
+                'gattinara', 'boca', 'lessona', 'ghemme', 'fara', 'biella', 'brusnengo', 'bramaterra']},
+            'canavese': {'label': 'Canavese', 'communes': [
+                'caluso', 'canavese', 'carema', 'ivrea', 'san giorgio', 'san giorgio canavese']},
+            'langhe': {'label': 'Langhe', 'communes': ['alba', 'cherasco', 'fontanafredda'], 'subzones': {
+                'barolo': ['barolo', 'la morra', 'serralunga', "serralunga d'alba", 'monforte', "monforte d'alba",
+                           'castiglione falletto', 'verduno', 'novello', 'grinzane cavour', "diano d'alba"],
+                'barbaresco': ['barbaresco', 'neive', 'treiso'],
+                'dogliani': ['dogliani'],
+            }},
+            'roero': {'label': 'Roero', 'communes': ['canale', 'guarene', 'roero']},
+            'monferrato': {'label': 'Monferrato', 'communes': ['acqui'], 'subzones': {
+                'astigiano': ['asti', 'nizza', 'nizza monferrato', 'calamandrana', 'castagnole',
+                              'castagnole delle lanze', 'castagnole lanze', 'castagnole monferrato'],
+                'casalese': ['vignale', 'vignale monferrato', 'casale monferrato'],
+            }},
+            'tortonese': {'label': 'Colli Tortonesi', 'aliases': ['tortonese'], 'communes': [
+                'tortona', 'colli tortonesi', 'castellania']},
+        },
+    },
+    'liguria': {
+        'label': 'Liguria', 'aliases': [],
+        'zones': {
+            'cinque-terre': {'label': 'Cinque Terre', 'communes': [
+                'riomaggiore', 'manarola', 'corniglia', 'vernazza', 'monterosso']},
+            'riviera-ponente': {'label': 'Riviera di Ponente', 'communes': ['albenga', 'imperia', 'sanremo', 'dolceacqua']},
+            'riviera-levante': {'label': 'Riviera di Levante', 'communes': ['portofino', 'sestri levante', 'chiavari']},
+            'colli-luni': {'label': 'Colli di Luni', 'communes': ['sarzana', 'luni', 'castelnuovo magra']},
+        },
+    },
+    'sardegna': {
+        'label': 'Sardegna', 'aliases': ['sardinia'],
+        'zones': {
+            'gallura': {'label': 'Gallura', 'communes': ['tempio pausania', 'arzachena', 'olbia', 'berchidda']},
+            'barbagia': {'label': 'Barbagia', 'communes': ['mamoiada', 'orgosolo', 'nuoro', 'oliena']},
+            'sulcis': {'label': 'Sulcis', 'communes': ['santadi', 'carbonia', 'iglesias']},
+            'oristano': {'label': 'Oristano', 'communes': ['oristano', 'cabras']},
+            'cagliari': {'label': 'Cagliari', 'communes': ['cagliari', 'serdiana', 'dolianova']},
+        },
+    },
+}
+VDA_ZONES = list(GAZETTEER['vda']['zones'])
+PIEMONTE_ZONES = list(GAZETTEER['piemonte']['zones'])
+
+Classification = namedtuple('Classification', 'region zone subzone commune source')
+UNCLASSIFIED = Classification(None, None, None, None, None)
+
+_HEADER_ZONES = {fold(z['label']): zone for zone, z in GAZETTEER['piemonte']['zones'].items()}
+_WINERY_LINE = re.compile(r"^(.+?) – (.+?) \(([A-Z]{2})\)\s*$")
+
+
+def key(text):
+    """Folded text with dashes and apostrophes as spaces: "Serralunga d'Alba" -> 'serralunga d alba'."""
+    return ' '.join(re.sub(r"[-'/,.()]", ' ', fold(text)).split())
+
+
+def read_piemonte_zones(path=PIEMONTE_ZONES_FILE):
+    """({commune: zone}, {winery name: zone}) from the winery lines under each zone header."""
+    communes, wineries = {}, {}
+    if not os.path.exists(path):
+        return communes, wineries
+    zone = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line[0].isalnum() and line[0] not in '("':
+                # zone header: an emoji, then the upper-case zone label
+                header = fold(line.split('(')[0])
+                zone = next((z for label, z in _HEADER_ZONES.items() if label in header), zone)
+                continue
+            m = _WINERY_LINE.match(line)
+            if zone and m and '€' not in line:
+                wineries[key(m.group(1).split('(')[0])] = zone
+                for commune in m.group(2).split('/'):
+                    communes.setdefault(key(commune), zone)
+    return communes, wineries
+
+
+class Classifier:
+    def __init__(self, gazetteer=GAZETTEER, piemonte_zones=PIEMONTE_ZONES_FILE):
+        self._places = Automaton()   # commune -> (region, zone, subzone, commune)
+        self._names = Automaton()    # zone/region names -> (rank, region, zone, subzone)
+        self._zone_region = {}
+        # Changes whenever the gazetteer or piemonte_zones.txt does (cached results go stale).
+        digest = hashlib.sha1(json.dumps(gazetteer, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        if piemonte_zones and os.path.exists(piemonte_zones):
+            with open(piemonte_zones, 'rb') as f:
+                digest.update(f.read())
+        self.fingerprint = digest.hexdigest()
+        known = set()
+        for region, r in gazetteer.items():
+            for alias in [region, r['label']] + r.get('aliases', []):
+                self._names.add(key(alias), (2, region, None, None))
+            for zone, z in r['zones'].items():
+                self._zone_region[zone] = region
+                for alias in [zone, z['label']] + z.get('aliases', []):
+                    self._names.add(key(alias), (1, region, zone, None))
+                places = [(c, None) for c in z.get('communes', [])]
+                places += [(c, s) for s, communes in z.get('subzones', {}).items() for c in communes]
+                for commune, subzone in places:
+                    self._places.add(key(commune), (region, zone, subzone, commune))
+                    known.add(key(commune))
+        extra, self._listed_wineries = read_piemonte_zones(piemonte_zones) if piemonte_zones else ({}, {})
+        for commune, zone in extra.items():
+            if commune not in known:
+                self._places.add(commune, ('piemonte', zone, None, commune))
+        self._cache = {}
+
+    def classify(self, winery):
+        """Classification(region, zone, subzone, commune, source) for a winery dict (cached)."""
+        if not winery:
+            return UNCLASSIFIED
+        cache_key = (winery.get('id'), winery.get('location'), winery.get('region'), winery.get('name'))
+        result = self._cache.get(cache_key)
+        if result is None:
+            result = self._cache[cache_key] = self._classify(winery)
+        return result
+
+    def locate(self, text):
+        """[(region, zone, subzone, commune), ...] for every commune named in text."""
+        return [v for _, _, v in self._places.find(key(text))]
+
+    def _classify(self, winery):
+        manual = key(winery.get('region'))
+        location = key(winery.get('location'))
+        named = sorted((v for _, _, v in self._names.find(manual)), key=lambda v: v[0])
+        if named and named[0][0] == 1:
+            _, region, zone, _ = named[0]
+            places = [v for v in self.locate(location) if v[1] == zone]
+            subzone, commune = (places[0][2], places[0][3]) if places else (None, None)
+            return Classification(region, zone, subzone, commune, 'region')
+        places = self._places.find(location)
+        if places:
+            region, zone, subzone, commune = places[0][2]
+            return Classification(region, zone, subzone, commune, 'location')
+        if named:
+            return Classification(named[0][1], None, None, None, 'region')
+        located = self._names.find(location)
+        if located:
+            _, region, zone, _ = min((v for _, _, v in located), key=lambda v: v[0])
+            return Classification(region, zone, None, None, 'location')
+        zone = self._listed_wineries.get(key(winery.get('name')))
+        if zone:
+            return Classification(self._zone_region[zone], zone, None, None, 'piemonte_zones.txt')
+        return UNCLASSIFIED
+
+    def classify_all(self, db):
+        """{winery id: Classification} for every winery of an IanuaDB."""
+        return {str(w['id']): self.classify(w) for w in db.collection('wineries')
+                if isinstance(w, dict) and w.get('id') is not None}
+
+
+_default = None
+
+
+def default_classifier():
+    global _default
+    if _default is None:
+        _default = Classifier()
+    return _default
+
+
+def classify(winery):
+    return default_classifier().classify(winery)
+
+
+def determine_region(winery):
+    """Zone id (or region id when no zone is known), 'unknown' otherwise - as the old script helper."""
+    c = classify(winery)
+    return c.zone or c.region or 'unknown'
+
+
+def report(db, classifier=None):
+    classifier = classifier or default_classifier()
+    results = classifier.classify_all(db)
+    wine_counts = Counter(str(w.get('wineryId')) for w in db.collection('wines') if isinstance(w, dict))
+    lines = []
+    by_zone = Counter((c.region or '-', c.zone or '-') for c in results.values())
+    for (region, zone), n in sorted(by_zone.items()):
+        lines.append(f"{region:10s} {zone:20s} {n:4d} wineries")
+    for wid, c in results.items():
+        if c.source == 'region' and c.zone and not c.commune:
+            w = db.get('wineries', wid)
+            elsewhere = {v[1] for v in classifier.locate(w.get('location'))} - {c.zone}
+            if elsewhere:
+                lines.append(f"  DISAGREES {wid} region={w.get('region')!r} ({c.zone}) but "
+                             f"location={w.get('location')!r} ({', '.join(sorted(elsewhere))})")
+    unclassified = [(wid, c) for wid, c in results.items() if c.region is None]
+    lines.append(f"{len(results) - len(unclassified)} classified, {len(unclassified)} unclassified")
+    for wid, _ in unclassified:
+        w = db.get('wineries', wid)
+        lines.append(f"  UNCLASSIFIED {wid} {w.get('name')!r} location={w.get('location')!r} "
+                     f"region={w.get('region')!r} ({wine_counts[wid]} wines)")
+    return '\n'.join(lines), results
+
+
+def main(argv):
+    path = argv[1] if len(argv) > 1 else DB_FILE
+    db = IanuaDB.load(path)
+    text, results = report(db)
+    print(text)
+    return 1 if any(c.region is None for c in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from ianua_db import IanuaDB, DB_FILE
+
+# SQLite mirror of db.json with an FTS5 index over names, descriptions,
+# pairing notes and glossary definitions. Accents are folded by the tokenizer
+# (remove_diacritics), so "valdoten" finds "Valdôtèn" and "entree" finds "Entrée".
+#
+#   python ianua_search.py sync [db.json]
+#   python ianua_search.py search tartare nebbiolo
+#   python ianua_search.py search --in menu entree
+#
+# sync is incremental: each entity's content hash is stored, and only entities
+# whose hash changed (or that were added/removed) are rewritten.
+
+SQLITE_FILE = 'ianua.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    rowid INTEGER PRIMARY KEY,
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    UNIQUE (collection, id)
+);
+CREATE TABLE IF NOT EXISTS wines (
+    id TEXT PRIMARY KEY, winery_id TEXT, name TEXT, type TEXT, grapes TEXT,
+    price TEXT, description TEXT, pairing TEXT, data TEXT
+);
+CREATE INDEX IF NOT EXISTS wines_winery ON wines (winery_id);
+CREATE TABLE IF NOT EXISTS wineries (
+    id TEXT PRIMARY KEY, name TEXT, location TEXT, region TEXT, description TEXT, data TEXT
+);
+CREATE TABLE IF NOT EXISTS menu (
+    id TEXT PRIMARY KEY, category TEXT, name TEXT, name_fr TEXT, name_en TEXT,
+    price TEXT, description TEXT, data TEXT
+);
+CREATE TABLE IF NOT EXISTS glossary (
+    id TEXT PRIMARY KEY, term TEXT, category TEXT, definition TEXT, data TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5 (
+    collection UNINDEXED, id UNINDEXED, title, body, notes,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+COLUMNS = {
+    'wines': ['id', 'wineryId', 'name', 'type', 'grapes', 'price', 'description', 'pairing'],
+    'wineries': ['id', 'name', 'location', 'region', 'description'],
+    'menu': ['id', 'category', 'name', 'name_fr', 'name_en', 'price', 'description'],
+    'glossary': ['id', 'term', 'category', 'definition'],
+}
+
+# Weights for bm25(): title matches count most, then body, then pairing notes.
+RANK = 'bm25(search, 0, 0, 10.0, 3.0, 2.0)'
+
+
+def _text(*values):
+    return '\n'.join(str(v) for v in values if v and isinstance(v, (str, int, float)))
+
+
+def _langs(e, field):
+    return [e.get(field), e.get(f"{field}_fr"), e.get(f"{field}_en")]
+
+
+def search_fields(collection, e):
+    """(title, body, notes) text fed to the FTS index for one entity."""
+    if collection == 'wines':
+        notes = [e.get('pairing')] + [p.get('notes') for p in e.get('ianuaPairings') or [] if isinstance(p, dict)]
+        return (_text(e.get('name')),
+                _text(*_langs(e, 'description'), e.get('grapes')),
+                _text(*notes))
+    if collection == 'wineries':
+        return (_text(e.get('name')),
+                _text(*_langs(e, 'description'), *_langs(e, 'curiosity'), e.get('location'), e.get('region')),
+                '')
+    if collection == 'menu':
+        return (_text(*_langs(e, 'name')),
+                _text(*_langs(e, 'description'), *_langs(e, 'preparation'), e.get('category')),
+                _text(*[p.get('notes') for p in e.get('verifiedPairings') or [] if isinstance(p, dict)]))
+    return (_text(e.get('term')), _text(*_langs(e, 'definition'), e.get('category')), '')
+
+
+def _strip_inline_images(e):
+    return {k: ('[inline image]' if isinstance(v, str) and v.startswith('data:') else v) for k, v in e.items()}
+
+
+def entity_hash(e):
+    return hashlib.sha1(json.dumps(e, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def connect(path=SQLITE_FILE):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def sync(db, conn):
+    stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    with conn:
+        for collection, cols in COLUMNS.items():
+            known = dict(conn.execute(
+                'SELECT id, hash FROM entities WHERE collection = ?', (collection,)))
+            seen = set()
+            for e in db.collection(collection):
+                if not isinstance(e, dict) or e.get('id') is None:
+                    continue
+                key = str(e['id'])
+                if db.get(collection, key) is not e:
+                    # Duplicate id (the glossary has some): mirror the one IanuaDB.get returns.
+                    continue
+                seen.add(key)
+                h = entity_hash(e)
+                if known.get(key) == h:
+                    stats['unchanged'] += 1
+                    continue
+                stats['updated' if key in known else 'added'] += 1
+                conn.execute(
+                    'INSERT INTO entities (collection, id, hash) VALUES (?, ?, ?) '
+                    'ON CONFLICT (collection, id) DO UPDATE SET hash = excluded.hash',
+                    (collection, key, h))
+                rowid = conn.execute('SELECT rowid FROM entities WHERE collection = ? AND id = ?',
+                                     (collection, key)).fetchone()[0]
+                values = [key] + [_text(e.get(c)) for c in cols[1:]]
+                values.append(json.dumps(_strip_inline_images(e), ensure_ascii=False))
+                conn.execute(f"INSERT OR REPLACE INTO {collection} VALUES ({', '.join('?' * len(values))})", values)
+                conn.execute('DELETE FROM search WHERE rowid = ?', (rowid,))
+                conn.execute('INSERT INTO search (rowid, collection, id, title, body, notes) VALUES (?, ?, ?, ?, ?, ?)',
+                             (rowid, collection, key, *search_fields(collection, e)))
+            for key in set(known) - seen:
+                rowid = conn.execute('SELECT rowid FROM entities WHERE collection = ? AND id = ?',
+                                     (collection, key)).fetchone()[0]
+                conn.execute('DELETE FROM search WHERE rowid = ?', (rowid,))
+                conn.execute(f'DELETE FROM {collection} WHERE id = ?', (key,))
+                conn.execute('DELETE FROM entities WHERE rowid = ?', (rowid,))
+                stats['removed'] += 1
+    return stats
+
+
+def fts_query(text):
+    # Every word must match, as a prefix; quotes keep FTS5 operators out of user input.
+    words = [w.replace('"', '') for w in text.split()]
+    return ' '.join(f'"{w}"*' for w in words if w)
+
+
+def search(conn, text, collection=None, limit=20):
+    query = fts_query(text)
+    if not query:
+        return []
+    sql = (f"SELECT collection, id, title, snippet(search, -1, '[', ']', '…', 12), {RANK} AS score "
+           "FROM search WHERE search MATCH ?")
+    params = [query]
+    if collection:
+        sql += ' AND collection = ?'
+        params.append(collection)
+    sql += ' ORDER BY score LIMIT ?'
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def main(argv):
+    args = argv[1:]
+    if not args or args[0] not in ('sync', 'search'):
+        print("Usage: python ianua_search.py sync [db.json] [--sqlite ianua.sqlite]")
+        print("       python ianua_search.py search [--in wines|wineries|menu|glossary] <words...>")
+        return 1
+    command = args.pop(0)
+    sqlite_path = SQLITE_FILE
+    if '--sqlite' in args:
+        i = args.index('--sqlite')
+        sqlite_path = args[i + 1]
+        del args[i:i + 2]
+    conn = connect(sqlite_path)
+
+    if command == 'sync':
+        path = args[0] if args else DB_FILE
+        start = time.perf_counter()
+        stats = sync(IanuaDB.load(path), conn)
+        print(f"Synced {path} -> {sqlite_path} in {(time.perf_counter() - start) * 1000:.0f} ms: "
+              f"{stats['added']} added, {stats['updated']} updated, "
+              f"{stats['removed']} removed, {stats['unchanged']} unchanged")
+        return 0
+
+    collection = None
+    if '--in' in args:
+        i = args.index('--in')
+        collection = args[i + 1]
+        del args[i:i + 2]
+    start = time.perf_counter()
+    hits = search(conn, ' '.join(args), collection)
+    elapsed = (time.perf_counter() - start) * 1000
+    for coll, key, title, snippet, score in hits:
+        print(f"{score:8.2f}  {coll:9s} {key:30s} {title.splitlines()[0] if title else ''}")
+        print(f"          {snippet.replace(chr(10), ' ')}")
+    print(f"{len(hits)} hits in {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
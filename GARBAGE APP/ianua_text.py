@@ -0,0 +1,129 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Text normalisation shared by the matching/search scripts.
+# fold("Entrée VALDÔTÈN – l’Adrèt") == "entree valdoten - l'adret"
+
+_PUNCT = str.maketrans({
+    '’': "'", '‘': "'", '´': "'", '`': "'",
+    '–': '-', '—': '-', ' ': ' ',
+    '“': '"', '”': '"', '«': '"', '»': '"',
+})
+_SPACES = re.compile(r'\s+')
+_WORDS = re.compile(r"[a-z0-9]+")
+
+
+def strip_accents(text):
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).replace('œ', 'oe').replace('æ', 'ae')
+
+
+def fold(text):
+    """Lowercase, accent-free, typographic punctuation flattened, whitespace collapsed."""
+    if not text:
+        return ''
+    text = strip_accents(str(text).translate(_PUNCT).lower())
+    return _SPACES.sub(' ', text).strip()
+
+
+def fold_aligned(text):
+    """Like fold() but one output character per input character (no whitespace
+    collapsing, 'œ' -> 'o'), so match offsets are offsets into the original."""
+    text = str(text).translate(_PUNCT)
+    if text.isascii():
+        return text.lower()
+    return ''.join(_fold_char(c) for c in text)
+
+
+@lru_cache(maxsize=4096)
+def _fold_char(c):
+    # Lowercase per character: 'İ'.lower() is two characters.
+    f = strip_accents(c.lower())
+    return f[0] if f else ' '
+
+
+def words(text):
+    """Folded alphanumeric tokens of `text`."""
+    return _WORDS.findall(fold(text))
+
+
+class Automaton:
+    """Aho–Corasick matcher: finds every pattern in one pass over the text.
+
+    Patterns and texts are matched as given, so fold() both sides first.
+    find() returns leftmost-longest, non-overlapping (start, end, value) hits;
+    with whole_words=True a hit must not start or end inside a word.
+    """
+
+    def __init__(self, patterns=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._own = [[]]   # patterns ending exactly at each state
+        self._out = [[]]   # own + those reached through fail links (built by _compile)
+        self._compiled = False
+        for text, value in patterns:
+            self.add(text, value)
+
+    def add(self, text, value):
+        if not text:
+            return
+        state = 0
+        for ch in text:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            state = nxt
+        self._own[state].append((len(text), value))
+        self._compiled = False
+
+    def _compile(self):
+        # Rebuilt from scratch, so add() after a search does not duplicate outputs.
+        self._out = [list(own) for own in self._own]
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._compiled = True
+
+    def iter_all(self, text):
+        """Every (start, end, value) occurrence, overlapping ones included."""
+        if not self._compiled:
+            self._compile()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, value in out[state]:
+                yield i + 1 - length, i + 1, value
+
+    def find(self, text, whole_words=True):
+        hits = []
+        for start, end, value in self.iter_all(text):
+            if whole_words and ((start > 0 and text[start - 1].isalnum())
+                                or (end < len(text) and text[end].isalnum())):
+                continue
+            hits.append((start, end, value))
+        hits.sort(key=lambda h: (h[0], h[0] - h[1]))
+        chosen, last_end = [], 0
+        for start, end, value in hits:
+            if start >= last_end:
+                chosen.append((start, end, value))
+                last_end = end
+        return chosen
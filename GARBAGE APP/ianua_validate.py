@@ -0,0 +1,191 @@
+import sys
+import time
+from ianua_db import IanuaDB, DB_FILE
+
+# Schema and referential-integrity validator for the whole DB.
+# The schema below is compiled once into per-collection check lists; a run
+# builds the id sets first and then checks every entity, field type, duplicate
+# and cross reference in a single pass, reporting per rule.
+#
+#   python ianua_validate.py [db.json] [--samples 5]
+#
+# Rules with severity 'error' make the command exit 1. IanuaDB.save() runs the
+# same validation and prints a warning line when it finds errors.
+
+STR = (str,)
+NUM_OR_STR = (str, int, float)
+OPT = type(None)
+
+# collection -> {field: (allowed types, required)}
+SCHEMA = {
+    'wines': {
+        'id': (STR, True), 'wineryId': (STR, True), 'name': (STR, True),
+        'type': (STR + (OPT,), False), 'grapes': (STR + (OPT,), False),
+        'description': (STR + (OPT,), False), 'pairing': (STR + (OPT,), False),
+        'price': (NUM_OR_STR + (OPT,), False), 'priceValue': ((dict, OPT), False),
+        'priceRange': (STR + (OPT,), False),
+        'year': (NUM_OR_STR + (OPT,), False), 'altitude': (NUM_OR_STR + (OPT,), False),
+        'image': (STR + (OPT,), False), 'hidden': ((bool, OPT), False),
+        'vintages': ((list, OPT), False), 'ianuaPairings': ((list, OPT), False),
+    },
+    'wineries': {
+        'id': (STR, True), 'name': (STR, True),
+        'location': (STR + (OPT,), False), 'region': (STR + (OPT,), False),
+        'description': (STR + (OPT,), False), 'curiosity': (STR + (OPT,), False),
+        'image': (STR + (OPT,), False), 'website': (STR + (OPT,), False),
+        'coordinates': ((dict, OPT), False),
+    },
+    'menu': {
+        'id': (STR, True), 'name': (STR, True), 'category': (STR, False),
+        'price': (NUM_OR_STR + (OPT,), False), 'priceValue': ((dict, OPT), False),
+        'description': (STR + (OPT,), False), 'image': (STR + (OPT,), False), 'hidden': ((bool, OPT), False),
+        'verifiedPairings': ((list, OPT), False),
+    },
+    'glossary': {
+        'id': (STR, True), 'term': (STR, True), 'definition': (STR, True), 'category': (STR + (OPT,), False),
+    },
+    # AiInstruction as written by the admin "Centrale" tab: an id and the instruction text.
+    'ai_instructions': {
+        'id': (STR, True), 'content': (STR, True),
+    },
+}
+TOP_LEVEL = ['wines', 'wineries', 'menu', 'glossary', 'ai_instructions']
+
+# rule id -> (severity, description)
+RULES = {
+    'top-level': ('error', 'top-level collection missing or not a list'),
+    'not-object': ('error', 'entry is not an object'),
+    'missing-field': ('error', 'required field missing or empty'),
+    'bad-type': ('error', 'field has the wrong type'),
+    'duplicate-id': ('error', 'id used by more than one entity in a collection'),
+    'winery-ref': ('error', 'wines[].wineryId points to no winery'),
+    'dish-ref': ('error', 'wines[].ianuaPairings[].dishId points to no dish'),
+    'wine-ref': ('error', 'menu[].verifiedPairings[].wineId points to no wine'),
+    'duplicate-pairing': ('error', 'same dish/wine paired twice on one entity'),
+    'bad-pairing': ('error', 'pairing entry is not an object with an id reference'),
+    'bad-vintage': ('warning', 'vintages[] entry is not an object'),
+}
+
+
+def _compile(schema):
+    """Turn the schema dict into flat (field, types, required) tuples per collection."""
+    return {name: [(field, types, required) for field, (types, required) in fields.items()]
+            for name, fields in schema.items()}
+
+
+COMPILED = _compile(SCHEMA)
+
+
+class Report:
+    def __init__(self, samples=5):
+        self.samples = samples
+        self.counts = {rule: 0 for rule in RULES}
+        self.examples = {rule: [] for rule in RULES}
+
+    def add(self, rule, where):
+        self.counts[rule] += 1
+        if len(self.examples[rule]) < self.samples:
+            self.examples[rule].append(where)
+
+    @property
+    def errors(self):
+        return sum(n for rule, n in self.counts.items() if RULES[rule][0] == 'error')
+
+    @property
+    def warnings(self):
+        return sum(n for rule, n in self.counts.items() if RULES[rule][0] == 'warning')
+
+    def format(self):
+        lines = []
+        for rule, n in self.counts.items():
+            if n:
+                severity, text = RULES[rule]
+                lines.append(f"{severity.upper():7s} {rule:18s} {n:5d}  {text}")
+                for where in self.examples[rule]:
+                    lines.append(f"          {where}")
+        lines.append(f"{self.errors} errors, {self.warnings} warnings")
+        return '\n'.join(lines)
+
+
+def _check_pairings(report, where, pairings, key, targets, ref_rule):
+    seen = set()
+    for n, p in enumerate(pairings):
+        if not isinstance(p, dict) or p.get(key) is None:
+            report.add('bad-pairing', f"{where}[{n}]")
+            continue
+        ref = str(p[key])
+        if ref not in targets:
+            report.add(ref_rule, f"{where}[{n}].{key} = {ref!r}")
+        if ref in seen:
+            report.add('duplicate-pairing', f"{where}[{n}].{key} = {ref!r}")
+        seen.add(ref)
+
+
+def validate(data, samples=5):
+    report = Report(samples)
+    for name in TOP_LEVEL:
+        if not isinstance(data.get(name), list):
+            report.add('top-level', name)
+
+    # Reference sets first, so the entity pass below is a single loop.
+    ids = {name: set() for name in COMPILED}
+    for name in COMPILED:
+        for n, e in enumerate(data.get(name) or []):
+            if isinstance(e, dict) and e.get('id') is not None:
+                key = str(e['id'])
+                if key in ids[name]:
+                    report.add('duplicate-id', f"{name}[{n}].id = {key!r}")
+                ids[name].add(key)
+
+    for name, checks in COMPILED.items():
+        for n, e in enumerate(data.get(name) or []):
+            where = f"{name}[{n}]"
+            if not isinstance(e, dict):
+                report.add('not-object', where)
+                continue
+            where = f"{name}/{e.get('id', '?')}"
+            for field, types, required in checks:
+                value = e.get(field)
+                if value is None or value == '':
+                    if required:
+                        report.add('missing-field', f"{where}.{field}")
+                    if value is None:
+                        continue
+                if not isinstance(value, types):
+                    report.add('bad-type', f"{where}.{field}: {type(value).__name__}")
+
+            if name == 'wines':
+                if e.get('wineryId') and str(e['wineryId']) not in ids['wineries']:
+                    report.add('winery-ref', f"{where}.wineryId = {e['wineryId']!r}")
+                if isinstance(e.get('ianuaPairings'), list):
+                    _check_pairings(report, f"{where}.ianuaPairings", e['ianuaPairings'],
+                                    'dishId', ids['menu'], 'dish-ref')
+                if isinstance(e.get('vintages'), list):
+                    for v in e['vintages']:
+                        if not isinstance(v, dict):
+                            report.add('bad-vintage', f"{where}.vintages")
+            elif name == 'menu' and isinstance(e.get('verifiedPairings'), list):
+                _check_pairings(report, f"{where}.verifiedPairings", e['verifiedPairings'],
+                                'wineId', ids['wines'], 'wine-ref')
+    return report
+
+
+def main(argv):
+    args = argv[1:]
+    samples = 5
+    if '--samples' in args:
+        i = args.index('--samples')
+        samples = int(args[i + 1])
+        del args[i:i + 2]
+    path = args[0] if args else DB_FILE
+    db = IanuaDB.load(path)
+    start = time.perf_counter()
+    report = validate(db.data, samples)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(report.format())
+    print(f"Validated {path} in {elapsed:.1f} ms")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
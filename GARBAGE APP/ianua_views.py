@@ -0,0 +1,190 @@
+import os
+import sys
+from ianua_db import IanuaDB, DB_FILE, write_json_atomic, read_json_cached
+from ianua_regions import Classifier, VDA_ZONES, PIEMONTE_ZONES
+
+# Precomputed membership of every wine and winery in the app's region views.
+# The rules are those of the filteredWines / filteredWineries blocks in
+# components/mobile/MobileApp.tsx; the zone comes from ianua_regions (the
+# registry's determineWineryRegion), or is 'unknown' as in the app. The
+# piemonte_zones.txt communes and winery list are not used: the app does not
+# know them, so a view never lists a wine the app would hide. The manual
+# winery.region is compared as is (the app's ===). The result is written next
+# to the db as views.json:
+#
+#   {"views": ["vda", "piemonte", "liguria", "sardegna"],
+#    "wines":    {"ids": [...], "zones": [...], "masks": [...]},   # bit i = views[i]
+#    "wineries": {"ids": [...], "zones": [...], "masks": [...]},
+#    "members":  {"vda": {"wines": [ids], "wineries": [ids]}, ...},
+#    "wineryOf": {wine id: winery id}, "sources": {winery id: [location, region]},
+#    "gazetteer": <ianua_regions fingerprint>}
+#
+#   python ianua_views.py [db.json] [--full]     # rebuild views.json, report orphans/overlaps
+#
+# The rebuild is incremental: a wine keeps its previous mask unless it is new,
+# moved to another winery, or its winery's location/region changed. Any change
+# to the gazetteer recomputes everything. --full ignores the previous file.
+
+VIEWS = ['vda', 'piemonte', 'liguria', 'sardegna']
+VIEWS_FILE = 'views.json'
+BITS = {view: 1 << i for i, view in enumerate(VIEWS)}
+
+_classifier = None
+
+
+def app_classifier():
+    """Classifier over the gazetteer alone, without piemonte_zones.txt."""
+    global _classifier
+    if _classifier is None:
+        _classifier = Classifier(piemonte_zones=None)
+    return _classifier
+
+
+def views_path(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), VIEWS_FILE)
+
+
+def _in_view(view, zone, manual):
+    if view == 'vda':
+        return zone in VDA_ZONES or manual == 'vda'
+    if view == 'piemonte':
+        return zone in PIEMONTE_ZONES or manual == 'piemonte'
+    return zone == view or manual == view
+
+
+def wine_mask(winery):
+    """Bitmask of the views a wine of this winery is listed in (filteredWines)."""
+    zone = app_classifier().classify(winery).zone or 'unknown'
+    manual = (winery or {}).get('region')
+    mask = 0
+    for view, bit in BITS.items():
+        if _in_view(view, zone, manual):
+            mask |= bit
+    return zone, mask
+
+
+def winery_mask(winery):
+    """Bitmask of the views a winery is listed in (filteredWineries).
+
+    The VDA winery list is exclusion based: everything that is not Piemonte,
+    Liguria or Sardegna is shown there.
+    """
+    zone, mask = wine_mask(winery)
+    if zone not in PIEMONTE_ZONES and zone not in ('liguria', 'sardegna') \
+            and (winery or {}).get('region') != 'piemonte':
+        mask |= BITS['vda']
+    return zone, mask
+
+
+def names(mask):
+    return [view for view, bit in BITS.items() if mask & bit]
+
+
+def _source(winery):
+    return [(winery or {}).get('location'), (winery or {}).get('region')]
+
+
+def build(db, previous=None):
+    """(views document, number of wines recomputed). previous is an older views.json document."""
+    previous = previous or {}
+    old_sources = previous.get('sources', {})
+    old_wines = previous.get('wines', {})
+    old = {wid: (zone, mask) for wid, zone, mask in
+           zip(old_wines.get('ids', []), old_wines.get('zones', []), old_wines.get('masks', []))}
+    old_winery_of = previous.get('wineryOf', {})
+    gazetteer = app_classifier().fingerprint
+    compatible = previous.get('views') == VIEWS and previous.get('gazetteer') == gazetteer
+
+    sources, wineries = {}, {'ids': [], 'zones': [], 'masks': []}
+    for w in db.collection('wineries'):
+        if not isinstance(w, dict) or w.get('id') is None:
+            continue
+        wid = str(w['id'])
+        sources[wid] = _source(w)
+        zone, mask = winery_mask(w)
+        wineries['ids'].append(wid)
+        wineries['zones'].append(zone)
+        wineries['masks'].append(mask)
+
+    wines, winery_of, recomputed = {'ids': [], 'zones': [], 'masks': []}, {}, 0
+    for w in db.collection('wines'):
+        if not isinstance(w, dict) or w.get('id') is None:
+            continue
+        wid, owner = str(w['id']), str(w.get('wineryId'))
+        cached = old.get(wid)
+        if compatible and cached and old_winery_of.get(wid) == owner \
+                and old_sources.get(owner) == sources.get(owner):
+            zone, mask = cached
+        else:
+            zone, mask = wine_mask(db.winery_of(w))
+            recomputed += 1
+        wines['ids'].append(wid)
+        wines['zones'].append(zone)
+        wines['masks'].append(mask)
+        winery_of[wid] = owner
+
+    members = {view: {'wines': [i for i, m in zip(wines['ids'], wines['masks']) if m & bit],
+                      'wineries': [i for i, m in zip(wineries['ids'], wineries['masks']) if m & bit]}
+               for view, bit in BITS.items()}
+    document = {'views': VIEWS, 'wines': wines, 'wineries': wineries, 'members': members,
+                'wineryOf': winery_of, 'sources': sources, 'gazetteer': gazetteer}
+    return document, recomputed
+
+
+def load_views(path):
+    """A previously written views.json, or None."""
+    if not os.path.exists(path):
+        return None
+    return read_json_cached(path, cache=False)
+
+
+def refresh(db, path):
+    """Bring the views.json next to the db at path up to date and return it."""
+    out = views_path(path)
+    previous = load_views(out)
+    document, recomputed = build(db, previous)
+    if recomputed or document != previous:
+        write_json_atomic(document, out)
+    return document
+
+
+def anomalies(document):
+    """(wine ids in no view, {wine id: [views]} for wines in several views)."""
+    wines = document['wines']
+    orphans, overlaps = [], {}
+    for wid, mask in zip(wines['ids'], wines['masks']):
+        if not mask:
+            orphans.append(wid)
+        elif mask & (mask - 1):
+            overlaps[wid] = names(mask)
+    return orphans, overlaps
+
+
+def main(argv):
+    args = argv[1:]
+    full = '--full' in args
+    args = [a for a in args if a != '--full']
+    path = args[0] if args else DB_FILE
+    db = IanuaDB.load(path)
+    out = views_path(path)
+    document, recomputed = build(db, None if full else load_views(out))
+    write_json_atomic(document, out)
+
+    print(f"{len(document['wines']['ids'])} wines ({recomputed} recomputed), "
+          f"{len(document['wineries']['ids'])} wineries -> {out}")
+    for view in VIEWS:
+        m = document['members'][view]
+        print(f"  {view:10s} {len(m['wines']):5d} wines {len(m['wineries']):4d} wineries")
+    orphans, overlaps = anomalies(document)
+    for wid in orphans:
+        wine = db.get('wines', wid)
+        winery = db.winery_of(wine) or {}
+        print(f"  IN NO VIEW {wid} {wine.get('name')!r} (winery {winery.get('name')!r}, "
+              f"location={winery.get('location')!r}, region={winery.get('region')!r})")
+    for wid, views in overlaps.items():
+        print(f"  IN {len(views)} VIEWS {wid} {db.get('wines', wid).get('name')!r}: {', '.join(views)}")
+    return 1 if orphans or overlaps else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
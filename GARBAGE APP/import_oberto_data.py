@@ -1,11 +1,11 @@
 
 import json
 import sys
+from ianua_db import IanuaDB
 
 try:
     print("Loading db.json...")
-    with open('db.json', 'r', encoding='utf-8') as f:
-        db = json.load(f)
+    db = IanuaDB.load('db.json')
         
     print("Loading piemonte_full_data.json...")
     try:
@@ -50,12 +50,13 @@ try:
             ]
         }
 
+    source = IanuaDB(source)
+
     # 1. Import Winery
-    oberto_winery = next((w for w in source['wineries'] if w['id'] == 'andrea_oberto'), None)
+    oberto_winery = source.get('wineries', 'andrea_oberto')
     if oberto_winery:
-        existing_winery = next((w for w in db['wineries'] if w['id'] == 'andrea_oberto'), None)
-        if not existing_winery:
-            db['wineries'].insert(0, oberto_winery)
+        if not db.has('wineries', 'andrea_oberto'):
+            db.insert('wineries', oberto_winery, at_front=True)
             print("Imported winery: Andrea Oberto")
         else:
             print("Winery Andrea Oberto already exists.")
@@ -64,23 +65,20 @@ try:
     target_wine_ids = ['andrea_oberto_nebbiolo_2023', 'andrea_oberto_barolo_2019']
     
     for wid in target_wine_ids:
-        source_wine = next((w for w in source['wines'] if w['id'] == wid), None)
+        source_wine = source.get('wines', wid)
         if source_wine:
-            existing_wine = next((w for w in db['wines'] if w['id'] == wid), None)
-            if not existing_wine:
-                db['wines'].insert(0, source_wine)
+            if not db.has('wines', wid):
+                db.insert('wines', source_wine, at_front=True)
                 print(f"Imported wine: {source_wine['name']}")
             else:
                 print(f"Wine {wid} already exists (updating details just in case).")
                 # Update details if exists, to ensure description matches
-                index = db['wines'].index(existing_wine)
-                db['wines'][index] = source_wine
+                db.replace('wines', source_wine)
                 print(f"Updated wine {wid}")
         else:
             print(f"Source wine {wid} not found in source data!")
 
-    with open('db.json', 'w', encoding='utf-8') as f:
-        json.dump(db, f, indent=2, ensure_ascii=False)
+    db.save()
     print("db.json saved.")
 
 except Exception as e:
@@ -1,17 +1,17 @@
 
 import json
+from ianua_dishes import DishIndex
 
 db_path = 'c:/Users/Urukk/.gemini/antigravity/scratch/ianua-vini-v2/db.json'
 
 with open(db_path, 'r', encoding='utf-8') as f:
     data = json.load(f)
 
-# Helper to find dish ID by name fragment
+# Dish ID by name fragment (accent-insensitive, Italian or French name); raises DishError if ambiguous
+dishes = DishIndex(data.get('menu', []))
+
 def find_dish(keyword):
-    for m in data.get('menu', []):
-        if keyword.lower() in m.get('name', '').lower():
-            return m['id']
-    return None
+    return dishes.resolve(keyword)
 
 # Resolve Dynamic IDs
 id_polenta = find_dish("polent") # Detect "Le polente" etc.
@@ -0,0 +1,206 @@
+import glob
+import hashlib
+import json
+import marshal
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from ianua_db import CACHE_SUFFIX, JOURNAL_SUFFIX
+from ianua_history import DEFAULT_PATTERNS
+from ianua_text import fold_aligned
+
+# Search any number of JSON files (db, backups, imports) in parallel.
+# Every hit is reported with its RFC 6901 JSON pointer and the id of the
+# enclosing entity, with a short snippet around the match instead of a dump
+# of the whole object.
+#
+#   python jsearch.py "Selezione di formaggi"                  # default: db*.json, backups, *.json
+#   python jsearch.py "formaggi" live_data_backup.json RESTORE_FINAL.json
+#   python jsearch.py --fold "entree valdoten"                 # accent- and case-insensitive
+#   python jsearch.py --regex "Barolo.*20(19|21)" --field name --in wines
+#   python jsearch.py --case "DOC" --json                      # one JSON object per hit
+#
+# Each worker flattens a file into (pointer, entity, text) leaves once and keeps
+# them in .jsearch_cache/; later searches reuse the leaves of every file whose
+# size/mtime (or, after a touch, content hash) is unchanged and never re-parse it.
+
+CACHE_DIR = '.jsearch_cache'
+CACHE_VERSION = 2
+EXTRA_PATTERNS = ['*.json']
+SNIPPET = 60
+
+
+def _escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def flatten(data):
+    """[(pointer, entity, text)] for every string or number leaf (inline data: URLs excluded).
+
+    entity is '<collection>/<id>' for the nearest enclosing object with an id.
+    """
+    leaves = []
+    stack = [(data, '', None)]
+    while stack:
+        node, pointer, entity = stack.pop()
+        if isinstance(node, dict):
+            if node.get('id') is not None and pointer:
+                entity = f"{pointer.split('/')[1]}/{node['id']}"
+            for k in reversed(list(node)):
+                stack.append((node[k], f"{pointer}/{_escape(k)}", entity))
+        elif isinstance(node, list):
+            for i in range(len(node) - 1, -1, -1):
+                stack.append((node[i], f"{pointer}/{i}", entity))
+        elif isinstance(node, str):
+            if not node.startswith('data:'):   # inline images: nothing to find in base64
+                leaves.append((pointer, entity, node))
+        elif isinstance(node, (int, float)) and not isinstance(node, bool):
+            leaves.append((pointer, entity, str(node)))
+    return leaves
+
+
+def _cache_path(path):
+    return os.path.join(CACHE_DIR, hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest() + '.leaves')
+
+
+def load_leaves(path):
+    """(leaves, status) for a file, from the leaf cache when the file is unchanged."""
+    st = os.stat(path)
+    cache = _cache_path(path)
+    raw = None
+    try:
+        with open(cache, 'rb') as f:
+            key = marshal.load(f)
+            if key['version'] == CACHE_VERSION and key['size'] == st.st_size:
+                if key['mtime_ns'] == st.st_mtime_ns:
+                    return marshal.load(f), 'cached'
+                with open(path, 'rb') as src:
+                    raw = src.read()
+                if hashlib.sha1(raw).hexdigest() == key['sha1']:
+                    return marshal.load(f), 'cached'
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass
+    if raw is None:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    try:
+        leaves = flatten(json.loads(raw))
+        status = 'parsed'
+    except ValueError as e:
+        leaves, status = [], f"invalid json: {e}"
+    key = {'version': CACHE_VERSION, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+           'sha1': hashlib.sha1(raw).hexdigest()}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{cache}.tmp-{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        marshal.dump(key, f)
+        marshal.dump(leaves, f)
+    os.replace(tmp, cache)
+    return leaves, status
+
+
+def compile_query(pattern, mode='literal', case=False):
+    """A regex for the query; fold mode matches against fold_aligned() text."""
+    if mode == 'fold':
+        return re.compile(re.escape(fold_aligned(pattern)))
+    source = pattern if mode == 'regex' else re.escape(pattern)
+    return re.compile(source, 0 if case else re.IGNORECASE)
+
+
+def search_file(job):
+    """Worker: (path, status, [(pointer, entity, text, start, end)])."""
+    path, pattern, mode, case, collection, field = job
+    try:
+        leaves, status = load_leaves(path)
+    except OSError as e:
+        return path, f"unreadable: {e}", []
+    query = compile_query(pattern, mode, case)
+    prefix = f"/{_escape(collection)}/" if collection else None
+    hits = []
+    for pointer, entity, text in leaves:
+        if prefix and not pointer.startswith(prefix):
+            continue
+        if field and pointer.rsplit('/', 1)[-1] != _escape(field):
+            continue
+        m = query.search(fold_aligned(text) if mode == 'fold' else text)
+        if m:
+            hits.append((pointer, entity, text, m.start(), m.end()))
+    return path, status, hits
+
+
+def snippet(text, start, end, width=SNIPPET):
+    left = max(0, start - width // 2)
+    right = min(len(text), end + width // 2)
+    body = f"{text[left:start]}[{text[start:end]}]{text[end:right]}".replace('\n', ' ')
+    return ('…' if left else '') + body + ('…' if right < len(text) else '')
+
+
+def default_files():
+    return sorted({p for pattern in DEFAULT_PATTERNS + EXTRA_PATTERNS for p in glob.glob(pattern)
+                   if p.endswith('.json')})
+
+
+def search(paths, pattern, mode='literal', case=False, collection=None, field=None, workers=None):
+    """Yield (path, status, hits) per file, in the order given."""
+    paths = [p for p in paths if os.path.isfile(p) and not p.endswith((CACHE_SUFFIX, JOURNAL_SUFFIX))
+             and '.tmp' not in p]
+    compile_query(pattern, mode, case)   # fail early on a bad regex
+    jobs = [(p, pattern, mode, case, collection, field) for p in paths]
+    if len(jobs) < 2:
+        yield from map(search_file, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(search_file, jobs)
+
+
+def main(argv):
+    args = argv[1:]
+    mode, case, as_json = 'literal', False, False
+    options = {'--in': None, '--field': None, '--workers': None, '--limit': None}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    if '--regex' in args:
+        mode = 'regex'
+    if '--fold' in args:
+        mode = 'fold'
+    case = '--case' in args
+    as_json = '--json' in args
+    args = [a for a in args if a not in ('--regex', '--fold', '--case', '--json')]
+    if not args:
+        print("Usage: python jsearch.py PATTERN [files or globs...] [--regex | --fold] [--case] "
+              "[--in collection] [--field name] [--workers N] [--limit N] [--json]")
+        return 1
+    pattern, targets = args[0], args[1:]
+    paths = sorted({p for t in targets for p in (glob.glob(t) or [t])}) if targets else default_files()
+    workers = int(options['--workers']) if options['--workers'] else None
+    limit = int(options['--limit']) if options['--limit'] else None
+
+    try:
+        results = search(paths, pattern, mode, case, options['--in'], options['--field'], workers)
+        total = files = 0
+        for path, status, hits in results:
+            if not status.startswith(('parsed', 'cached')):
+                print(f"{path}: {status}", file=sys.stderr)
+            if hits:
+                files += 1
+            for pointer, entity, text, start, end in hits[:limit]:
+                total += 1
+                if as_json:
+                    print(json.dumps({'file': path, 'pointer': pointer, 'entity': entity,
+                                      'match': text[start:end], 'text': text}, ensure_ascii=False))
+                else:
+                    print(f"{path}:{pointer}  [{entity or '-'}]  {snippet(text, start, end)}")
+    except re.error as e:
+        print(f"ERROR: bad regex: {e}")
+        return 1
+    if not as_json:
+        print(f"{total} hits in {files} of {len(paths)} files")
+    return 0 if total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
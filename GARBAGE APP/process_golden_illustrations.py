@@ -1,7 +1,6 @@
 
 import os
-from PIL import Image
-import numpy as np
+import ianua_matting
 
 # Define paths
 source_dir = r"C:\Users\Urukk\.gemini\antigravity\brain\7d649865-a0d2-436b-ae22-4d1899163052"
@@ -26,31 +25,8 @@ for src_name, target_name in files_map.items():
     print(f"Processing {src_name} -> {target_name}...")
     
     try:
-        img = Image.open(src_path).convert("RGBA")
-        data = np.array(img)
-        
-        # Split channels
-        r, g, b, a = data[:,:,0], data[:,:,1], data[:,:,2], data[:,:,3]
-        
-        # Calculate grayscale/brightness
-        r_f, g_f, b_f = r.astype(np.float32), g.astype(np.float32), b.astype(np.float32)
-        brightness = (r_f + g_f + b_f) / 3.0
-        
-        # New Alpha: Use brightness with a boost for transparency
-        new_alpha = np.zeros_like(r, dtype=np.uint8)
-        
-        # Keep pixels where brightness is above 30
-        mask = brightness > 30
-        
-        # boost for a clean golden look
-        new_alpha[mask] = np.clip(brightness[mask] * 2.0, 0, 255).astype(np.uint8)
-        
-        # Update alpha channel
-        data[:,:,3] = new_alpha
-        
-        # Save result
-        processed_img = Image.fromarray(data)
-        processed_img.save(target_path)
+        # Alpha from brightness (x2), pixels darker than 30 transparent
+        ianua_matting.process(src_path, target_path, "brightness-to-alpha")
         print(f"Saved: {target_path}")
         
     except Exception as e:
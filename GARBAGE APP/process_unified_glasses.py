@@ -1,27 +1,13 @@
 
-from PIL import Image
+import ianua_matting
 import os
 
 def make_transparent(input_path, output_path):
     if not os.path.exists(input_path):
         print(f"Error: {input_path} not found")
         return
-    img = Image.open(input_path).convert("RGBA")
-    datas = img.getdata()
-
-    newData = []
-    for item in datas:
-        # brightness based on max of RGB
-        brightness = max(item[0], item[1], item[2])
-        if brightness < 8: # Slightly lower threshold for crispness
-             newData.append((0, 0, 0, 0))
-        else:
-             # Scale alpha based on brightness but keep it high for midtones
-             alpha = min(255, int(brightness * 2.5)) 
-             newData.append((item[0], item[1], item[2], alpha))
-
-    img.putdata(newData)
-    img.save(output_path, "PNG")
+    # alpha = 2.5 x brightest channel; near-black pixels (< 8) cleared entirely
+    ianua_matting.process(input_path, output_path, "glass-glow")
     print(f"Saved transparent image to {output_path}")
 
 # Base folder for raw artifacts
@@ -1,10 +1,9 @@
 
-import json
 import sys
+from ianua_db import IanuaDB
 
 try:
-    with open('db.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    db = IanuaDB.load('db.json', journal=True)
 
     # Valid IDs from previous steps
     nebbiolo_id = "wine_1769635123838_0"
@@ -15,19 +14,17 @@ try:
     barolo_pairing = "L'eleganza di La Morra chiede piatti di grande struttura, selvaggina o preparazioni nobili."
     
     count = 0
-    for wine in data.get('wines', []):
-        if wine['id'] == nebbiolo_id:
-            wine['pairing'] = nebbiolo_pairing
-            print(f"Restored embedding pairing for Nebbiolo ({wine['id']})")
-            count += 1
-        elif wine['id'] == barolo_id:
-            wine['pairing'] = barolo_pairing
-            print(f"Restored embedding pairing for Barolo ({wine['id']})")
-            count += 1
+    if db.has('wines', nebbiolo_id):
+        db.update('wines', nebbiolo_id, pairing=nebbiolo_pairing)
+        print(f"Restored embedding pairing for Nebbiolo ({nebbiolo_id})")
+        count += 1
+    if db.has('wines', barolo_id):
+        db.update('wines', barolo_id, pairing=barolo_pairing)
+        print(f"Restored embedding pairing for Barolo ({barolo_id})")
+        count += 1
 
     if count > 0:
-        with open('db.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        db.save()
         print("db.json updated: Generic pairing text restored.")
     else:
         print("Target wines not found.")
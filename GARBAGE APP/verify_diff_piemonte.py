@@ -0,0 +1,18 @@
+import sys
+import ianua_diff
+
+# Regression check for `ianua_diff.py diff db.json piemonte_full_data.json`:
+# the export only carries wines and wineries, so the patch must not touch
+# menu, glossary or ai_instructions. Exits 1 if it does.
+#
+#   python verify_diff_piemonte.py [db.json] [piemonte_full_data.json]
+
+if __name__ == "__main__":
+    old = sys.argv[1] if len(sys.argv) > 1 else 'db.json'
+    new = sys.argv[2] if len(sys.argv) > 2 else 'piemonte_full_data.json'
+    patch = ianua_diff.diff(ianua_diff._load(old), ianua_diff._load(new))
+    touched = [c for c in ('menu', 'glossary', 'ai_instructions') if c in patch['collections']]
+    for c in touched:
+        print(f"FAIL {c}: changed although {new} does not contain it")
+    print(f"Skipped: {', '.join(patch['skipped_collections']) or 'none'}")
+    sys.exit(1 if touched else 0)